@@ -0,0 +1,259 @@
+"""Macro-factor stress model.
+
+Every classified instrument carries macro_drivers, an economic currency, a
+hedge flag and (for fixed income) a duration. The factor model turns these
+into a sparse instruments × factors exposure matrix, built once from
+instrument_classifications, so a factor shock becomes instrument returns in
+one sparse matrix-vector product — and a history of factor moves becomes a
+returns panel in one sparse matrix-matrix product.
+
+Factors and loadings:
+
+  driver:<name>   return of a macro driver (e.g. driver:iron_ore = -0.40);
+                  an instrument with n drivers loads 1/n on each
+  fx:<CCY>        move of CCY against the AUD; unhedged instruments whose
+                  economic currency (listing currency when untagged) is CCY
+                  load 1 (the exposure scenario currency shocks use; see
+                  src.analytics.scenarios.exposed_currency)
+  rates:<CCY>     yield change in basis points for CCY-denominated
+                  duration; loading -duration_years / 10,000
+
+Two shorthands expand over every factor of their kind:
+
+  fx:AUD          the AUD moving against every other currency, i.e. a
+                  foreign return of (1 + fx:CCY) / (1 + fx:AUD) - 1
+  rates           a parallel yield change in every currency
+
+Returns are the sum of loading × shock, floored at -100%. Instruments not in
+the database (projected new buys) have no exposure.
+"""
+
+import csv
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.analytics.scenarios import BASE_CURRENCY, exposed_currency
+from src.analytics.stress import StressResult, run_returns
+from src.compliance.context import ComplianceContext
+from src.db.connection import get_connection
+from src.portfolio.columns import parse_macro_drivers
+from src.portfolio.valuation import PortfolioValuation
+
+logger = logging.getLogger(__name__)
+
+FACTOR_KINDS = ("driver", "fx", "rates")
+
+
+@dataclass
+class SparseExposure:
+    """Rows × factors matrix in compressed sparse row form."""
+    indptr: np.ndarray          # (rows + 1,) offsets into indices/data
+    indices: np.ndarray         # factor column of each stored loading
+    data: np.ndarray            # loadings
+    n_factors: int
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def row_ids(self) -> np.ndarray:
+        """Row of each stored loading."""
+        return np.repeat(np.arange(self.n_rows), np.diff(self.indptr))
+
+    def matvec(self, x: np.ndarray) -> np.ndarray:
+        """(rows,) = exposure @ x for x of shape (factors,)."""
+        return np.bincount(self.row_ids, weights=self.data * x[self.indices], minlength=self.n_rows)
+
+    def matmat(self, x: np.ndarray) -> np.ndarray:
+        """(rows, k) = exposure @ x for x of shape (factors, k)."""
+        out = np.zeros((self.n_rows, x.shape[1]))
+        np.add.at(out, self.row_ids, self.data[:, None] * x[self.indices])
+        return out
+
+    def toarray(self) -> np.ndarray:
+        dense = np.zeros((self.n_rows, self.n_factors))
+        dense[self.row_ids, self.indices] = self.data
+        return dense
+
+
+@dataclass
+class FactorModel:
+    """Instrument factor exposures, keyed by ticker."""
+    tickers: list[str]
+    factors: list[str]
+    exposure: SparseExposure
+
+    def __post_init__(self):
+        self._row = {t: i for i, t in enumerate(self.tickers)}
+        self._col = {f: j for j, f in enumerate(self.factors)}
+
+    def shock_vector(self, shocks: dict[str, float]) -> np.ndarray:
+        """Factor shocks (shorthands expanded) as a vector over self.factors.
+
+        Raises ValueError for a factor no instrument is exposed to.
+        """
+        return self.shock_matrix([shocks])[:, 0]
+
+    def shock_matrix(self, shocks: list[dict[str, float]]) -> np.ndarray:
+        """Factors × len(shocks) matrix, one column per shock set."""
+        out = np.zeros((len(self.factors), len(shocks)))
+        fx_cols = [j for j, f in enumerate(self.factors) if f.startswith("fx:")]
+        rate_cols = [j for j, f in enumerate(self.factors) if f.startswith("rates:")]
+        for k, shock in enumerate(shocks):
+            aud_move = 0.0
+            for factor, value in shock.items():
+                if factor == f"fx:{BASE_CURRENCY}":
+                    aud_move = value
+                elif factor == "rates":
+                    out[rate_cols, k] += value
+                elif factor in self._col:
+                    out[self._col[factor], k] += value
+                else:
+                    raise ValueError(f"No instrument is exposed to factor '{factor}'. "
+                                     f"Available: {', '.join(self.available())}")
+            if aud_move:
+                if aud_move <= -1:
+                    raise ValueError(f"fx:{BASE_CURRENCY} must be above -1 (got {aud_move}).")
+                out[fx_cols, k] = (1 + out[fx_cols, k]) / (1 + aud_move) - 1
+        return out
+
+    def available(self) -> list[str]:
+        """Factor names accepted by shock_vector, shorthands included."""
+        extra = []
+        if any(f.startswith("fx:") for f in self.factors):
+            extra.append(f"fx:{BASE_CURRENCY}")
+        if any(f.startswith("rates:") for f in self.factors):
+            extra.append("rates")
+        return sorted(self.factors + extra)
+
+    def rows(self, pv: PortfolioValuation) -> np.ndarray:
+        """Model row per holding line (-1 where the ticker is not in the model)."""
+        return np.array([self._row.get(h.ticker, -1) for h in pv.holdings], dtype=np.intp)
+
+    def holding_returns(self, pv: PortfolioValuation, factor_shocks: np.ndarray) -> np.ndarray:
+        """Returns per holding line for factor shock vector(s).
+
+        factor_shocks is (factors,) or (factors, k); the result is (holdings,)
+        or (holdings, k).
+        """
+        if factor_shocks.ndim == 1:
+            returns = self.exposure.matvec(factor_shocks)
+        else:
+            returns = self.exposure.matmat(factor_shocks)
+        returns = np.maximum(np.concatenate([returns, np.zeros((1,) + returns.shape[1:])]), -1.0)
+        return returns[self.rows(pv)]      # row -1 picks the zero row
+
+
+def load_factor_model(db_path=None) -> FactorModel:
+    """Build the exposure matrix from instrument_classifications (one query)."""
+    with get_connection(db_path) as conn:
+        rows = conn.execute("""
+            SELECT i.ticker, i.currency, ic.macro_drivers, ic.economic_currency,
+                   ic.hedged, ic.duration_years
+            FROM instruments i
+            LEFT JOIN instrument_classifications ic ON ic.instrument_id = i.id
+            ORDER BY i.ticker
+        """).fetchall()
+
+    entries: list[list[tuple[str, float]]] = []
+    for r in rows:
+        loadings = []
+        drivers = parse_macro_drivers(r["macro_drivers"])
+        loadings += [(f"driver:{d}", 1.0 / len(drivers)) for d in drivers]
+        currency = r["economic_currency"] or r["currency"]
+        if exposed_currency(currency, r["hedged"]):
+            loadings.append((f"fx:{currency}", 1.0))
+        if r["duration_years"]:
+            loadings.append((f"rates:{currency}", -r["duration_years"] / 10_000))
+        entries.append(loadings)
+
+    factors = sorted({f for loadings in entries for f, _ in loadings})
+    col = {f: j for j, f in enumerate(factors)}
+    indptr = np.cumsum([0] + [len(loadings) for loadings in entries])
+    indices = np.array([col[f] for loadings in entries for f, _ in loadings], dtype=np.intp)
+    data = np.array([w for loadings in entries for _, w in loadings], dtype=float)
+
+    model = FactorModel([r["ticker"] for r in rows], factors,
+                        SparseExposure(indptr, indices, data, len(factors)))
+    logger.debug("Factor model: %d instruments × %d factors, %d loadings",
+                 len(rows), len(factors), len(data))
+    return model
+
+
+def _describe(shock: dict[str, float]) -> str:
+    parts = [f"{f} {v:+,.0f}bp" if f.startswith("rates") else f"{f} {v:+.0%}"
+             for f, v in shock.items() if v]
+    return ", ".join(parts) or "no factor moves"
+
+
+def run_factor_stress(
+    pv: PortfolioValuation, model: FactorModel, labels: list[str],
+    shocks: list[dict[str, float]], db_path=None, ctx: ComplianceContext | None = None,
+    rules: list[str] | None = None,
+) -> list[StressResult]:
+    """Run each factor shock set (e.g. each date of a history) through the stress pipeline.
+
+    All holding returns come from one sparse product; each column is then
+    assessed like any other scenario.
+    """
+    returns = model.holding_returns(pv, model.shock_matrix(shocks))
+    ctx = ctx or ComplianceContext.load(db_path)
+    note = "Factor model: returns from macro driver, currency and duration exposures."
+    return [
+        run_returns(pv, returns[:, k], f"factor:{label}", label, _describe(shock), "factor",
+                    note, db_path, ctx, rules)
+        for k, (label, shock) in enumerate(zip(labels, shocks))
+    ]
+
+
+def parse_shock(text: str) -> tuple[str, float]:
+    """'driver:iron_ore=-40%' → ('driver:iron_ore', -0.4); 'rates=+200bp' → ('rates', 200.0).
+
+    Returns are fractions (a % suffix divides by 100); rate shocks are basis
+    points (a bp suffix is optional, a % suffix multiplies by 100).
+    """
+    factor, sep, raw = text.partition("=")
+    factor, raw = factor.strip(), raw.strip().replace("−", "-")
+    if not sep or not factor or not raw:
+        raise ValueError(f"Expected FACTOR=VALUE, got '{text}'.")
+    if factor.split(":", 1)[0] not in FACTOR_KINDS:
+        raise ValueError(f"Unknown factor kind in '{factor}'. Available: {list(FACTOR_KINDS)}")
+    is_rate = factor == "rates" or factor.startswith("rates:")
+    scale = 1.0
+    if raw.endswith("%"):
+        raw, scale = raw[:-1], (100.0 if is_rate else 0.01)
+    elif raw.lower().endswith("bp"):
+        if not is_rate:
+            raise ValueError(f"Basis points only apply to rates factors: '{text}'.")
+        raw = raw[:-2]
+    try:
+        return factor, float(raw) * scale
+    except ValueError:
+        raise ValueError(f"Not a number: '{text}'.") from None
+
+
+def load_factor_history(path) -> tuple[list[str], list[dict[str, float]]]:
+    """Read a factor history CSV: a date column, then one column per factor.
+
+    Each row is the cumulative factor move from the start of the history, in
+    the units of parse_shock (blank cells are 0). Returns (dates, shocks).
+    """
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header or len(header) < 2:
+            raise ValueError(f"{path}: expected a header of date followed by factor names.")
+        dates, shocks = [], []
+        for line_no, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            try:
+                shocks.append(dict(parse_shock(f"{factor}={cell}")
+                                   for factor, cell in zip(header[1:], row[1:]) if cell.strip()))
+            except ValueError as exc:
+                raise ValueError(f"{path}, line {line_no}: {exc}") from None
+            dates.append(row[0])
+    return dates, shocks
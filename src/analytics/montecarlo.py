@@ -0,0 +1,264 @@
+"""Monte Carlo stress — probability of each objective failing over one year.
+
+The fixed scenarios in src.analytics.stress answer "what if 2008 happened
+again?". This module asks "how likely is it that an objective fails?" by
+fitting a return model to the daily log-returns built by
+src.analytics.correlation and simulating one-year paths of every held
+instrument:
+
+  bootstrap  — resamples contiguous 21-day blocks of history (all
+               instruments together), keeping fat tails, cross-correlation
+               and short-term autocorrelation without a parametric form.
+  student-t  — multivariate Student-t with the empirical mean and
+               covariance; degrees of freedom from the average excess
+               kurtosis.
+  regime     — two-state Markov switching between calm and stress regimes
+               (the stress periods of the correlation module), each with its
+               own mean and covariance.
+
+Paths are simulated in monthly steps. Survivability and the income bridge
+fail if the stabiliser drops below the 24-month floor at any month-end;
+compounding damage, optionality and real wealth are assessed at the
+horizon. Cash is held flat.
+
+Paths are generated in fixed-size chunks, each from its own child of a
+numpy SeedSequence, so a run is reproducible from its seed whatever the
+number of worker processes.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.analytics.correlation import _compute_returns, _identify_stress_periods, _load_price_series
+from src.analytics.stress import assess_objectives_batch
+from src.compliance.context import ComplianceContext
+from src.portfolio.valuation import PortfolioValuation
+
+logger = logging.getLogger(__name__)
+
+MODELS = ("bootstrap", "student-t", "regime")
+TRADING_DAYS = 252
+STEP_DAYS = 21          # one simulation step ≈ one month of trading days
+CHUNK_PATHS = 10_000    # paths per chunk (bounds memory; the unit of parallel work)
+PERCENTILES = (50, 95, 99)
+
+FAILURES = {
+    "forced_liquidation": "Stabiliser below the 24-month floor — forced to sell growth assets",
+    "income_bridge": "Income bridge under 24 months",
+    "compounder_loss": "Compounder capital below its starting value",
+    "optionality": "Compounders fell and optionality did not offset them",
+    "wealth_loss": "Total investable wealth below its starting value",
+}
+
+
+@dataclass
+class ReturnModel:
+    """A fitted daily log-return model for the held instruments."""
+    kind: str
+    tickers: list[str]
+    mean: np.ndarray                        # daily mean log-return per ticker
+    cov: np.ndarray                         # daily covariance
+    observations: int
+    block_sums: np.ndarray | None = None    # bootstrap: STEP_DAYS-day return of every circular block
+    dof: float | None = None                # student-t degrees of freedom
+    regime_mean: np.ndarray | None = None   # regime: (2, n) calm/stress daily means
+    regime_cov: np.ndarray | None = None    # regime: (2, n, n) daily covariances
+    transition: np.ndarray | None = None    # regime: (2, 2) daily transition matrix
+    start_regime: int = 0                   # regime: 1 if the last observation was in stress
+
+
+@dataclass
+class MonteCarloResult:
+    model: str
+    paths: int
+    seed: int | None
+    horizon_days: int
+    observations: int                       # daily returns the model was fitted on
+    tickers: list[str]                      # modelled instruments
+    unmodelled: list[str] = field(default_factory=list)   # held flat: too little price history
+    failure_probability: dict[str, float] = field(default_factory=dict)
+    wealth_loss_pct: dict[int, float] = field(default_factory=dict)       # percentile → %
+    compounder_loss_pct: dict[int, float] = field(default_factory=dict)
+    recovery_years: dict[int, float] = field(default_factory=dict)
+
+
+def _matrix_sqrt(cov: np.ndarray) -> np.ndarray:
+    """L with L @ L.T == cov; tolerates the singular covariances of short histories."""
+    eigval, eigvec = np.linalg.eigh(cov)
+    return eigvec * np.sqrt(np.clip(eigval, 0.0, None))
+
+
+def fit_return_model(
+    kind: str = "bootstrap", tickers: list[str] | None = None,
+    db_path=None, min_observations: int = 60,
+) -> ReturnModel:
+    """Fit a return model to the daily log-returns of the held instruments.
+
+    The sample starts on the first day every modelled ticker has a return;
+    tickers with fewer than min_observations returns are left out.
+    """
+    if kind not in MODELS:
+        raise ValueError(f"Unknown model: {kind}. Available: {list(MODELS)}")
+
+    prices = _load_price_series(db_path)
+    if tickers is not None:
+        prices = {t: s for t, s in prices.items() if t in set(tickers)}
+    returns = _compute_returns(prices) if prices else None
+    if returns is None or returns.empty:
+        raise ValueError("No price history to fit a return model.")
+
+    counts = returns.notna().sum()
+    returns = returns[sorted(counts[counts >= min_observations].index)]
+    if returns.shape[1] == 0:
+        raise ValueError(f"No instrument has {min_observations} daily returns to fit a model on.")
+    returns = returns.loc[returns.apply(lambda s: s.first_valid_index()).max():].fillna(0.0)
+    if len(returns) < min_observations:
+        raise ValueError(
+            f"Only {len(returns)} days where every instrument has a price "
+            f"(need {min_observations}).")
+
+    data = returns.to_numpy()
+    model = ReturnModel(
+        kind=kind, tickers=list(returns.columns),
+        mean=data.mean(axis=0), cov=np.atleast_2d(np.cov(data, rowvar=False)),
+        observations=len(data),
+    )
+
+    if kind == "bootstrap":
+        wrapped = np.vstack([data, data[:STEP_DAYS]])
+        cumulative = np.vstack([np.zeros(data.shape[1]), np.cumsum(wrapped, axis=0)])
+        model.block_sums = cumulative[STEP_DAYS:STEP_DAYS + len(data)] - cumulative[:len(data)]
+    elif kind == "student-t":
+        centred = data - model.mean
+        var = centred.var(axis=0)
+        kurt = (centred ** 4).mean(axis=0)[var > 0] / var[var > 0] ** 2 - 3
+        excess = float(kurt.mean()) if len(kurt) else 0.0
+        # Kurtosis of a t distribution is 6 / (dof - 4); thin tails cap at 30 (≈ normal)
+        model.dof = float(np.clip(4 + 6 / excess, 4.5, 30.0)) if excess > 0 else 30.0
+    else:
+        stress = _identify_stress_periods(returns).to_numpy()
+        n_stress = int(stress.sum())
+        if min(n_stress, len(stress) - n_stress) < max(20, data.shape[1] + 1):
+            raise ValueError(
+                f"Only {n_stress} stress-period days of {len(stress)} — too few to fit the regime "
+                "model; use bootstrap or student-t.")
+        model.regime_mean = np.stack([data[~stress].mean(axis=0), data[stress].mean(axis=0)])
+        model.regime_cov = np.stack([np.atleast_2d(np.cov(data[~stress], rowvar=False)),
+                                     np.atleast_2d(np.cov(data[stress], rowvar=False))])
+        counts = np.zeros((2, 2))
+        np.add.at(counts, (stress[:-1].astype(int), stress[1:].astype(int)), 1)
+        model.transition = (counts + 1) / (counts + 1).sum(axis=1, keepdims=True)
+        model.start_regime = int(stress[-1])
+
+    logger.debug("Fitted %s return model on %d days × %d instruments",
+                 kind, model.observations, len(model.tickers))
+    return model
+
+
+def _simulate_steps(model: ReturnModel, n_paths: int, steps: int,
+                    rng: np.random.Generator) -> np.ndarray:
+    """Monthly log-returns, shape (n_paths, steps, n_tickers)."""
+    n = len(model.tickers)
+    h = STEP_DAYS
+
+    if model.kind == "bootstrap":
+        starts = rng.integers(0, len(model.block_sums), size=(n_paths, steps))
+        return model.block_sums[starts]
+
+    if model.kind == "student-t":
+        dof = model.dof
+        z = rng.standard_normal((n_paths, steps, n)) @ _matrix_sqrt(model.cov).T
+        # Scale so the t draws have the fitted covariance: var(t) = dof / (dof - 2)
+        w = np.sqrt(rng.chisquare(dof, size=(n_paths, steps, 1)) / (dof - 2))
+        return model.mean * h + z * np.sqrt(h) / w
+
+    step_transition = np.linalg.matrix_power(model.transition, h)
+    roots = np.stack([_matrix_sqrt(c) for c in model.regime_cov])
+    regime = np.full(n_paths, model.start_regime)
+    out = np.empty((n_paths, steps, n))
+    for t in range(steps):
+        regime = (rng.random(n_paths) < step_transition[regime, 1]).astype(int)
+        z = np.einsum("pij,pj->pi", roots[regime], rng.standard_normal((n_paths, n)))
+        out[:, t] = model.regime_mean[regime] * h + z * np.sqrt(h)
+    return out
+
+
+def _run_chunk(args) -> dict[str, np.ndarray]:
+    """Simulate one chunk of paths and assess the objectives (runs in a worker)."""
+    model, pv, columns, monthly, n_paths, steps, seed = args
+    rng = np.random.default_rng(seed)
+    log_paths = np.cumsum(_simulate_steps(model, n_paths, steps, rng), axis=1)
+
+    base = np.array([h.value_aud for h in pv.holdings])
+    modelled = columns >= 0
+    growth = np.ones((n_paths, steps, len(base)))
+    growth[:, :, modelled] = np.exp(log_paths[:, :, columns[modelled]])
+    values = base * growth
+
+    monthly_obj = assess_objectives_batch(pv, values, monthly)
+    final = assess_objectives_batch(pv, values[:, -1], monthly)
+    return {
+        "forced_liquidation": monthly_obj.forced_liquidation.any(axis=1),
+        "income_bridge": (~monthly_obj.income_bridge_intact).any(axis=1),
+        "compounder_loss": final.compounder_loss_aud > 0,
+        "optionality": (~final.optionality_performed & (final.compounder_loss_aud > 0)
+                        & (pv.by_capital_role().get("optionality", 0) > 0)),
+        "wealth_loss": final.wealth_loss_aud > 0,
+        "wealth_loss_pct": final.wealth_loss_pct,
+        "compounder_loss_pct": final.compounder_loss_pct,
+        "recovery_years": final.recovery_years,
+    }
+
+
+def run_monte_carlo(
+    pv: PortfolioValuation, model: str | ReturnModel = "bootstrap",
+    paths: int = 100_000, seed: int | None = None, workers: int | None = None,
+    horizon_days: int = TRADING_DAYS, db_path=None, ctx: ComplianceContext | None = None,
+) -> MonteCarloResult:
+    """Simulate one-year paths and report the probability of each objective failing.
+
+    model is a kind from MODELS (fitted here) or a fitted ReturnModel, so one
+    fit can be reused for pre- and post-trade portfolios. workers=None uses
+    every core; workers=1 runs in-process.
+    """
+    if paths < 1:
+        raise ValueError("paths must be at least 1.")
+    if isinstance(model, str):
+        model = fit_return_model(model, [h.ticker for h in pv.holdings], db_path)
+    ctx = ctx or ComplianceContext.load(db_path)
+    monthly = ctx.param_float("monthly_expenses", 9000)
+    steps = max(1, round(horizon_days / STEP_DAYS))
+
+    index = {t: i for i, t in enumerate(model.tickers)}
+    columns = np.array([index.get(h.ticker, -1) for h in pv.holdings], dtype=int)
+    unmodelled = sorted({h.ticker for h, c in zip(pv.holdings, columns) if c < 0})
+
+    sizes = [CHUNK_PATHS] * (paths // CHUNK_PATHS) + ([paths % CHUNK_PATHS] if paths % CHUNK_PATHS else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(model, pv, columns, monthly, size, steps, s) for size, s in zip(sizes, seeds)]
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_run_chunk, jobs))
+    else:
+        chunks = [_run_chunk(job) for job in jobs]
+    merged = {key: np.concatenate([c[key] for c in chunks]) for key in chunks[0]}
+
+    def percentiles(values: np.ndarray) -> dict[int, float]:
+        return dict(zip(PERCENTILES, np.percentile(values, PERCENTILES).tolist()))
+
+    logger.debug("Monte Carlo: %d %s paths in %d chunks on %d workers",
+                 paths, model.kind, len(jobs), workers)
+    return MonteCarloResult(
+        model=model.kind, paths=paths, seed=seed, horizon_days=steps * STEP_DAYS,
+        observations=model.observations, tickers=model.tickers, unmodelled=unmodelled,
+        failure_probability={key: float(merged[key].mean()) for key in FAILURES},
+        wealth_loss_pct=percentiles(merged["wealth_loss_pct"]),
+        compounder_loss_pct=percentiles(merged["compounder_loss_pct"]),
+        recovery_years=percentiles(merged["recovery_years"]),
+    )
@@ -0,0 +1,193 @@
+"""Reverse stress testing — the smallest shock that breaks each objective or rule.
+
+Forward stress tests apply a chosen scenario and ask whether anything
+breaks. This module works backwards: over the shock space of the scenario
+library (one AUD return per asset class, macro driver and unhedged non-AUD
+currency held; see src.analytics.scenarios) it searches for the shock vector of
+smallest Euclidean norm that
+
+  - forces liquidation (stabiliser below the 24-month floor), or
+  - costs the compounders more than the drawdown tolerance (Rule 8.1), or
+  - breaches a compliance rule (src.compliance.batch),
+
+so the output reads as "how far is each cliff, and from which direction".
+
+The search is batched: every candidate shock is a row of one matrix, so
+each step of the search is a single evaluation of the objectives and the
+rulebook over thousands of stressed portfolios.
+
+  1. Rays: ± each factor axis plus random unit directions.
+  2. Along every ray a coarse grid of norms locates the first failure,
+     then a vectorised bisection narrows it.
+  3. Each target's best direction is refined by a few rounds of random
+     perturbation with shrinking width, keeping improvements.
+
+The result is a good upper bound on the minimal norm, not a certified
+optimum: failure regions need not be convex.
+"""
+
+import logging
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.analytics.scenarios import exposure_matrix, holding_factors
+from src.analytics.stress import assess_objectives_batch
+from src.compliance.batch import BATCH_RULE_IDS, BREACH, evaluate_batch
+from src.compliance.checks import RuleLimits
+from src.compliance.context import ComplianceContext
+from src.portfolio.valuation import PortfolioValuation
+
+logger = logging.getLogger(__name__)
+
+OBJECTIVES = {
+    "forced_liquidation": "Stabiliser below the 24-month floor — forced selling, income bridge broken",
+    "compounder_damage": "Compounder loss beyond the drawdown tolerance",
+}
+
+GRID_STEPS = 24
+BISECTION_STEPS = 30
+BISECT_BEST = 8         # directions per target carried into bisection
+
+
+@dataclass
+class BreakingShock:
+    """The smallest shock found that breaks one objective or rule."""
+    target: str                         # objective name or rule id
+    description: str
+    norm: float | None                  # None: not broken within max_norm
+    shocks: dict[tuple[str, str], float] = field(default_factory=dict)   # (dimension, key) → return
+    already_broken: bool = False
+
+
+class _Targets:
+    """Batched failure test of every objective and rule for stressed factor shocks."""
+
+    def __init__(self, pv: PortfolioValuation, ctx: ComplianceContext):
+        self.pv = pv
+        self.ctx = ctx
+        self.factors = holding_factors(pv, ctx)
+        self.exposure = exposure_matrix(pv, self.factors, ctx)
+        self.base = np.array([h.value_aud for h in pv.holdings])
+        self.cash = pv.investable_cash_aud
+        self.monthly = ctx.param_float("monthly_expenses", 9000)
+        self.tolerance = RuleLimits.from_context(ctx).drawdown
+        self.names = list(OBJECTIVES) + list(BATCH_RULE_IDS)
+
+    def failures(self, shocks: np.ndarray) -> np.ndarray:
+        """(N, targets) bool for N factor-shock vectors."""
+        returns = np.maximum(shocks @ self.exposure.T, -1.0)
+        values = self.base * (1 + returns)
+        obj = assess_objectives_batch(self.pv, values, self.monthly)
+        rules = evaluate_batch(self.pv.holdings, values, np.full(len(values), self.cash), self.ctx)
+        return np.column_stack([
+            obj.forced_liquidation,
+            obj.compounder_loss_pct > self.tolerance,
+            rules.status == BREACH,
+        ])
+
+
+def _ray_search(targets: _Targets, directions: np.ndarray, max_norm: float,
+                columns: np.ndarray | None = None) -> np.ndarray:
+    """Smallest failing norm along each direction, per target ((K, T); inf if none).
+
+    With columns, direction k is only searched for target columns[k] and the
+    result is (K,).
+    """
+    k = len(directions)
+    grid = np.linspace(0, max_norm, GRID_STEPS + 1)[1:]
+    fails = targets.failures((grid[None, :, None] * directions[:, None, :]).reshape(-1, directions.shape[1]))
+    fails = fails.reshape(k, len(grid), -1)
+    if columns is not None:
+        fails = fails[np.arange(k), :, columns][:, :, None]
+
+    crossed = fails.any(axis=1)                                  # (K, T)
+    first = fails.argmax(axis=1)
+    hi = np.where(crossed, grid[first], np.inf)
+    lo = np.where(first > 0, grid[np.maximum(first - 1, 0)], 0.0)
+
+    # Bisect the most promising directions per target between the last safe
+    # and first failing grid point
+    pairs = []
+    for t in range(hi.shape[1]):
+        order = np.argsort(hi[:, t])
+        pairs += [(d, t) for d in order[:BISECT_BEST if columns is None else k] if crossed[d, t]]
+    if pairs:
+        d_idx, t_idx = (np.array(x) for x in zip(*pairs))
+        a, b = lo[d_idx, t_idx], hi[d_idx, t_idx]
+        cols = t_idx if columns is None else columns[d_idx]
+        for _ in range(BISECTION_STEPS):
+            mid = (a + b) / 2
+            result = targets.failures(mid[:, None] * directions[d_idx])[np.arange(len(d_idx)), cols]
+            b = np.where(result, mid, b)
+            a = np.where(result, a, mid)
+        hi[d_idx, t_idx] = b
+    return hi[:, 0] if columns is not None else hi
+
+
+def reverse_stress(
+    pv: PortfolioValuation, db_path=None, ctx: ComplianceContext | None = None,
+    max_norm: float = 1.0, random_directions: int = 256, refine_rounds: int = 4,
+    seed: int | None = 0,
+) -> list[BreakingShock]:
+    """Smallest-norm factor shock breaking each objective and compliance rule.
+
+    max_norm bounds the search (1.0 = a 100% shock along one factor);
+    targets not broken within it get norm None. Targets already broken
+    without any shock are reported with norm 0.
+    """
+    ctx = ctx or ComplianceContext.load(db_path)
+    targets = _Targets(pv, ctx)
+    n_factors = len(targets.factors)
+    n_targets = len(targets.names)
+    if n_factors == 0:
+        return [BreakingShock(name, OBJECTIVES.get(name, f"Rule {name} breach"), None)
+                for name in targets.names]
+    rng = np.random.default_rng(seed)
+
+    already = targets.failures(np.zeros((1, n_factors)))[0]
+    axes = np.vstack([np.eye(n_factors), -np.eye(n_factors)])
+    random = rng.standard_normal((random_directions, n_factors))
+    directions = np.vstack([axes, random / np.linalg.norm(random, axis=1, keepdims=True)])
+
+    norms = _ray_search(targets, directions, max_norm)                 # (K, T)
+    best = norms.argmin(axis=0)
+    best_norm = norms[best, np.arange(n_targets)]
+    best_dir = directions[best]                                        # (T, F)
+
+    # Refine: perturb each target's best direction, keep any shorter crossing
+    width = 0.5
+    for _ in range(refine_rounds):
+        live = np.flatnonzero(np.isfinite(best_norm) & ~already)
+        if not len(live):
+            break
+        per = 32
+        noise = rng.standard_normal((len(live), per, n_factors)) * width
+        trial = best_dir[live][:, None, :] + noise
+        trial /= np.linalg.norm(trial, axis=2, keepdims=True)
+        trial = trial.reshape(-1, n_factors)
+        trial_norm = _ray_search(targets, trial, max_norm, columns=np.repeat(live, per))
+        trial_norm = trial_norm.reshape(len(live), per)
+        pick = trial_norm.argmin(axis=1)
+        improved = trial_norm[np.arange(len(live)), pick] < best_norm[live]
+        for i, t in enumerate(live):
+            if improved[i]:
+                best_norm[t] = trial_norm[i, pick[i]]
+                best_dir[t] = trial.reshape(len(live), per, n_factors)[i, pick[i]]
+        width /= 2
+
+    results = []
+    for t, name in enumerate(targets.names):
+        description = OBJECTIVES.get(name, f"Rule {name} breach")
+        if already[t]:
+            results.append(BreakingShock(name, description, 0.0, already_broken=True))
+        elif np.isfinite(best_norm[t]):
+            vector = best_norm[t] * best_dir[t]
+            shocks = {f: float(v) for f, v in zip(targets.factors, vector) if v}
+            shocks = dict(sorted(shocks.items(), key=lambda x: -abs(x[1])))
+            results.append(BreakingShock(name, description, float(best_norm[t]), shocks))
+        else:
+            results.append(BreakingShock(name, description, None))
+    logger.debug("Reverse stress over %d factors: %d of %d targets reachable",
+                 n_factors, sum(r.norm is not None for r in results), n_targets)
+    return results
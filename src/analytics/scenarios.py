@@ -0,0 +1,245 @@
+"""User-defined stress scenario library.
+
+Scenarios are stored in the stress_scenarios / stress_scenario_shocks tables
+as AUD returns per asset class, macro driver and currency. A holding's
+return under a scenario is the sum of the shocks that apply to it:
+
+  asset_class   — its asset_class (instrument_type when unclassified)
+  macro_driver  — every one of its macro drivers
+  currency      — its economic currency (listing currency when untagged),
+                  i.e. the move of that currency against the AUD; AUD and
+                  hedged holdings take no currency shock (see
+                  currency_exposure, shared with the factor model)
+
+floored at -100%. The library is compiled into a factors × scenarios shock
+matrix, and aligned to a portfolio's holdings through a holdings × factors
+exposure matrix, so the returns of every scenario come from one matrix
+multiply. Compiled libraries are cached per database until a definition
+changes; aligned matrices are cached per set of holding classifications.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from src.compliance.context import ComplianceContext
+from src.db.connection import DEFAULT_DB_PATH, get_connection
+from src.portfolio.valuation import HoldingValue, PortfolioValuation
+
+logger = logging.getLogger(__name__)
+
+BASE_CURRENCY = "AUD"
+DIMENSIONS = ("asset_class", "macro_driver", "currency")
+
+
+@dataclass
+class StressScenario:
+    """A stored scenario definition."""
+    scenario_id: str
+    name: str
+    description: str | None = None
+    shocks: dict[tuple[str, str], float] = field(default_factory=dict)   # (dimension, key) → return
+
+
+def exposed_currency(currency: str, hedged: int | None) -> str | None:
+    """The currency whose move against the AUD a line takes, or None.
+
+    currency is the economic currency (listing currency when untagged). AUD
+    lines and hedged lines (hedged == 1) carry no currency exposure. This is
+    the one definition behind scenario currency shocks, the factor model's
+    fx factors and the sensitivity surfaces' AUD axis.
+    """
+    if currency == BASE_CURRENCY or hedged == 1:
+        return None
+    return currency
+
+
+def currency_exposure(h: HoldingValue, ctx: ComplianceContext) -> str | None:
+    """exposed_currency() of a holding, with its hedge flag from the context."""
+    return exposed_currency(h.economic_currency or h.currency, ctx.flags(h.ticker).hedged)
+
+
+def _exposure_key(pv: PortfolioValuation, ctx: ComplianceContext) -> tuple:
+    return tuple(
+        (h.asset_class or h.instrument_type, h.drivers, currency_exposure(h, ctx))
+        for h in pv.holdings
+    )
+
+
+def _exposure_keys(asset_class: str, drivers: tuple[str, ...],
+                   currency: str | None) -> list[tuple[str, str]]:
+    keys = [("asset_class", asset_class)]
+    if currency is not None:
+        keys.append(("currency", currency))
+    return keys + [("macro_driver", d) for d in drivers]
+
+
+def holding_factors(pv: PortfolioValuation, ctx: ComplianceContext) -> list[tuple[str, str]]:
+    """Every (dimension, key) a shock could apply to in this portfolio, sorted."""
+    return sorted({k for line in _exposure_key(pv, ctx) for k in _exposure_keys(*line)})
+
+
+def exposure_matrix(pv: PortfolioValuation, factors: list[tuple[str, str]],
+                    ctx: ComplianceContext) -> np.ndarray:
+    """Holdings × factors exposure (1 where a factor's shock applies to a holding)."""
+    row = {f: i for i, f in enumerate(factors)}
+    exposure = np.zeros((len(pv.holdings), len(factors)))
+    for h, line in enumerate(_exposure_key(pv, ctx)):
+        exposure[h, [row[k] for k in _exposure_keys(*line) if k in row]] = 1.0
+    return exposure
+
+
+@dataclass
+class CompiledScenarios:
+    """The library as a factors × scenarios shock matrix."""
+    scenarios: list[StressScenario]
+    factors: list[tuple[str, str]]          # (dimension, key) per shock-matrix row
+    shocks: np.ndarray
+    _aligned: dict[tuple, np.ndarray] = field(default_factory=dict, repr=False)
+
+    @property
+    def scenario_ids(self) -> list[str]:
+        return [s.scenario_id for s in self.scenarios]
+
+    def get(self, scenario_id: str) -> StressScenario | None:
+        return next((s for s in self.scenarios if s.scenario_id == scenario_id), None)
+
+    def exposures(self, pv: PortfolioValuation, ctx: ComplianceContext) -> np.ndarray:
+        """Holdings × library factors exposure."""
+        return exposure_matrix(pv, self.factors, ctx)
+
+    def returns(self, pv: PortfolioValuation, ctx: ComplianceContext) -> np.ndarray:
+        """Holdings × scenarios returns, one column per scenario in library order.
+
+        ctx supplies the hedge flags that decide currency exposure.
+        """
+        key = _exposure_key(pv, ctx)
+        aligned = self._aligned.get(key)
+        if aligned is None:
+            if len(self._aligned) >= 8:
+                self._aligned.clear()
+            aligned = self._aligned[key] = np.maximum(self.exposures(pv, ctx) @ self.shocks, -1.0)
+        return aligned
+
+
+_compiled: dict[str, tuple[tuple, CompiledScenarios]] = {}
+
+
+def shock_keys(db_path=None) -> set[tuple[str, str]]:
+    """Every (dimension, key) some instrument carries, i.e. what a shock can apply to."""
+    with get_connection(db_path) as conn:
+        rows = conn.execute("""
+            SELECT COALESCE(c.asset_class, i.instrument_type) AS asset_class,
+                   COALESCE(c.economic_currency, i.currency) AS currency
+            FROM instruments i
+            LEFT JOIN instrument_classifications c ON c.instrument_id = i.id
+        """).fetchall()
+        drivers = conn.execute("SELECT DISTINCT driver FROM instrument_macro_drivers").fetchall()
+    keys = {("asset_class", r["asset_class"]) for r in rows}
+    keys |= {("currency", r["currency"]) for r in rows if r["currency"] != BASE_CURRENCY}
+    return keys | {("macro_driver", r["driver"]) for r in drivers}
+
+
+def _load_rows(conn) -> list:
+    return conn.execute("""
+        SELECT s.scenario_id, s.name, s.description, k.dimension, k.key, k.shock
+        FROM stress_scenarios s
+        LEFT JOIN stress_scenario_shocks k ON k.scenario_id = s.id
+        ORDER BY s.scenario_id, k.dimension, k.key
+    """).fetchall()
+
+
+def load_library(db_path=None) -> CompiledScenarios:
+    """The compiled library, rebuilt only when a stored definition has changed."""
+    with get_connection(db_path) as conn:
+        rows = [tuple(r) for r in _load_rows(conn)]
+    cache_key = str(Path(db_path or DEFAULT_DB_PATH).resolve())
+    cached = _compiled.get(cache_key)
+    if cached is not None and cached[0] == rows:
+        return cached[1]
+
+    scenarios: dict[str, StressScenario] = {}
+    for sid, name, description, dimension, key, shock in rows:
+        scenario = scenarios.setdefault(sid, StressScenario(sid, name, description))
+        if dimension is not None:
+            scenario.shocks[(dimension, key)] = shock
+    factors = sorted({f for s in scenarios.values() for f in s.shocks})
+    row = {f: i for i, f in enumerate(factors)}
+    shocks = np.zeros((len(factors), len(scenarios)))
+    for j, scenario in enumerate(scenarios.values()):
+        for f, shock in scenario.shocks.items():
+            shocks[row[f], j] = shock
+
+    library = CompiledScenarios(list(scenarios.values()), factors, shocks)
+    _compiled[cache_key] = (rows, library)
+    logger.debug("Compiled %d stress scenarios over %d factors", len(scenarios), len(factors))
+    return library
+
+
+def save_scenario(
+    scenario_id: str, name: str | None = None, description: str | None = None,
+    shocks: dict[tuple[str, str], float] | None = None, replace: bool = False,
+    db_path=None,
+) -> StressScenario:
+    """Create or update a scenario; returns the stored definition.
+
+    shocks are merged into the existing ones (same dimension and key
+    overwritten) unless replace is set, which drops the others first.
+    Currency codes are upper-cased; a key no instrument carries (see
+    shock_keys) raises ValueError rather than storing a shock that never
+    applies.
+    """
+    from src.analytics.stress import SCENARIOS
+
+    if scenario_id in SCENARIOS or scenario_id == "all":
+        raise ValueError(f"'{scenario_id}' is a built-in scenario id.")
+    shocks = {(dimension, key.upper() if dimension == "currency" else key): shock
+              for (dimension, key), shock in (shocks or {}).items()}
+    for dimension, key in shocks:
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown shock dimension: {dimension}. Available: {list(DIMENSIONS)}")
+        if (dimension, key) == ("currency", BASE_CURRENCY):
+            raise ValueError(f"Currency shocks are moves against the {BASE_CURRENCY}; "
+                             f"{BASE_CURRENCY} itself cannot be shocked.")
+    known = shock_keys(db_path) if shocks else set()
+    for dimension, key in shocks:
+        if (dimension, key) not in known:
+            available = sorted(k for d, k in known if d == dimension)
+            raise ValueError(f"No instrument carries {dimension} '{key}'. Available: {available}")
+
+    with get_connection(db_path) as conn:
+        existing = conn.execute(
+            "SELECT id FROM stress_scenarios WHERE scenario_id = ?", (scenario_id,)
+        ).fetchone()
+        if existing is None:
+            if not name:
+                raise ValueError(f"New scenario '{scenario_id}' needs a name.")
+            pk = conn.execute(
+                "INSERT INTO stress_scenarios (scenario_id, name, description) VALUES (?, ?, ?)",
+                (scenario_id, name, description),
+            ).lastrowid
+        else:
+            pk = existing["id"]
+            conn.execute(
+                "UPDATE stress_scenarios SET name = COALESCE(?, name), "
+                "description = COALESCE(?, description), updated_at = datetime('now') WHERE id = ?",
+                (name, description, pk),
+            )
+        if replace:
+            conn.execute("DELETE FROM stress_scenario_shocks WHERE scenario_id = ?", (pk,))
+        conn.executemany(
+            "INSERT INTO stress_scenario_shocks (scenario_id, dimension, key, shock) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(scenario_id, dimension, key) DO UPDATE SET shock = excluded.shock",
+            [(pk, dimension, key, shock) for (dimension, key), shock in shocks.items()],
+        )
+    return load_library(db_path).get(scenario_id)
+
+
+def delete_scenario(scenario_id: str, db_path=None) -> bool:
+    """Remove a scenario and its shocks; False if it did not exist."""
+    with get_connection(db_path) as conn:
+        return conn.execute(
+            "DELETE FROM stress_scenarios WHERE scenario_id = ?", (scenario_id,)
+        ).rowcount > 0
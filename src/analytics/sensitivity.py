@@ -11,20 +11,47 @@ Instead of asking "how close is each rule to breaching?", this asks:
 
 Rule-level constraint buffers are reported as supporting detail.
 
+Single-factor triggers hide interactions, so sensitivity_surface() also
+evaluates the objective metrics (income bridge months, stabiliser excess,
+AUD growth share) over a dense grid of two shock axes — e.g. equity return
+× AUD move — by broadcasting the grid against the holding values. The
+break-even contours of the surface replace the single trigger numbers.
+
 Strategy reference: current-finances/strategy-assumptions.md
 """
 
 import logging
 import math
 from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
 
-from src.db.connection import get_connection
+from src.analytics.scenarios import currency_exposure
+from src.compliance.checks import EQUITY_CLASSES, EQUITY_TYPES, RuleLimits, cap_class
+from src.compliance.context import ComplianceContext
 from src.portfolio.valuation import PortfolioValuation
 
 logger = logging.getLogger(__name__)
 
 REAL_RETURN_PA = 0.065
 
+# Surface shock axes: description and default grid range
+SURFACE_AXES = {
+    "equity": ("Equity return (equity and infrastructure holdings)", (-0.6, 0.2)),
+    "aud": ("AUD move against every other currency (unhedged foreign holdings and cash)", (-0.3, 0.3)),
+    "rates": ("Parallel yield change in bp (holdings with a duration)", (-300.0, 300.0)),
+    "stabiliser": ("Return on stabiliser holdings", (-0.5, 0.1)),
+}
+# Surface metrics: description (break-even levels come from RuleLimits, see sensitivity_surface)
+SURFACE_METRICS = {
+    "income_bridge_months": "Months of expenses covered by the stabiliser",
+    "stabiliser_excess_aud": "Stabiliser above the expense floor (AUD)",
+    "aud_growth_pct": "AUD share of growth capital (%)",
+}
+_SURFACE_CHUNK = 4_000_000      # grid points × holdings per broadcast block
+
 
 @dataclass
 class ObjectiveSensitivity:
@@ -55,17 +82,17 @@ class SensitivityReport:
     rule_buffers: list[RuleBuffer] = field(default_factory=list)
 
 
-def analyse_sensitivity(pv: PortfolioValuation, db_path=None) -> SensitivityReport:
+def analyse_sensitivity(
+    pv: PortfolioValuation, db_path=None, ctx: ComplianceContext | None = None,
+) -> SensitivityReport:
     """Analyse portfolio fragility against strategy objectives."""
     report = SensitivityReport()
     total = pv.total_aud
     if total <= 0:
         return report
 
-    with get_connection(db_path) as conn:
-        monthly = float(conn.execute(
-            "SELECT value FROM parameters WHERE key = 'monthly_expenses'"
-        ).fetchone()["value"] or "9000")
+    ctx = ctx or ComplianceContext.load(db_path)
+    monthly = ctx.param_float("monthly_expenses", 9000)
 
     roles = pv.by_capital_role()
     stabiliser = roles.get("stabiliser", 0)
@@ -77,7 +104,7 @@ def analyse_sensitivity(pv: PortfolioValuation, db_path=None) -> SensitivityRepo
     _assess_compounding_damage(report, pv, compounder, total)
     _assess_currency_liability(report, pv)
     _assess_optionality_weight(report, pv, optionality, total)
-    _collect_rule_buffers(report, pv, total, db_path)
+    _collect_rule_buffers(report, pv, total, ctx)
 
     return report
 
@@ -413,31 +440,22 @@ def _assess_optionality_weight(
 
 def _collect_rule_buffers(
     report: SensitivityReport, pv: PortfolioValuation,
-    total: float, db_path=None,
+    total: float, ctx: ComplianceContext,
 ) -> None:
     """Collect rule-level constraint buffers as supporting detail."""
-    equity_types = {"equity", "etf", "listed_fund"}
-    credit_types = {"credit"}
+    lim = RuleLimits.from_context(ctx)
 
     # Position caps — use asset_class for determining which cap applies
-    equity_classes = {"equity", "infrastructure"}
-    credit_classes = {"credit"}
-
     for h in pv.holdings:
         pct = h.value_aud / total * 100
-        ac = h.asset_class or h.instrument_type
-
-        if ac in credit_classes:
-            cap = 7.0
-        elif ac in equity_classes or h.instrument_type in equity_types:
-            cap = 10.0
-        else:
+        cap_label = cap_class(h)
+        if cap_label is None:
             continue
+        cap = lim.cap(cap_label)
 
         buf = cap - pct
         if buf < 3.0:
-            rule_id = "3.1-cr" if ac in credit_classes else "3.1-eq"
-            cap_label = "credit" if ac in credit_classes else "equity"
+            rule_id = "3.1-cr" if cap_label == "credit" else "3.1-eq"
 
             if buf < 0:
                 breach_move = (
@@ -462,11 +480,11 @@ def _collect_rule_buffers(
             groups[h.corporate_group] = groups.get(h.corporate_group, 0) + h.value_aud
     for grp, value in groups.items():
         pct = value / total * 100
-        buf = 20.0 - pct
+        buf = lim.issuer_cap - pct
         if buf < 5.0:
             report.rule_buffers.append(RuleBuffer(
                 rule_id="3.2", description=f"Issuer: {grp}",
-                current_value=pct, limit=20.0, buffer_pct=buf,
+                current_value=pct, limit=lim.issuer_cap, buffer_pct=buf,
                 breach_move=f"{grp} group assets outperform rest",
             ))
 
@@ -476,25 +494,147 @@ def _collect_rule_buffers(
     stab_total = sum(h.value_aud for h in stab_holdings) + stab_cash
     if stab_total > 0:
         buckets: dict[str, float] = {}
-        with get_connection(db_path) as conn:
-            for h in stab_holdings:
-                row = conn.execute("""
-                    SELECT duration_years FROM instrument_classifications ic
-                    JOIN instruments i ON i.id = ic.instrument_id
-                    WHERE i.ticker = ?
-                """, (h.ticker,)).fetchone()
-                bucket = f"{row['duration_years']:.0f}y" if row and row["duration_years"] is not None else "unknown"
-                buckets[bucket] = buckets.get(bucket, 0) + h.value_aud
+        for h in stab_holdings:
+            duration_years = ctx.flags(h.ticker).duration_years
+            bucket = f"{duration_years:.0f}y" if duration_years is not None else "unknown"
+            buckets[bucket] = buckets.get(bucket, 0) + h.value_aud
         for bucket, value in buckets.items():
             if bucket == "unknown":
                 continue
             pct = value / stab_total * 100
-            buf = 40.0 - pct
+            buf = lim.duration_max - pct
             if buf < 5.0:
                 report.rule_buffers.append(RuleBuffer(
                     rule_id="7.2", description=f"Duration bucket {bucket}",
-                    current_value=pct, limit=40.0, buffer_pct=buf,
+                    current_value=pct, limit=lim.duration_max, buffer_pct=buf,
                     breach_move="Other stabiliser assets decline in value",
                 ))
 
     report.rule_buffers.sort(key=lambda r: r.buffer_pct)
+
+
+# ─── Sensitivity surfaces ─────────────────────────────────────────────────
+
+@dataclass
+class SensitivitySurface:
+    """Objective metrics over a 2-D grid of shocks: metrics[name][i, j] at (x[i], y[j])."""
+    x_axis: str
+    y_axis: str
+    x: np.ndarray
+    y: np.ndarray
+    metrics: dict[str, np.ndarray] = field(default_factory=dict)
+    levels: dict[str, float] = field(default_factory=dict)       # break-even level per metric
+
+    def break_even(self, metric: str, level: float | None = None) -> np.ndarray:
+        """For each x, the first y at which the metric crosses level (NaN if it does not).
+
+        level defaults to the metric's floor in levels; the crossing is
+        interpolated linearly between grid points.
+        """
+        level = self.levels[metric] if level is None else level
+        z = self.metrics[metric] - level
+        crosses = np.signbit(z[:, :-1]) != np.signbit(z[:, 1:])
+        found = crosses.any(axis=1)
+        j = crosses.argmax(axis=1)
+        rows = np.arange(len(self.x))
+        z0, z1 = z[rows, j], z[rows, j + 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(z1 != z0, z0 / (z0 - z1), 0.0)
+        return np.where(found, self.y[j] + t * (self.y[j + 1] - self.y[j]), np.nan)
+
+    def to_frame(self, metric: str) -> pd.DataFrame:
+        """The metric as an x × y matrix (index x values, columns y values)."""
+        return pd.DataFrame(self.metrics[metric],
+                            index=pd.Index(self.x, name=f"{self.x_axis}/{self.y_axis}"),
+                            columns=self.y)
+
+    def write(self, path, metric: str) -> None:
+        """Export one metric's matrix as CSV."""
+        self.to_frame(metric).to_csv(Path(path))
+
+
+def _axis_loadings(pv: PortfolioValuation, axis: str, ctx: ComplianceContext) -> tuple[np.ndarray, np.ndarray]:
+    """(per-holding, per-investable-cash) loading of one surface axis."""
+    holdings = pv.holdings
+    cash = [c for c in pv.cash if c.is_investable]
+    if axis == "equity":
+        hold = [(h.asset_class or h.instrument_type) in EQUITY_CLASSES
+                or (h.asset_class is None and h.instrument_type in EQUITY_TYPES) for h in holdings]
+        return np.array(hold, dtype=float), np.zeros(len(cash))
+    if axis == "aud":
+        hold = [currency_exposure(h, ctx) is not None for h in holdings]
+        return np.array(hold, dtype=float), np.array([c.currency != "AUD" for c in cash], dtype=float)
+    if axis == "rates":
+        hold = [-(ctx.flags(h.ticker).duration_years or 0.0) / 10_000 for h in holdings]
+        return np.array(hold, dtype=float), np.zeros(len(cash))
+    if axis == "stabiliser":
+        return (np.array([h.capital_role == "stabiliser" for h in holdings], dtype=float),
+                np.zeros(len(cash)))
+    raise ValueError(f"Unknown surface axis: {axis}. Available: {list(SURFACE_AXES)}")
+
+
+def _axis_factor(axis: str, values: np.ndarray) -> np.ndarray:
+    """Shock as the factor the loadings multiply (foreign return for an AUD move)."""
+    if axis == "aud":
+        return 1 / (1 + values) - 1
+    return values
+
+
+def sensitivity_surface(
+    pv: PortfolioValuation, x_axis: str, y_axis: str,
+    x: np.ndarray, y: np.ndarray, db_path=None, ctx: ComplianceContext | None = None,
+) -> SensitivitySurface:
+    """Income bridge months, stabiliser excess and AUD growth share over an x × y shock grid.
+
+    Holding returns are the sum of each axis's loading × shock, floored at
+    -100%; investable cash moves only with the AUD. Break-even levels are the
+    rule floors: stabiliser_months (2.1), zero excess over the expense floor
+    and the low edge of the AUD growth band (5.1).
+    """
+    if x_axis == y_axis:
+        raise ValueError("The two surface axes must differ.")
+    if "aud" in (x_axis, y_axis) and np.min(x if x_axis == "aud" else y) <= -1:
+        raise ValueError("AUD moves must be above -100%.")
+    ctx = ctx or ComplianceContext.load(db_path)
+    monthly = ctx.param_float("monthly_expenses", 9000)
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+
+    (hx, cx), (hy, cy) = _axis_loadings(pv, x_axis, ctx), _axis_loadings(pv, y_axis, ctx)
+    fx, fy = _axis_factor(x_axis, x), _axis_factor(y_axis, y)
+    values = pv.columns.holding_values
+    cash = np.array([c.value_aud for c in pv.cash if c.is_investable], dtype=float)
+
+    roles = np.array([h.capital_role for h in pv.holdings], dtype=object)
+    growth = np.isin(roles, ["compounder", "optionality"])
+    aud = np.array([(h.economic_currency or h.currency) == "AUD" for h in pv.holdings])
+    # Role sums as one matrix product: stabiliser, growth, AUD growth
+    groups = np.column_stack([roles == "stabiliser", growth, growth & aud]).astype(float)
+
+    stabiliser = np.zeros((len(x), len(y)))
+    growth_total = np.zeros((len(x), len(y)))
+    aud_growth = np.zeros((len(x), len(y)))
+    rows = max(1, _SURFACE_CHUNK // max(len(y) * len(values), 1))
+    cash_post = cash * (1 + cx[None, None, :] * fx[:, None, None] + cy[None, None, :] * fy[None, :, None])
+    for start in range(0, len(x), rows):
+        part = slice(start, start + rows)
+        returns = hx * fx[part, None, None] + hy * fy[None, :, None]          # (rows, y, holdings)
+        sums = (values * np.maximum(1 + returns, 0.0)) @ groups
+        stabiliser[part] = sums[..., 0] + cash_post[part].sum(axis=-1)
+        growth_total[part] = sums[..., 1]
+        aud_growth[part] = sums[..., 2]
+
+    months = stabiliser / monthly if monthly > 0 else np.zeros_like(stabiliser)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        aud_pct = np.where(growth_total > 0, aud_growth / growth_total * 100, np.nan)
+    lim = RuleLimits.from_context(ctx)
+    surface = SensitivitySurface(x_axis, y_axis, x, y, {
+        "income_bridge_months": months,
+        "stabiliser_excess_aud": stabiliser - lim.stabiliser_floor(ctx),
+        "aud_growth_pct": aud_pct,
+    }, {
+        "income_bridge_months": lim.stabiliser_months,
+        "stabiliser_excess_aud": 0.0,
+        "aud_growth_pct": lim.aud_growth_band[0],
+    })
+    logger.debug("Sensitivity surface %s × %s: %d × %d points", x_axis, y_axis, len(x), len(y))
+    return surface
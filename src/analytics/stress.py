@@ -1,7 +1,8 @@
 """Stress scenario testing — objective-level assessment.
 
-Applies historical or synthetic drawdown scenarios to the current portfolio
-and evaluates the impact against the strategy's ultimate objectives:
+Applies historical, synthetic or user-defined (src.analytics.scenarios)
+drawdown scenarios to the current portfolio and evaluates the impact against
+the strategy's ultimate objectives:
 
 1. SURVIVABILITY — Am I forced to sell long-term assets?
 2. INCOME BRIDGE — Can I still fund 24+ months of living expenses?
@@ -16,11 +17,18 @@ Strategy reference: current-finances/strategy-assumptions.md
 """
 
 import logging
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 
+import numpy as np
+import pandas as pd
+
+from src.analytics.scenarios import CompiledScenarios, StressScenario, load_library
 from src.db.connection import get_connection
 from src.portfolio.valuation import PortfolioValuation, HoldingValue
-from src.compliance.checks import run_all_checks, CheckResult
+from src.compliance.checks import run_checks, CheckResult
+from src.compliance.context import ComplianceContext
 
 logger = logging.getLogger(__name__)
 
@@ -84,6 +92,7 @@ class HoldingStress:
     drawdown_pct: float
     post_stress_aud: float
     source: str
+    recovery_days: int | None = None   # historical: trough back to the prior peak; None if not yet
 
 
 @dataclass
@@ -137,32 +146,108 @@ class StressResult:
     warnings: list[CheckResult] = field(default_factory=list)
 
 
-def _get_historical_drawdown(
-    ticker: str, exchange: str | None, start: str, trough: str, db_path=None,
-) -> float | None:
-    with get_connection(db_path) as conn:
-        inst = conn.execute(
-            "SELECT id FROM instruments WHERE ticker = ?", (ticker,)
-        ).fetchone()
-        if not inst:
+@dataclass
+class DrawdownMatrix:
+    """Historical peak-to-trough drawdowns, held tickers × historical scenarios.
+
+    drawdowns[i, j] is the maximum drawdown of ticker i inside scenario j's
+    start..trough window (≤ 0), measured from the running peak on the
+    instrument's own price path. NaN marks a ticker with no price on or
+    before the start (the scenario falls back to the asset-class proxy).
+
+    recovery_days[i, j] counts calendar days from that trough until the close
+    regains the prior peak, using all later prices; 0 if the instrument never
+    fell, NaN if it has not recovered (or has no data).
+    """
+    tickers: list[str]
+    scenario_ids: list[str]
+    drawdowns: np.ndarray
+    recovery_days: np.ndarray
+
+    def _cell(self, matrix: np.ndarray, ticker: str, scenario_id: str) -> float | None:
+        try:
+            value = matrix[self.tickers.index(ticker), self.scenario_ids.index(scenario_id)]
+        except ValueError:
             return None
-        start_row = conn.execute(
-            "SELECT close_price FROM prices WHERE instrument_id = ? AND date <= ? "
-            "ORDER BY date DESC LIMIT 1",
-            (inst["id"], start),
-        ).fetchone()
-        trough_row = conn.execute(
-            "SELECT close_price FROM prices WHERE instrument_id = ? AND date <= ? "
-            "ORDER BY date DESC LIMIT 1",
-            (inst["id"], trough),
-        ).fetchone()
-    if not start_row or not trough_row or start_row["close_price"] <= 0:
-        return None
-    return (trough_row["close_price"] - start_row["close_price"]) / start_row["close_price"]
+        return None if np.isnan(value) else float(value)
+
+    def get(self, ticker: str, scenario_id: str) -> float | None:
+        return self._cell(self.drawdowns, ticker, scenario_id)
+
+    def recovery(self, ticker: str, scenario_id: str) -> int | None:
+        days = self._cell(self.recovery_days, ticker, scenario_id)
+        return None if days is None else int(days)
+
+
+def load_historical_drawdowns(
+    tickers: list[str], scenario_ids: list[str] | None = None, db_path=None,
+) -> DrawdownMatrix:
+    """Path-based drawdowns for every ticker across the historical scenarios.
+
+    One query loads the closes of every held instrument from the last price on
+    or before the earliest scenario start onwards; they are forward-filled
+    into a dates × tickers panel, and each scenario window is reduced with a
+    running maximum over all instruments at once.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if scenario_ids is None:
+        scenario_ids = [sid for sid, s in SCENARIOS.items() if s["type"] == "historical"]
+    scenario_ids = [sid for sid in scenario_ids if SCENARIOS[sid]["type"] == "historical"]
+    drawdowns = np.full((len(tickers), len(scenario_ids)), np.nan)
+    recovery = np.full_like(drawdowns, np.nan)
+    if not tickers or not scenario_ids:
+        return DrawdownMatrix(tickers, scenario_ids, drawdowns, recovery)
+
+    first_start = min(SCENARIOS[sid]["start"] for sid in scenario_ids)
+    ticker_rows = ", ".join("(?)" for _ in tickers)
+    with get_connection(db_path) as conn:
+        rows = conn.execute(f"""
+            WITH held(ticker) AS (VALUES {ticker_rows})
+            SELECT i.ticker, p.date, p.close_price
+            FROM held
+            JOIN instruments i ON i.ticker = held.ticker
+            JOIN prices p ON p.instrument_id = i.id
+            WHERE p.date >= COALESCE((SELECT MAX(date) FROM prices
+                                      WHERE instrument_id = i.id AND date <= ?), '')
+        """, [*tickers, first_start]).fetchall()
+
+    # Panel rows: every price date plus each scenario's start and trough
+    dates = sorted({r["date"] for r in rows}
+                   | {SCENARIOS[sid][key] for sid in scenario_ids for key in ("start", "trough")})
+    row_of = {d: i for i, d in enumerate(dates)}
+    col_of = {t: j for j, t in enumerate(tickers)}
+    panel = np.full((len(dates), len(tickers)), np.nan)
+    if rows:
+        panel[[row_of[r["date"]] for r in rows], [col_of[r["ticker"]] for r in rows]] = (
+            [r["close_price"] for r in rows])
+    panel = pd.DataFrame(panel).ffill().to_numpy()
+    days = np.array(dates, dtype="datetime64[D]")
+    cols = np.arange(len(tickers))
+
+    for j, sid in enumerate(scenario_ids):
+        s, e = row_of[SCENARIOS[sid]["start"]], row_of[SCENARIOS[sid]["trough"]]
+        valid = panel[s] > 0   # as-of start close exists (NaN compares False)
+        path = panel[s:]
+        running = np.maximum.accumulate(np.where(np.isnan(path), -np.inf, path), axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            window_dd = path[:e - s + 1] / running[:e - s + 1] - 1
+        window_dd[:, ~valid] = 0.0
+        trough = window_dd.argmin(axis=0)
+        mdd = window_dd[trough, cols]
+        peak = running[trough, cols]
+
+        regained = (path >= peak) & (np.arange(len(path))[:, None] > trough)
+        first = regained.argmax(axis=0)
+        recovered_days = (days[s + first] - days[s + trough]).astype(float)
+        drawdowns[:, j] = np.where(valid, mdd, np.nan)
+        recovery[:, j] = np.where(
+            valid & (mdd == 0), 0.0,
+            np.where(valid & regained.any(axis=0), recovered_days, np.nan))
+    return DrawdownMatrix(tickers, scenario_ids, drawdowns, recovery)
 
 
 def _apply_drawdown(pv: PortfolioValuation, drawdowns: dict[str, float]) -> PortfolioValuation:
-    stressed = PortfolioValuation()
+    stressed = PortfolioValuation(fx_book=pv.fx_book)
     stressed.cash = pv.cash
     for h in pv.holdings:
         dd = drawdowns.get(h.ticker, 0.0)
@@ -267,51 +352,209 @@ def _assess_objectives(
     return obj
 
 
-def run_scenario(
-    pv: PortfolioValuation, scenario_id: str, db_path=None,
-) -> StressResult:
-    if scenario_id not in SCENARIOS:
-        raise ValueError(f"Unknown scenario: {scenario_id}. Available: {list(SCENARIOS.keys())}")
-
-    scenario = SCENARIOS[scenario_id]
-    result = StressResult(
-        scenario_id=scenario_id,
-        scenario_name=scenario["name"],
-        description=scenario["description"],
+@dataclass
+class ObjectiveArrays:
+    """_assess_objectives over a batch of stressed portfolios, one element per outcome."""
+    stabiliser_post_aud: np.ndarray
+    compounder_post_aud: np.ndarray
+    optionality_post_aud: np.ndarray
+    total_post_aud: np.ndarray
+    forced_liquidation: np.ndarray          # bool
+    income_bridge_months_post: np.ndarray
+    income_bridge_intact: np.ndarray        # bool
+    compounder_loss_aud: np.ndarray
+    compounder_loss_pct: np.ndarray
+    recovery_years: np.ndarray
+    optionality_change_pct: np.ndarray
+    optionality_performed: np.ndarray       # bool
+    wealth_loss_aud: np.ndarray
+    wealth_loss_pct: np.ndarray
+
+
+def assess_objectives_batch(
+    pv: PortfolioValuation, holding_values: np.ndarray, monthly_expenses: float,
+    pre_values: np.ndarray | None = None, cash: np.ndarray | float | None = None,
+) -> ObjectiveArrays:
+    """Vectorised _assess_objectives for stressed holding values.
+
+    holding_values has one column per pv.holdings line (AUD, post-stress) and
+    any number of leading dimensions; cash is unstressed, as in _apply_drawdown.
+    The pre-stress side is pv itself, unless pre_values (pre-stress line
+    values) and cash (investable cash) are given per outcome, broadcasting
+    against holding_values and its leading dimensions — e.g. trade candidates
+    projected onto shared lines, where pv only supplies the lines' roles.
+    """
+    import math
+    holding_values = np.asarray(holding_values, dtype=float)
+    roles = np.array([h.capital_role for h in pv.holdings], dtype=object)
+    if pre_values is None:
+        pre_values = np.array([h.value_aud for h in pv.holdings], dtype=float)
+    if cash is None:
+        cash = pv.investable_cash_aud
+    cash = np.asarray(cash, dtype=float)
+
+    def role_sum(values: np.ndarray, role: str) -> np.ndarray:
+        return values @ (roles == role).astype(float)
+
+    comp_pre = role_sum(pre_values, "compounder")
+    opt_pre = role_sum(pre_values, "optionality")
+    total_pre = pre_values.sum(axis=-1) + cash
+
+    stab_post = role_sum(holding_values, "stabiliser") + cash
+    comp_post = role_sum(holding_values, "compounder")
+    opt_post = role_sum(holding_values, "optionality")
+    total_post = holding_values.sum(axis=-1) + cash
+
+    months_post = stab_post / monthly_expenses if monthly_expenses else np.zeros_like(stab_post)
+    comp_loss = comp_pre - comp_post
+    with np.errstate(divide="ignore", invalid="ignore"):
+        comp_loss_pct = np.where(comp_pre > 0, comp_loss / comp_pre * 100, 0.0)
+        recovery = np.where(
+            (comp_post > 0) & (comp_pre > comp_post),
+            np.log(comp_pre / comp_post) / math.log(1 + REAL_RETURN_PA), 0.0)
+        opt_change = np.where(opt_pre > 0, (opt_post - opt_pre) / opt_pre * 100, 0.0)
+        wealth_loss = total_pre - total_post
+        wealth_loss_pct = np.where(total_pre > 0, wealth_loss / total_pre * 100, 0.0)
+    comp_change = -comp_loss_pct
+
+    return ObjectiveArrays(
+        stabiliser_post_aud=stab_post,
+        compounder_post_aud=comp_post,
+        optionality_post_aud=opt_post,
+        total_post_aud=total_post,
+        forced_liquidation=stab_post < 24 * monthly_expenses,
+        income_bridge_months_post=months_post,
+        income_bridge_intact=months_post >= 24,
+        compounder_loss_aud=comp_loss,
+        compounder_loss_pct=comp_loss_pct,
+        recovery_years=recovery,
+        optionality_change_pct=opt_change,
+        optionality_performed=(opt_change > 0) | (opt_change > comp_change + 10),
+        wealth_loss_aud=wealth_loss,
+        wealth_loss_pct=wealth_loss_pct,
     )
 
-    drawdowns: dict[str, float] = {}
+
+def scenario_ids(db_path=None) -> list[str]:
+    """Built-in scenario ids followed by the library's."""
+    return list(SCENARIOS) + load_library(db_path).scenario_ids
+
+
+def _describe_shocks(scenario: StressScenario) -> str:
+    shocks = ", ".join(f"{key} {shock:+.0%}" for (_, key), shock in scenario.shocks.items())
+    return f"Custom: {shocks}." if shocks else "Custom scenario without shocks."
+
+
+def _scenario_definition(
+    scenario_id: str, db_path=None, library: CompiledScenarios | None = None,
+) -> tuple[dict, CompiledScenarios | None]:
+    """(scenario dict, library) for a built-in or library scenario id."""
+    if scenario_id in SCENARIOS:
+        return SCENARIOS[scenario_id], library
+    library = library or load_library(db_path)
+    custom = library.get(scenario_id)
+    if custom is None:
+        raise ValueError(
+            f"Unknown scenario: {scenario_id}. "
+            f"Available: {list(SCENARIOS) + library.scenario_ids}")
+    return {
+        "name": custom.name,
+        "description": custom.description or _describe_shocks(custom),
+        "type": "custom",
+    }, library
+
+
+def _scenario_holding_stresses(
+    pv: PortfolioValuation, scenario_id: str, scenario: dict, db_path=None,
+    historical: DrawdownMatrix | None = None, library: CompiledScenarios | None = None,
+    ctx: ComplianceContext | None = None,
+) -> list[HoldingStress]:
+    """Per-holding drawdowns (and their source) under one scenario."""
     holding_stresses: list[HoldingStress] = []
 
     if scenario["type"] == "synthetic":
         for h in pv.holdings:
             dd = -0.35 if h.capital_role in ("compounder", "optionality") else 0.0
-            drawdowns[h.ticker] = dd
             holding_stresses.append(HoldingStress(
                 ticker=h.ticker, capital_role=h.capital_role,
                 pre_stress_aud=h.value_aud, drawdown_pct=dd * 100,
                 post_stress_aud=h.value_aud * (1 + dd), source="synthetic",
             ))
+    elif scenario["type"] == "custom":
+        ctx = ctx or ComplianceContext.load(db_path)
+        returns = library.returns(pv, ctx)[:, library.scenario_ids.index(scenario_id)]
+        holding_stresses = _holding_stresses(pv, returns, "custom")
     elif scenario["type"] == "historical":
-        start, trough = scenario["start"], scenario["trough"]
         proxies = PROXY_DRAWDOWNS.get(scenario_id, {})
+        if historical is None or scenario_id not in historical.scenario_ids:
+            historical = load_historical_drawdowns(
+                [h.ticker for h in pv.holdings], [scenario_id], db_path)
         for h in pv.holdings:
-            historical_dd = _get_historical_drawdown(
-                h.ticker, h.exchange, start, trough, db_path)
+            historical_dd = historical.get(h.ticker, scenario_id)
+            recovery_days = None
             if historical_dd is not None:
                 dd, source = historical_dd, "historical"
+                recovery_days = historical.recovery(h.ticker, scenario_id)
             else:
                 # Use asset_class (economic nature) for proxy lookup, not instrument_type (wrapper)
                 proxy_key = h.asset_class or h.instrument_type
                 dd = proxies.get(proxy_key, proxies.get(h.instrument_type, -0.20))
                 source = "proxy"
-            drawdowns[h.ticker] = dd
             holding_stresses.append(HoldingStress(
                 ticker=h.ticker, capital_role=h.capital_role,
                 pre_stress_aud=h.value_aud, drawdown_pct=dd * 100,
                 post_stress_aud=h.value_aud * (1 + dd), source=source,
+                recovery_days=recovery_days,
             ))
+    return holding_stresses
+
+
+def scenario_returns(
+    pv: PortfolioValuation, scenario_ids: list[str], db_path=None,
+    ctx: ComplianceContext | None = None,
+) -> np.ndarray:
+    """Holdings × scenarios drawdown matrix (fractions), one column per id.
+
+    Drawdowns depend only on each line's instrument and classification, so
+    the matrix applies to any values on the same lines (see src.analytics.sweep).
+    """
+    historical_ids = [sid for sid in scenario_ids if SCENARIOS.get(sid, {}).get("type") == "historical"]
+    historical = (load_historical_drawdowns([h.ticker for h in pv.holdings], historical_ids, db_path)
+                  if historical_ids else None)
+    library = None
+    returns = np.zeros((len(pv.holdings), len(scenario_ids)))
+    for k, sid in enumerate(scenario_ids):
+        scenario, library = _scenario_definition(sid, db_path, library)
+        if scenario["type"] == "custom":
+            ctx = ctx or ComplianceContext.load(db_path)
+        stresses = _scenario_holding_stresses(pv, sid, scenario, db_path, historical, library, ctx)
+        returns[:, k] = [hs.drawdown_pct / 100 for hs in stresses]
+    return returns
 
+
+def run_scenario(
+    pv: PortfolioValuation, scenario_id: str, db_path=None,
+    ctx: ComplianceContext | None = None, rules: list[str] | None = None,
+    historical: DrawdownMatrix | None = None, library: CompiledScenarios | None = None,
+) -> StressResult:
+    """Stress the portfolio under one scenario (built-in or from the library).
+
+    rules limits the secondary compliance run to matching rule ids (see
+    run_checks); the objective assessment is always computed. historical is
+    a preloaded drawdown matrix (see load_historical_drawdowns); without one,
+    a historical scenario loads its own column. library is the compiled
+    scenario library, loaded here when needed.
+    """
+    scenario, library = _scenario_definition(scenario_id, db_path, library)
+    ctx = ctx or ComplianceContext.load(db_path)
+    result = StressResult(
+        scenario_id=scenario_id,
+        scenario_name=scenario["name"],
+        description=scenario["description"],
+    )
+    holding_stresses = _scenario_holding_stresses(pv, scenario_id, scenario, db_path,
+                                                  historical, library, ctx)
+    drawdowns = {hs.ticker: hs.drawdown_pct / 100 for hs in holding_stresses}
     result.holding_stresses = holding_stresses
 
     # Data source transparency
@@ -320,6 +563,8 @@ def run_scenario(
     result.proxy_only = result.proxy_count > 0 and result.historical_count == 0
     if scenario["type"] == "synthetic":
         result.data_source_note = "Synthetic scenario — uniform haircut applied."
+    elif scenario["type"] == "custom":
+        result.data_source_note = "Custom scenario — shocks by asset class, macro driver and currency."
     elif result.proxy_only:
         result.data_source_note = (
             f"⚠ ALL {result.proxy_count} holdings use asset-class proxy drawdowns "
@@ -334,28 +579,132 @@ def run_scenario(
     else:
         result.data_source_note = "All holdings use actual historical price data."
 
+    return _assess_result(result, pv, drawdowns, db_path, ctx, rules)
+
+
+def _holding_stresses(pv: PortfolioValuation, returns: np.ndarray, source: str) -> list[HoldingStress]:
+    """HoldingStress per holding line for returns aligned with pv.holdings."""
+    return [
+        HoldingStress(
+            ticker=h.ticker, capital_role=h.capital_role,
+            pre_stress_aud=h.value_aud, drawdown_pct=dd * 100,
+            post_stress_aud=h.value_aud * (1 + dd), source=source,
+        )
+        for h, dd in zip(pv.holdings, returns.tolist())
+    ]
+
+
+def _assess_result(
+    result: StressResult, pv: PortfolioValuation, drawdowns: dict[str, float],
+    db_path, ctx: ComplianceContext | None, rules: list[str] | None,
+) -> StressResult:
+    """Apply drawdowns, then fill in the objective assessment and compliance evidence."""
     stressed_pv = _apply_drawdown(pv, drawdowns)
 
-    with get_connection(db_path) as conn:
-        monthly = float(conn.execute(
-            "SELECT value FROM parameters WHERE key = 'monthly_expenses'"
-        ).fetchone()["value"] or "9000")
+    ctx = ctx or ComplianceContext.load(db_path)
+    monthly = ctx.param_float("monthly_expenses", 9000)
 
     result.objectives = _assess_objectives(pv, stressed_pv, monthly)
 
     # Compliance as secondary evidence
-    result.compliance_results = run_all_checks(stressed_pv, db_path)
+    result.compliance_results = run_checks(stressed_pv, db_path, ctx, rules=rules)
     result.breaches = [r for r in result.compliance_results if r.status == "breach"]
     result.warnings = [r for r in result.compliance_results if r.status == "warning"]
 
     return result
 
 
-def run_all_scenarios(pv: PortfolioValuation, db_path=None) -> list[StressResult]:
-    results = []
-    for scenario_id in SCENARIOS:
-        try:
-            results.append(run_scenario(pv, scenario_id, db_path))
-        except Exception as exc:
-            logger.warning("Scenario %s failed: %s", scenario_id, exc)
-    return results
+def run_returns(
+    pv: PortfolioValuation, returns: np.ndarray, scenario_id: str, name: str,
+    description: str, source: str, note: str = "", db_path=None,
+    ctx: ComplianceContext | None = None, rules: list[str] | None = None,
+) -> StressResult:
+    """Stress the portfolio by per-holding returns (aligned with pv.holdings).
+
+    The entry point for models that produce returns directly (e.g. the
+    factor model); results read like any other scenario's.
+    """
+    result = StressResult(scenario_id=scenario_id, scenario_name=name,
+                          description=description, data_source_note=note)
+    result.holding_stresses = _holding_stresses(pv, np.asarray(returns, dtype=float), source)
+    drawdowns = {hs.ticker: hs.drawdown_pct / 100 for hs in result.holding_stresses}
+    return _assess_result(result, pv, drawdowns, db_path, ctx, rules)
+
+
+@dataclass
+class _ScenarioInputs:
+    """Read-only inputs shared by every scenario run (sent once to each worker)."""
+    portfolios: list[PortfolioValuation]
+    db_path: object
+    ctx: ComplianceContext
+    rules: list[str] | None
+    historical: DrawdownMatrix
+    library: CompiledScenarios
+
+
+_worker_inputs: _ScenarioInputs | None = None
+
+
+def _init_worker(inputs: _ScenarioInputs) -> None:
+    global _worker_inputs
+    _worker_inputs = inputs
+
+
+def _run_task(task: tuple[int, str], inputs: _ScenarioInputs | None = None) -> StressResult | None:
+    """run_scenario for one (portfolio index, scenario id); None if it failed."""
+    inputs = inputs or _worker_inputs
+    index, scenario_id = task
+    try:
+        return run_scenario(inputs.portfolios[index], scenario_id, inputs.db_path, inputs.ctx,
+                            inputs.rules, inputs.historical, inputs.library)
+    except Exception as exc:
+        logger.warning("Scenario %s failed: %s", scenario_id, exc)
+        return None
+
+
+def run_scenarios(
+    portfolios: list[PortfolioValuation], scenario_ids: list[str] | None = None,
+    db_path=None, rules: list[str] | None = None, workers: int = 1,
+) -> Iterator[tuple[int, StressResult]]:
+    """Stress every portfolio under every scenario, yielding (portfolio index, result).
+
+    scenario_ids defaults to the built-ins plus the library. Historical
+    drawdowns, the compiled library and the compliance context are loaded
+    once and shared read-only; with workers > 1 they are sent once to each
+    worker process and the portfolio × scenario runs fan out across the
+    pool. Results stream back as they complete, in portfolio-then-scenario
+    order whatever the worker count. Failed scenarios are logged and skipped.
+    """
+    library = load_library(db_path)
+    if scenario_ids is None:
+        scenario_ids = list(SCENARIOS) + library.scenario_ids
+    tickers = [h.ticker for pv in portfolios for h in pv.holdings]
+    inputs = _ScenarioInputs(
+        portfolios=portfolios, db_path=db_path,
+        ctx=ComplianceContext.load(db_path),   # shared by every scenario's compliance run
+        rules=rules,
+        historical=load_historical_drawdowns(tickers, db_path=db_path),
+        library=library,
+    )
+    for pv in portfolios:
+        library.returns(pv, inputs.ctx)  # every library scenario in one multiply per portfolio
+
+    tasks = [(i, sid) for i in range(len(portfolios)) for sid in scenario_ids]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                 initializer=_init_worker, initargs=(inputs,)) as pool:
+            results = pool.map(_run_task, tasks, chunksize=max(1, len(tasks) // (4 * workers)))
+            for (index, _), result in zip(tasks, results):
+                if result is not None:
+                    yield index, result
+    else:
+        for task in tasks:
+            result = _run_task(task, inputs)
+            if result is not None:
+                yield task[0], result
+
+
+def run_all_scenarios(
+    pv: PortfolioValuation, db_path=None, rules: list[str] | None = None, workers: int = 1,
+) -> list[StressResult]:
+    return [result for _, result in run_scenarios([pv], None, db_path, rules, workers)]
@@ -0,0 +1,147 @@
+"""Stress trade sweep — rank trade candidates by their stress outcomes.
+
+Where `stress --trades` compares one post-trade portfolio with the current
+one, a sweep runs every stress scenario on many candidate trade lists at
+once: an explicit list of proposals, or every combination of scaling each
+line of one proposal (e.g. 0–150% in 25% steps).
+
+All candidates are projected in one batch (src.portfolio.batch) onto shared
+lines. Scenario drawdowns depend only on the line, so one lines × scenarios
+drawdown matrix stresses every candidate, and the objectives are assessed
+over scenarios × candidates × lines arrays, a block of candidates at a time.
+
+Each candidate is summarised by its worst case over the scenarios — wealth
+loss, compounder damage, recovery years — and the number of scenarios that
+force liquidation, all to be minimised. Candidates are ranked by Pareto
+front: rank 1 is not dominated by any other candidate, rank 2 only by rank 1,
+and so on.
+"""
+
+import itertools
+import logging
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.analytics.stress import assess_objectives_batch, scenario_ids, scenario_returns
+from src.compliance.context import ComplianceContext
+from src.portfolio.batch import project_batch
+from src.portfolio.valuation import PortfolioValuation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCALES = (0.0, 0.25, 0.5, 0.75, 1.0, 1.25, 1.5)
+MAX_CANDIDATES = 50_000
+CHUNK_CANDIDATES = 2_048      # candidates stressed per array pass (bounds memory)
+
+# (attribute, label) of the minimised criteria
+CRITERIA = (
+    ("wealth_loss_aud", "worst wealth loss"),
+    ("compounder_loss_aud", "worst compounder damage"),
+    ("recovery_years", "worst recovery"),
+    ("forced_scenarios", "scenarios forcing liquidation"),
+)
+
+
+@dataclass
+class SweepCandidate:
+    """One trade candidate's worst-case stress outcome."""
+    label: str
+    trades: list[dict]
+    total_aud: float
+    wealth_loss_aud: float
+    compounder_loss_aud: float
+    recovery_years: float
+    forced_scenarios: int
+    worst_scenario: str                 # scenario of the largest wealth loss
+    pareto_rank: int = 0
+
+
+@dataclass
+class SweepResult:
+    scenario_ids: list[str]
+    candidates: list[SweepCandidate] = field(default_factory=list)     # ranked
+
+
+def scaled_candidates(
+    trades: list[dict], scales: tuple[float, ...] = DEFAULT_SCALES,
+) -> list[tuple[str, list[dict]]]:
+    """Every combination of scaling each trade line by one of scales.
+
+    Raises ValueError beyond MAX_CANDIDATES combinations.
+    """
+    count = len(scales) ** len(trades)
+    if count > MAX_CANDIDATES:
+        raise ValueError(
+            f"{len(trades)} lines × {len(scales)} scales is {count:,} candidates "
+            f"(max {MAX_CANDIDATES:,}); use fewer scales or lines.")
+    candidates = []
+    for combo in itertools.product(scales, repeat=len(trades)):
+        label = ", ".join(f"{t['ticker']} {s:.0%}" for t, s in zip(trades, combo))
+        scaled = [{**t, "delta_aud": t["delta_aud"] * s} for t, s in zip(trades, combo) if s]
+        candidates.append((label, scaled))
+    return candidates
+
+
+def pareto_ranks(criteria: np.ndarray) -> np.ndarray:
+    """Pareto front (1 = non-dominated) of each row of an N × K minimisation matrix.
+
+    A row's rank is one more than the highest rank among the rows dominating
+    it. Over the distinct rows in lexicographic order, every earlier row that
+    is <= on each criterion dominates, so one pass settles each rank against
+    the rows before it.
+    """
+    unique, inverse = np.unique(criteria, axis=0, return_inverse=True)
+    columns = [np.ascontiguousarray(col) for col in unique.T]
+    ranks = np.zeros(len(unique), dtype=int)
+    for i in range(len(unique)):
+        dominated_by = columns[0][:i] <= columns[0][i]
+        for col in columns[1:]:
+            dominated_by &= col[:i] <= col[i]
+        ranks[i] = 1 + (ranks[:i][dominated_by].max() if dominated_by.any() else 0)
+    return ranks[inverse.ravel()]
+
+
+def sweep_trades(
+    pv: PortfolioValuation, candidates: list[tuple[str, list[dict]]],
+    scenarios: list[str] | None = None, db_path=None, ctx: ComplianceContext | None = None,
+) -> SweepResult:
+    """Stress every (label, trade list) candidate under every scenario and rank them."""
+    ctx = ctx or ComplianceContext.load(db_path)
+    monthly = ctx.param_float("monthly_expenses", 9000)
+    ids = scenarios or scenario_ids(db_path)
+
+    batch = project_batch(pv, [trades for _, trades in candidates], db_path)
+    lines = PortfolioValuation(holdings=batch.lines, cash=pv.cash, fx_book=batch.fx_book)
+    returns = scenario_returns(lines, ids, db_path, ctx)             # (lines, S)
+
+    values = batch.values_matrix()                                   # (C, lines)
+    cash = batch.investable_cash_aud()
+    metrics = np.zeros((len(candidates), len(CRITERIA)))
+    worst = np.zeros(len(candidates), dtype=np.intp)
+    for start in range(0, len(candidates), CHUNK_CANDIDATES):
+        part = slice(start, start + CHUNK_CANDIDATES)
+        stressed = values[None, part, :] * (1 + returns.T[:, None, :])   # (S, chunk, lines)
+        obj = assess_objectives_batch(lines, stressed, monthly, pre_values=values[part], cash=cash[part])
+        worst[part] = obj.wealth_loss_aud.argmax(axis=0)
+        metrics[part] = np.column_stack([
+            obj.wealth_loss_aud.max(axis=0),
+            obj.compounder_loss_aud.max(axis=0),
+            obj.recovery_years.max(axis=0),
+            obj.forced_liquidation.sum(axis=0),
+        ])
+    ranks = pareto_ranks(np.round(metrics, 6))
+    totals = batch.total_aud()
+
+    result = SweepResult(ids)
+    for i, (label, trades) in enumerate(candidates):
+        result.candidates.append(SweepCandidate(
+            label=label, trades=trades, total_aud=float(totals[i]),
+            wealth_loss_aud=float(metrics[i, 0]), compounder_loss_aud=float(metrics[i, 1]),
+            recovery_years=float(metrics[i, 2]), forced_scenarios=int(metrics[i, 3]),
+            worst_scenario=ids[worst[i]], pareto_rank=int(ranks[i]),
+        ))
+    result.candidates.sort(key=lambda c: (c.pareto_rank, c.forced_scenarios, c.wealth_loss_aud))
+    logger.debug("Swept %d candidates × %d scenarios: %d on the Pareto front",
+                 len(candidates), len(ids), int((ranks == 1).sum()))
+    return result
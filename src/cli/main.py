@@ -107,10 +107,8 @@ def prices_list():
                    (h.quantity * p.close_price) AS local_value
             FROM instruments i
             JOIN holdings h ON h.instrument_id = i.id
-            JOIN prices p ON p.instrument_id = i.id
-            WHERE p.date = (
-                SELECT MAX(p2.date) FROM prices p2 WHERE p2.instrument_id = i.id
-            )
+            JOIN latest_prices lp ON lp.instrument_id = i.id
+            JOIN prices p ON p.instrument_id = lp.instrument_id AND p.date = lp.date
             ORDER BY i.ticker
         """).fetchall()
 
@@ -200,14 +198,12 @@ def fx_list():
 
     with get_connection() as conn:
         rows = conn.execute("""
-            SELECT from_currency, to_currency, rate, date, source
-            FROM fx_rates
-            WHERE (from_currency, date) IN (
-                SELECT from_currency, MAX(date)
-                FROM fx_rates WHERE to_currency = 'AUD'
-                GROUP BY from_currency
-            ) AND to_currency = 'AUD'
-            ORDER BY from_currency
+            SELECT f.from_currency, f.to_currency, f.rate, f.date, f.source
+            FROM latest_fx_rates lf
+            JOIN fx_rates f ON f.from_currency = lf.from_currency
+                AND f.to_currency = lf.to_currency AND f.date = lf.date
+            WHERE lf.to_currency = 'AUD'
+            ORDER BY f.from_currency
         """).fetchall()
 
     if not rows:
@@ -233,11 +229,13 @@ def portfolio_group():
 @portfolio_group.command("value")
 @click.option("--by", "group_by", type=click.Choice(["ticker", "account", "institution", "type", "currency", "country"]),
               default="ticker", help="Group holdings by field.")
-def portfolio_value(group_by):
+@click.option("--as-of", "as_of", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Value at this date (last price/FX/cash on or before it).")
+def portfolio_value(group_by, as_of):
     """Show full portfolio valuation with AUD conversion."""
-    from src.portfolio.valuation import compute_valuation
+    from src.portfolio.cache import cached_valuation
 
-    pv = compute_valuation()
+    pv = cached_valuation(as_of=as_of.date() if as_of else None)
 
     # Holdings table
     click.echo("\n--- Holdings ---")
@@ -274,11 +272,13 @@ def portfolio_value(group_by):
 
 
 @portfolio_group.command("summary")
-def portfolio_summary():
+@click.option("--as-of", "as_of", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Value at this date (last price/FX/cash on or before it).")
+def portfolio_summary(as_of):
     """Show portfolio allocation by role, type, currency, country."""
-    from src.portfolio.valuation import compute_valuation
+    from src.portfolio.cache import cached_valuation
 
-    pv = compute_valuation()
+    pv = cached_valuation(as_of=as_of.date() if as_of else None)
     total = pv.total_aud
 
     def _print_breakdown(title: str, data: dict[str, float]) -> None:
@@ -288,7 +288,8 @@ def portfolio_summary():
             pct = (value / total * 100) if total > 0 else 0
             click.echo(f"  {label:<24s}  {value:>14,.2f}  {pct:>6.1f}%")
 
-    click.echo(f"\nInvestable assets: AUD {total:,.2f}")
+    as_of_str = f" as of {as_of.date().isoformat()}" if as_of else ""
+    click.echo(f"\nInvestable assets{as_of_str}: AUD {total:,.2f}")
     click.echo(f"  Holdings:         AUD {pv.total_holdings_aud:,.2f}")
     click.echo(f"  Investable cash:  AUD {pv.investable_cash_aud:,.2f}  (allocated to stabiliser)")
     if pv.non_investable_cash_aud:
@@ -301,6 +302,44 @@ def portfolio_summary():
     _print_breakdown("By Institution", pv.by_institution())
 
 
+@portfolio_group.command("history")
+@click.option("--start", type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help="First date (default: full history).")
+@click.option("--end", type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help="Last date (default: latest).")
+@click.option("--out", "out_path", type=click.Path(dir_okay=False), default=None,
+              help="Write the full series to a .csv or .parquet file.")
+@click.option("--by", "group_by", type=click.Choice(["role", "currency", "institution"]),
+              default="role", help="Breakdown to print (ignored with --out).")
+def portfolio_history(start, end, out_path, group_by):
+    """Daily AUD NAV series with role/currency/institution breakdowns."""
+    from src.portfolio.history import compute_nav_history
+
+    history = compute_nav_history(
+        start=start.date() if start else None,
+        end=end.date() if end else None,
+    )
+    if history.nav.empty:
+        click.echo("No price or cash history stored.")
+        return
+
+    first, last = history.nav.index[0], history.nav.index[-1]
+    click.echo(f"NAV history: {len(history.nav):,d} dates, {first:%Y-%m-%d} → {last:%Y-%m-%d}")
+
+    if out_path:
+        rows = history.write(out_path)
+        click.echo(f"  Wrote {rows:,d} rows to {out_path}")
+        return
+
+    breakdown = {
+        "role": history.by_capital_role,
+        "currency": history.by_currency,
+        "institution": history.by_institution,
+    }[group_by]
+    # Month-end sample keeps the terminal output readable
+    monthly = breakdown.assign(NAV=history.nav).resample("ME").last()
+    click.echo()
+    click.echo(monthly.to_string(float_format=lambda v: f"{v:,.0f}"))
+
+
 # ---------------------------------------------------------------------------
 # Classify command group (instrument classification)
 # ---------------------------------------------------------------------------
@@ -443,15 +482,37 @@ def classify_list():
 
 
 @portfolio_group.command("exposures")
-def portfolio_exposures():
+@click.option("--driver", default=None, help="Only show holdings exposed to this macro driver.")
+def portfolio_exposures(driver):
     """Show portfolio exposure to macro drivers and corporate groups."""
-    from src.portfolio.valuation import compute_valuation
+    from src.db.connection import get_connection
+    from src.portfolio.cache import cached_valuation
 
-    pv = compute_valuation()
+    pv = cached_valuation()
     total = pv.total_aud
 
     click.echo(f"\nTotal portfolio: AUD {total:,.2f}")
 
+    if driver:
+        with get_connection() as conn:
+            tagged = {r["ticker"] for r in conn.execute("""
+                SELECT i.ticker FROM instrument_macro_drivers d
+                JOIN instruments i ON i.id = d.instrument_id
+                WHERE d.driver = ?
+            """, (driver,))}
+        exposed = [h for h in pv.holdings if h.ticker in tagged]
+        if not exposed:
+            click.echo(f"No holdings tagged with macro driver '{driver}'.")
+            return
+        click.echo(f"\n--- Exposure to {driver} ---")
+        for h in sorted(exposed, key=lambda h: -h.value_aud):
+            pct = (h.value_aud / total * 100) if total > 0 else 0
+            click.echo(f"  {h.ticker:<24s}  AUD {h.value_aud:>14,.2f}  {pct:>6.1f}%")
+        value = sum(h.value_aud for h in exposed)
+        pct = (value / total * 100) if total > 0 else 0
+        click.echo(f"  {'Total':<24s}  AUD {value:>14,.2f}  {pct:>6.1f}%")
+        return
+
     macro = pv.by_macro_driver()
     click.echo("\n--- Macro Driver Exposure ---")
     for driver, value in sorted(macro.items(), key=lambda x: -x[1]):
@@ -475,19 +536,43 @@ def portfolio_exposures():
 # ---------------------------------------------------------------------------
 
 # ---------------------------------------------------------------------------
-# Compliance command
+# Compliance command group
 # ---------------------------------------------------------------------------
 
-@cli.command("compliance")
+@cli.group("compliance", invoke_without_command=True)
 @click.option("--detail", is_flag=True, help="Show full detail per rule.")
 @click.option("--save/--no-save", default=True, help="Store result as a compliance snapshot.")
-def compliance_cmd(detail, save):
-    """Run all compliance checks against portfolio management rules."""
-    from src.portfolio.valuation import compute_valuation
-    from src.compliance.checks import run_all_checks, store_compliance_snapshot
+@click.option("--rules", "rule_patterns", default=None,
+              help="Comma-separated rule ids or patterns to run (e.g. '3.*,5.1'). Default: all.")
+@click.option("--parallel", is_flag=True, help="Run the selected checks concurrently.")
+@click.option("--watch", "watch_seconds", type=click.FloatRange(min=1), default=None,
+              help="Recheck every N seconds, re-running only rules whose inputs changed.")
+@click.pass_context
+def compliance_group(ctx, detail, save, rule_patterns, parallel, watch_seconds):
+    """Run all compliance checks against portfolio management rules.
+
+    Without a subcommand, runs the checks; `compliance history` shows a
+    rule's stored values over time.
+    """
+    if ctx.invoked_subcommand is not None:
+        return
 
-    pv = compute_valuation()
-    results = run_all_checks(pv)
+    from src.portfolio.cache import cached_valuation
+    from src.compliance.checks import run_checks, select_rules, store_compliance_snapshot
+
+    rules = [p.strip() for p in rule_patterns.split(",") if p.strip()] if rule_patterns else None
+
+    if watch_seconds:
+        _watch_compliance(rules, watch_seconds)
+        return
+
+    try:
+        select_rules(rules)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint="--rules")
+
+    pv = cached_valuation()
+    results = run_checks(pv, rules=rules, parallel=parallel)
 
     # Summary counts
     passes = sum(1 for r in results if r.status == "pass")
@@ -519,19 +604,98 @@ def compliance_cmd(detail, save):
         if warnings == 0 and breaches == 0:
             click.echo(click.style("  All checks passed.", fg="green"))
 
-    if save:
+    if save and rules:
+        click.echo("\nSnapshot not saved (partial rule selection).")
+    elif save:
         snap_id = store_compliance_snapshot(results, pv.total_aud)
         click.echo(f"\nSnapshot #{snap_id} saved.")
 
 
+@compliance_group.command("history")
+@click.option("--rule", "rule_id", required=True, help="Rule id, e.g. 5.1 or 3.1-cr.")
+@click.option("--since", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="First date (default: full history).")
+@click.option("--until", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Last date (default: latest).")
+def compliance_history(rule_id, since, until):
+    """A rule's stored value, threshold and status over time."""
+    from src.compliance.history import rule_history
+
+    points = rule_history(
+        rule_id,
+        since=since.date() if since else None,
+        until=until.date() if until else None,
+    )
+    if not points:
+        click.echo(f"No stored results for rule {rule_id}.")
+        return
+
+    status_color = {"pass": "green", "warning": "yellow", "breach": "red"}
+
+    def fmt(v: float | None) -> str:
+        return f"{v:>12,.2f}" if v is not None else f"{'—':>12s}"
+
+    click.echo(f"\nRule {rule_id}: {len(points)} results, {points[0].date} → {points[-1].date}\n")
+    click.echo(f"  {'Date':<10s}  {'Snap':>5s}  {'Status':<8s}  {'Value':>12s}  {'Threshold':>12s}  {'Margin':>12s}")
+    for p in points:
+        click.echo(click.style(
+            f"  {p.date:<10s}  {p.snapshot_id or 0:>5d}  {p.status:<8s}  "
+            f"{fmt(p.value)}  {fmt(p.threshold)}  {fmt(p.margin)}",
+            fg=status_color[p.status],
+        ))
+
+
+def _watch_compliance(rules: list[str] | None, interval: float) -> None:
+    """Recheck compliance until interrupted, printing status changes."""
+    import time
+    from datetime import datetime
+    from src.portfolio.cache import cached_valuation
+    from src.compliance.incremental import IncrementalChecker
+
+    try:
+        checker = IncrementalChecker(rules=rules)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint="--rules")
+
+    status_color = {"pass": "green", "warning": "yellow", "breach": "red"}
+    previous: dict[tuple[str, str], str] = {}
+    click.echo(f"Watching compliance every {interval:g}s (Ctrl-C to stop).")
+    try:
+        while True:
+            pv = cached_valuation()
+            results = checker.run(pv)
+            current = {(r.rule_id, r.rule_name): r.status for r in results}
+            stamp = datetime.now().strftime("%H:%M:%S")
+            breaches = sum(1 for r in results if r.status == "breach")
+            warnings = sum(1 for r in results if r.status == "warning")
+            click.echo(f"[{stamp}] AUD {pv.total_aud:,.2f}  {warnings} warning, {breaches} breach  "
+                       f"({len(checker.last_evaluated)} rules re-evaluated)")
+            if previous:
+                for r in results:
+                    before = previous.get((r.rule_id, r.rule_name))
+                    if before != r.status:
+                        click.echo(click.style(
+                            f"  [{r.rule_id}] {r.rule_name}: {before or 'new'} → {r.status}. {r.detail}",
+                            fg=status_color[r.status],
+                        ))
+                for (rule_id, rule_name), before in previous.items():
+                    if (rule_id, rule_name) not in current:
+                        click.echo(f"  [{rule_id}] {rule_name}: {before} → cleared")
+            previous = current
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        click.echo("\nStopped.")
+
+
 # ---------------------------------------------------------------------------
 # Analytics commands (sensitivity, stress, correlations)
 # ---------------------------------------------------------------------------
 
-@cli.command("sensitivity")
+@cli.group("sensitivity", invoke_without_command=True)
 @click.option("--trades", "trades_file", type=click.Path(exists=True),
               help="JSON file of hypothetical trades. Shows pre-trade AND post-trade sensitivity.")
-def sensitivity_cmd(trades_file):
+@click.pass_context
+def sensitivity_group(ctx, trades_file):
     """How fragile is the portfolio against its strategic objectives?
 
     Tests: income bridge failure, forced liquidation distance, compounding
@@ -539,12 +703,18 @@ def sensitivity_cmd(trades_file):
 
     With --trades <file.json>, shows both pre-trade and post-trade sensitivity.
     JSON format: [{"ticker": "FLBL", "delta_aud": -120000}, ...]
+
+    `sensitivity surface` evaluates the objectives over a grid of two shocks.
     """
+    if ctx.invoked_subcommand is not None:
+        return
+
     import json as json_mod
-    from src.portfolio.valuation import compute_valuation, project_valuation
+    from src.portfolio.cache import cached_valuation
+    from src.portfolio.valuation import project_valuation
     from src.analytics.sensitivity import analyse_sensitivity
 
-    pv = compute_valuation()
+    pv = cached_valuation()
 
     projected_pv = None
     if trades_file:
@@ -590,13 +760,142 @@ def sensitivity_cmd(trades_file):
                 )
 
 
+def _parse_axis(spec: str, param_hint: str):
+    """'equity' or 'equity:-0.6:0.2' → (axis, low, high) with the axis's default range."""
+    from src.analytics.sensitivity import SURFACE_AXES
+
+    name, *bounds = spec.split(":")
+    if name not in SURFACE_AXES:
+        raise click.BadParameter(f"'{name}' is not one of: {', '.join(SURFACE_AXES)}.",
+                                 param_hint=param_hint)
+    if not bounds:
+        return (name, *SURFACE_AXES[name][1])
+    try:
+        low, high = (float(b) for b in bounds)
+    except ValueError:
+        raise click.BadParameter(f"Expected AXIS or AXIS:LOW:HIGH, got '{spec}'.", param_hint=param_hint)
+    if low >= high:
+        raise click.BadParameter(f"LOW must be below HIGH in '{spec}'.", param_hint=param_hint)
+    return name, low, high
+
+
+def _axis_label(axis: str, value: float) -> str:
+    return f"{value:+.0f}bp" if axis == "rates" else f"{value:+.1%}"
+
+
+@sensitivity_group.command("surface")
+@click.option("--x", "x_spec", default="equity", show_default=True, metavar="AXIS[:LOW:HIGH]",
+              help="First shock axis: equity, aud, rates (bp) or stabiliser, with an optional range.")
+@click.option("--y", "y_spec", default="aud", show_default=True, metavar="AXIS[:LOW:HIGH]",
+              help="Second shock axis.")
+@click.option("--steps", type=click.IntRange(min=2), default=201, show_default=True,
+              help="Grid points per axis.")
+@click.option("--metric", type=click.Choice(["income_bridge_months", "stabiliser_excess_aud",
+                                             "aud_growth_pct"]),
+              default="income_bridge_months", show_default=True,
+              help="Metric shown as a grid and written by --out.")
+@click.option("--out", "out_path", type=click.Path(dir_okay=False),
+              help="Write the full metric matrix (x rows × y columns) to a CSV file.")
+def sensitivity_surface_cmd(x_spec, y_spec, steps, metric, out_path):
+    """Objective metrics over a dense grid of two shocks, with break-even contours.
+
+    Metrics: income bridge months (floor: the Rule 2.1 months, 24 by
+    default), stabiliser excess over the expense floor (AUD, floor 0) and AUD
+    share of growth capital (floor: the Rule 5.1 band low, 50%). For
+    each value of the first shock, the break-even table shows the second
+    shock at which each metric crosses its floor.
+    """
+    import numpy as np
+    from src.portfolio.cache import cached_valuation
+    from src.analytics.sensitivity import SURFACE_AXES, SURFACE_METRICS, sensitivity_surface
+
+    x_axis, x_low, x_high = _parse_axis(x_spec, "--x")
+    y_axis, y_low, y_high = _parse_axis(y_spec, "--y")
+    pv = cached_valuation()
+    try:
+        surface = sensitivity_surface(pv, x_axis, y_axis, np.linspace(x_low, x_high, steps),
+                                      np.linspace(y_low, y_high, steps))
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+
+    click.echo(f"\nPortfolio: AUD {pv.total_aud:,.2f}")
+    click.echo(click.style(f"\n=== SENSITIVITY SURFACE: {x_axis} × {y_axis} ({steps} × {steps}) ===\n",
+                           bold=True))
+    click.echo(f"  x: {SURFACE_AXES[x_axis][0]}, {_axis_label(x_axis, x_low)} to {_axis_label(x_axis, x_high)}")
+    click.echo(f"  y: {SURFACE_AXES[y_axis][0]}, {_axis_label(y_axis, y_low)} to {_axis_label(y_axis, y_high)}")
+
+    # Sampled rows keep the terminal output readable; --out has the full matrix
+    rows = np.unique(np.linspace(0, steps - 1, min(steps, 11)).round().astype(int))
+    cols = np.unique(np.linspace(0, steps - 1, min(steps, 7)).round().astype(int))
+
+    click.echo(click.style(f"\n--- Break-even {y_axis} move per {x_axis} move ---\n", bold=True))
+    names = list(SURFACE_METRICS)
+    click.echo(f"  {x_axis:>10s}" + "".join(f"  {name:>22s}" for name in names))
+    click.echo(f"  {'-' * (10 + 24 * len(names))}")
+    contours = {name: surface.break_even(name) for name in names}
+    for i in rows:
+        cells = []
+        for name in names:
+            level = surface.levels[name]
+            value = contours[name][i]
+            if np.isnan(value):
+                below = np.nanmax(surface.metrics[name][i], initial=-np.inf) < level
+                cells.append("below everywhere" if below else "above everywhere")
+            else:
+                cells.append(_axis_label(y_axis, value))
+        click.echo(f"  {_axis_label(x_axis, surface.x[i]):>10s}" + "".join(f"  {c:>22s}" for c in cells))
+
+    click.echo(click.style(f"\n--- {SURFACE_METRICS[metric]} ---\n", bold=True))
+    fmt = "{:>11,.0f}" if metric == "stabiliser_excess_aud" else "{:>11.1f}"
+    click.echo(f"  {x_axis + ' / ' + y_axis:>16s}" + "".join(f"{_axis_label(y_axis, surface.y[j]):>11s}" for j in cols))
+    click.echo(f"  {'-' * (16 + 11 * len(cols))}")
+    level = surface.levels[metric]
+    for i in rows:
+        line = f"  {_axis_label(x_axis, surface.x[i]):>16s}"
+        for j in cols:
+            value = surface.metrics[metric][i, j]
+            cell = fmt.format(value)
+            line += click.style(cell, fg="red") if value < level else cell
+        click.echo(line)
+
+    if out_path:
+        surface.write(out_path, metric)
+        click.echo(f"\n  Wrote the {steps} × {steps} {metric} matrix to {out_path}")
+    click.echo()
+
+
 @cli.command("stress")
-@click.option("--scenario", type=click.Choice(["flat35", "covid2020", "gfc2008", "rates2022", "all"]),
-              default="all", help="Scenario to run (default: all).")
+@click.option("--scenario", default="all",
+              help="Scenario to run: flat35, covid2020, gfc2008, rates2022, a library "
+                   "scenario (see `towsand scenario list`) or all (default). Not with "
+                   "--monte-carlo, --reverse, --shock or --factor-history.")
 @click.option("--detail", is_flag=True, help="Show per-holding drawdowns.")
 @click.option("--trades", "trades_file", type=click.Path(exists=True),
               help="JSON file of hypothetical trades to project. Runs pre-trade AND post-trade comparison.")
-def stress_cmd(scenario, detail, trades_file):
+@click.option("--monte-carlo", "mc_model", type=click.Choice(["bootstrap", "student-t", "regime"]),
+              help="Simulate one-year paths from a fitted return model instead of the fixed scenarios.")
+@click.option("--paths", type=click.IntRange(min=1), default=100_000, show_default=True,
+              help="Monte Carlo paths.")
+@click.option("--reverse", is_flag=True,
+              help="Reverse stress: find the smallest shock that breaks each objective and rule.")
+@click.option("--max-shock", type=click.FloatRange(min=0, min_open=True), default=1.0, show_default=True,
+              help="Largest shock norm searched by --reverse (1.0 = 100% on one factor).")
+@click.option("--seed", type=int, help="Monte Carlo / reverse-search seed (same seed, same result).")
+@click.option("--workers", type=click.IntRange(min=1),
+              help="Worker processes for the scenario × portfolio runs (default: in-process) "
+                   "or Monte Carlo chunks (default: all cores).")
+@click.option("--shock", "factor_shocks", multiple=True, metavar="FACTOR=VALUE",
+              help="Factor shock instead of the scenarios, e.g. driver:iron_ore=-40% fx:AUD=-15% "
+                   "rates=+200bp. Repeatable.")
+@click.option("--factor-history", "history_file", type=click.Path(exists=True),
+              help="CSV of cumulative factor moves (date, then one column per factor); "
+                   "each date is run as a scenario. Not with --shock.")
+@click.option("--sweep", is_flag=True,
+              help="With --trades: rank many trade candidates by their worst stress outcomes.")
+@click.option("--scales", default="0,0.25,0.5,0.75,1,1.25,1.5", show_default=True,
+              help="Sweep scales applied to each trade line (every combination is a candidate).")
+def stress_cmd(scenario, detail, trades_file, mc_model, paths, reverse, max_shock, seed, workers,
+               factor_shocks, history_file, sweep, scales):
     """What happens to your strategic objectives under stress?
 
     For each scenario: can you still feed your family? How much compounding
@@ -605,12 +904,52 @@ def stress_cmd(scenario, detail, trades_file):
     With --trades <file.json>, runs both pre-trade and post-trade portfolios
     and shows how the trades change resilience. JSON format:
     [{"ticker": "FLBL", "delta_aud": -120000}, {"ticker": "VAS.AX", "delta_aud": 80000}]
+
+    With --monte-carlo MODEL, reports how likely each objective is to fail
+    over a year instead (bootstrap, student-t or regime-switching model).
+
+    With --reverse, searches shocks by asset class, macro driver and currency
+    for the smallest one that breaks each objective and compliance rule.
+
+    With --shock or --factor-history (not both), holdings move by their macro
+    driver, currency and duration exposures (factors: driver:<name>, fx:<CCY>,
+    rates[:<CCY>] in bp). A history shows the worst date in detail.
+
+    With --sweep, --trades is a proposal whose lines are each scaled by every
+    --scales value, or a list of proposals ({"label": [trades], ...} or
+    [[trades], ...]). Every candidate runs every scenario and the table ranks
+    them by Pareto front over worst wealth loss, compounder damage, recovery
+    and forced liquidations.
+
+    --monte-carlo, --reverse, --shock/--factor-history and --sweep are
+    separate modes and cannot be combined; --scenario selects scenarios for
+    the default run and --sweep only.
     """
     import json as json_mod
-    from src.portfolio.valuation import compute_valuation, project_valuation
-    from src.analytics.stress import run_scenario, run_all_scenarios
-
-    pv = compute_valuation()
+    from src.portfolio.cache import cached_valuation
+    from src.portfolio.valuation import project_valuation
+    from src.analytics.stress import run_scenarios, scenario_ids
+
+    modes = [flag for flag, given in (
+        ("--sweep", sweep), ("--monte-carlo", mc_model), ("--reverse", reverse),
+        ("--shock", factor_shocks), ("--factor-history", history_file),
+    ) if given]
+    if len(modes) > 1:
+        raise click.UsageError(f"{' and '.join(modes)} cannot be combined; choose one stress mode.")
+    if scenario != "all" and modes and modes[0] != "--sweep":
+        raise click.UsageError(f"--scenario does not apply to {modes[0]}.")
+    available = scenario_ids()
+    if scenario != "all" and scenario not in available:
+        raise click.BadParameter(
+            f"'{scenario}' is not one of: {', '.join(available + ['all'])}.", param_hint="--scenario")
+
+    pv = cached_valuation()
+
+    if sweep:
+        if not trades_file:
+            raise click.UsageError("--sweep needs --trades.")
+        _sweep_report(pv, trades_file, scales, None if scenario == "all" else [scenario])
+        return
 
     projected_pv = None
     if trades_file:
@@ -622,14 +961,21 @@ def stress_cmd(scenario, detail, trades_file):
     if projected_pv:
         portfolios.append(("POST-TRADE", projected_pv))
 
-    all_run_results: list[tuple[str, list]] = []
+    if mc_model:
+        _monte_carlo_report(portfolios, mc_model, paths, seed, workers)
+        return
+    if reverse:
+        _reverse_stress_report(portfolios, max_shock, seed)
+        return
 
-    for label, port in portfolios:
-        if scenario == "all":
-            results = run_all_scenarios(port)
-        else:
-            results = [run_scenario(port, scenario)]
-        all_run_results.append((label, results))
+    if factor_shocks or history_file:
+        grouped = _factor_stress(portfolios, factor_shocks, history_file)
+    else:
+        grouped = [[] for _ in portfolios]
+        ids = None if scenario == "all" else [scenario]
+        for index, result in run_scenarios([port for _, port in portfolios], ids, workers=workers or 1):
+            grouped[index].append(result)
+    all_run_results = [(label, results) for (label, _), results in zip(portfolios, grouped)]
 
     # If comparing, show side-by-side summary
     if projected_pv:
@@ -689,7 +1035,9 @@ def stress_cmd(scenario, detail, trades_file):
                 f"{forced}"
             )
 
-        # Detail per scenario
+        # Detail per scenario (only the worst date of a factor history)
+        if history_file:
+            results = [max(results, key=lambda r: r.objectives.wealth_loss_aud)] if results else []
         for r in results:
             o = r.objectives
             click.echo(f"\n{'='*70}")
@@ -740,13 +1088,21 @@ def stress_cmd(scenario, detail, trades_file):
 
             if detail:
                 click.echo("\n  Per-holding drawdowns:")
-                click.echo(f"  {'Ticker':<14s}  {'Role':<12s}  {'Pre':>12s}  {'DD':>8s}  {'Post':>12s}  {'Source':<10s}")
-                click.echo(f"  {'-'*74}")
+                click.echo(f"  {'Ticker':<14s}  {'Role':<12s}  {'Pre':>12s}  {'DD':>8s}  {'Post':>12s}  "
+                           f"{'Source':<10s}  {'Recovered'}")
+                click.echo(f"  {'-'*86}")
                 for hs in sorted(r.holding_stresses, key=lambda x: x.drawdown_pct):
                     role = hs.capital_role or "—"
+                    if hs.source != "historical":
+                        recovered = "—"
+                    elif hs.recovery_days is None:
+                        recovered = "not yet"
+                    else:
+                        recovered = f"{hs.recovery_days}d"
                     click.echo(
                         f"  {hs.ticker:<14s}  {role:<12s}  {hs.pre_stress_aud:>12,.0f}  "
-                        f"{hs.drawdown_pct:>+7.1f}%  {hs.post_stress_aud:>12,.0f}  {hs.source:<10s}"
+                        f"{hs.drawdown_pct:>+7.1f}%  {hs.post_stress_aud:>12,.0f}  {hs.source:<10s}  "
+                        f"{recovered}"
                     )
 
             if r.breaches:
@@ -755,6 +1111,251 @@ def stress_cmd(scenario, detail, trades_file):
                     click.echo(click.style(f"    [{b.rule_id}] {b.detail}", dim=True))
 
 
+def _sweep_report(pv, trades_file, scales_text, scenarios, limit=25):
+    """Print the Pareto-ranked trade sweep."""
+    import json as json_mod
+    from src.analytics.sweep import scaled_candidates, sweep_trades
+
+    try:
+        scales = tuple(float(x) for x in scales_text.split(",") if x.strip())
+    except ValueError:
+        scales = ()
+    if not scales or min(scales) < 0:
+        raise click.BadParameter(f"'{scales_text}' is not a list of non-negative numbers.",
+                                 param_hint="--scales")
+
+    with open(trades_file) as f:
+        spec = json_mod.load(f)
+    try:
+        if isinstance(spec, dict):
+            candidates = list(spec.items())
+        elif spec and all(isinstance(c, list) for c in spec):
+            candidates = [(f"#{i}", trades) for i, trades in enumerate(spec, start=1)]
+        else:
+            candidates = scaled_candidates(spec, scales)
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    if not candidates:
+        raise click.ClickException(f"No trade candidates in {trades_file}.")
+
+    result = sweep_trades(pv, candidates, scenarios)
+    ranked = result.candidates
+    click.echo(click.style(
+        f"\n=== STRESS TRADE SWEEP: {len(ranked):,} candidates × {len(result.scenario_ids)} scenarios ===\n",
+        bold=True))
+    click.echo("  Worst case over the scenarios per candidate; rank 1 = Pareto front "
+               "(no candidate is better on every measure).\n")
+    width = min(max(len(c.label) for c in ranked), 60)
+    click.echo(f"  {'Rank':>4s}  {'Candidate':<{width}s}  {'Wealth Loss':>12s}  {'Comp.Dam':>10s}  "
+               f"{'Recov':>6s}  {'Forced':>6s}  {'Worst scenario'}")
+    click.echo(f"  {'-' * (width + 70)}")
+    for c in ranked[:limit]:
+        color = "red" if c.forced_scenarios else ("green" if c.pareto_rank == 1 else None)
+        click.echo(click.style(
+            f"  {c.pareto_rank:>4d}  {c.label[:width]:<{width}s}  {c.wealth_loss_aud:>12,.0f}  "
+            f"{c.compounder_loss_aud:>10,.0f}  {c.recovery_years:>5.1f}y  "
+            f"{c.forced_scenarios:>3d}/{len(result.scenario_ids):<2d}  {c.worst_scenario}",
+            fg=color,
+        ))
+    if len(ranked) > limit:
+        front = sum(c.pareto_rank == 1 for c in ranked)
+        click.echo(click.style(f"\n  Showing {limit} of {len(ranked):,} candidates "
+                               f"({front:,} on the Pareto front).", dim=True))
+    click.echo()
+
+
+def _factor_stress(portfolios, factor_shocks, history_file):
+    """Factor-model stress results per portfolio: one ad-hoc shock or each history date."""
+    from src.analytics.factors import (
+        load_factor_history, load_factor_model, parse_shock, run_factor_stress,
+    )
+
+    try:
+        if history_file:
+            labels, shocks = load_factor_history(history_file)
+        else:
+            shocks = [dict(parse_shock(text) for text in factor_shocks)]
+            labels = ["Factor shock"]
+        model = load_factor_model()
+        model.shock_matrix(shocks)      # reject unknown factors before running anything
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    return [run_factor_stress(port, model, labels, shocks) for _, port in portfolios]
+
+
+def _monte_carlo_report(portfolios, model_kind, paths, seed, workers):
+    """Print the Monte Carlo failure probabilities for each portfolio."""
+    from src.analytics.montecarlo import FAILURES, fit_return_model, run_monte_carlo
+
+    try:
+        model = fit_return_model(model_kind, [h.ticker for _, p in portfolios for h in p.holdings])
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+
+    results = [(label, run_monte_carlo(port, model, paths, seed, workers)) for label, port in portfolios]
+    first = results[0][1]
+    click.echo(click.style(
+        f"\n=== MONTE CARLO STRESS: {first.paths:,} one-year paths, {first.model} model ===\n", bold=True))
+    click.echo(f"  Fitted on {first.observations:,} daily returns of {len(first.tickers)} instruments"
+               + (f" (seed {seed})" if seed is not None else ""))
+    if first.unmodelled:
+        click.echo(click.style(
+            f"  [Held flat — too little price history: {', '.join(first.unmodelled)}]", dim=True))
+
+    labels = [label for label, _ in results] if len(results) > 1 else ["Probability"]
+    click.echo(f"\n  {'Objective failure':<68s}" + "".join(f"  {lbl:>11s}" for lbl in labels))
+    click.echo(f"  {'-' * (68 + 13 * len(labels))}")
+    for key, text in FAILURES.items():
+        probs = [r.failure_probability[key] for _, r in results]
+        color = "red" if max(probs) >= 0.05 else ("yellow" if max(probs) > 0 else "green")
+        click.echo(click.style(f"  {text:<68s}" + "".join(f"  {p:>10.1%} " for p in probs), fg=color))
+
+    labels = labels if len(results) > 1 else ["Value"]
+    click.echo(f"\n  {'Percentile':<68s}" + "".join(f"  {lbl:>11s}" for lbl in labels))
+    click.echo(f"  {'-' * (68 + 13 * len(labels))}")
+    for attr, text, fmt in (("wealth_loss_pct", "Wealth loss", "{:>+10.1f}%"),
+                            ("compounder_loss_pct", "Compounder loss", "{:>+10.1f}%"),
+                            ("recovery_years", "Recovery at 6.5% real", "{:>9.1f}y ")):
+        for pct in first.wealth_loss_pct:
+            values = [getattr(r, attr)[pct] for _, r in results]
+            click.echo(f"  {f'{text} (p{pct})':<68s}" + "".join("  " + fmt.format(v) for v in values))
+    click.echo()
+
+
+def _reverse_stress_report(portfolios, max_shock, seed):
+    """Print the smallest breaking shock per objective/rule for each portfolio."""
+    from src.analytics.reverse import reverse_stress
+
+    for label, port in portfolios:
+        label_str = f" ({label})" if len(portfolios) > 1 else ""
+        click.echo(click.style(f"\n=== REVERSE STRESS{label_str}: AUD {port.total_aud:,.2f} ===\n", bold=True))
+        click.echo("  Smallest shock (Euclidean norm of the factor returns) that breaks each target.\n")
+        click.echo(f"  {'Target':<20s}  {'Distance':>9s}  {'Largest components'}")
+        click.echo(f"  {'-' * 100}")
+        results = reverse_stress(port, max_norm=max_shock, seed=0 if seed is None else seed)
+        results.sort(key=lambda r: (r.norm is None, r.norm or 0.0))
+        for r in results:
+            if r.already_broken:
+                click.echo(click.style(f"  {r.target:<20s}  {'broken':>9s}  {r.description}", fg="red"))
+            elif r.norm is None:
+                click.echo(click.style(f"  {r.target:<20s}  {f'>{max_shock:.0%}':>9s}  {r.description}", dim=True))
+            else:
+                parts = ", ".join(f"{key} {v:+.0%}" for (_, key), v in list(r.shocks.items())[:4])
+                color = "yellow" if r.norm < 0.25 else None
+                click.echo(click.style(f"  {r.target:<20s}  {r.norm:>8.0%}   {parts}", fg=color))
+                click.echo(click.style(f"  {'':<20s}  {'':>9s}  {r.description}", dim=True))
+    click.echo()
+
+
+def _parse_shocks(dimension: str, values: tuple[str, ...]) -> dict[tuple[str, str], float]:
+    """KEY=RETURN option values (e.g. 'equity=-0.35') → {(dimension, key): return}."""
+    shocks = {}
+    for value in values:
+        key, sep, shock = value.partition("=")
+        try:
+            if not sep or not key.strip():
+                raise ValueError
+            shocks[(dimension, key.strip())] = float(shock)
+        except ValueError:
+            raise click.BadParameter(f"expected KEY=RETURN (e.g. equity=-0.35), got '{value}'",
+                                     param_hint=f"--{dimension.replace('_', '-')}")
+    return shocks
+
+
+@cli.group("scenario")
+def scenario_group():
+    """Manage the user-defined stress scenario library."""
+
+
+@scenario_group.command("set")
+@click.argument("scenario_id")
+@click.option("--name", help="Display name (required for a new scenario).")
+@click.option("--description", help="What the scenario represents.")
+@click.option("--asset-class", "asset_classes", multiple=True, metavar="CLASS=RETURN",
+              help="Return for an asset class, e.g. equity=-0.35 (repeatable).")
+@click.option("--macro-driver", "macro_drivers", multiple=True, metavar="DRIVER=RETURN",
+              help="Return added for a macro driver, e.g. bulk_commodities=-0.20 (repeatable).")
+@click.option("--currency", "currencies", multiple=True, metavar="CCY=RETURN",
+              help="AUD return of unhedged assets in a currency, e.g. USD=0.10 when the AUD "
+                   "falls 10% (repeatable; not AUD).")
+@click.option("--replace", is_flag=True, help="Drop the scenario's other shocks.")
+def scenario_set(scenario_id, name, description, asset_classes, macro_drivers, currencies, replace):
+    """Create or update a stress scenario.
+
+    A holding's return is the sum of its asset class, macro driver and
+    economic-currency shocks. Run it with `towsand stress --scenario ID`.
+    """
+    from src.analytics.scenarios import save_scenario
+
+    shocks = {
+        **_parse_shocks("asset_class", asset_classes),
+        **_parse_shocks("macro_driver", macro_drivers),
+        **_parse_shocks("currency", currencies),
+    }
+    try:
+        scenario = save_scenario(scenario_id, name, description, shocks, replace=replace)
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f"{scenario.scenario_id}: {scenario.name} ({len(scenario.shocks)} shocks)")
+
+
+@scenario_group.command("list")
+def scenario_list():
+    """List library scenarios."""
+    from src.analytics.scenarios import load_library
+
+    library = load_library()
+    if not library.scenarios:
+        click.echo("No library scenarios. Add one with `towsand scenario set`.")
+        return
+    click.echo(f"{'Scenario':<20s}  {'Name':<40s}  {'Shocks':>6s}")
+    click.echo("-" * 70)
+    for s in library.scenarios:
+        click.echo(f"{s.scenario_id:<20s}  {s.name:<40s}  {len(s.shocks):>6d}")
+
+
+@scenario_group.command("show")
+@click.argument("scenario_id")
+def scenario_show(scenario_id):
+    """Show a scenario's shocks and the return each holding would take."""
+    from src.analytics.scenarios import load_library
+    from src.compliance.context import ComplianceContext
+    from src.portfolio.cache import cached_valuation
+
+    library = load_library()
+    scenario = library.get(scenario_id)
+    if scenario is None:
+        raise click.ClickException(f"Scenario not found: {scenario_id}")
+    click.echo(click.style(f"{scenario.scenario_id}: {scenario.name}", bold=True))
+    if scenario.description:
+        click.echo(f"  {scenario.description}")
+    click.echo()
+    for (dimension, key), shock in scenario.shocks.items():
+        click.echo(f"  {dimension:<14s}  {key:<24s}  {shock:>+8.1%}")
+
+    pv = cached_valuation()
+    returns = library.returns(pv, ComplianceContext.load())
+    returns = returns[:, library.scenario_ids.index(scenario_id)]
+    click.echo(f"\n  {'Ticker':<14s}  {'Value':>12s}  {'Return':>8s}")
+    click.echo(f"  {'-' * 38}")
+    for h, r in sorted(zip(pv.holdings, returns), key=lambda x: x[1]):
+        click.echo(f"  {h.ticker:<14s}  {h.value_aud:>12,.0f}  {r:>+8.1%}")
+    if not returns.any():
+        click.echo(click.style("\n  No holding is exposed to any of this scenario's shocks.", fg="yellow"))
+
+
+@scenario_group.command("remove")
+@click.argument("scenario_id")
+def scenario_remove(scenario_id):
+    """Delete a scenario from the library."""
+    from src.analytics.scenarios import delete_scenario
+
+    if delete_scenario(scenario_id):
+        click.echo(f"Deleted '{scenario_id}'.")
+    else:
+        click.echo(f"'{scenario_id}' was not in the library.")
+
+
 @cli.command("correlations")
 @click.option("--window", type=click.Choice(["60", "252"]), default="252",
               help="Rolling window in trading days (default: 252).")
@@ -767,10 +1368,10 @@ def correlations_cmd(window, stress_only, detail):
     provide crisis alpha? Are compounders truly diversified or secretly
     the same bet?
     """
-    from src.portfolio.valuation import compute_valuation
+    from src.portfolio.cache import cached_valuation
     from src.analytics.correlation import compute_correlations
 
-    pv = compute_valuation()
+    pv = cached_valuation()
     win = int(window)
 
     click.echo(f"\nComputing {win}-day rolling correlations...")
@@ -861,6 +1462,120 @@ def correlations_cmd(window, stress_only, detail):
         click.echo(f"  {p.ticker_a}–{p.ticker_b:<25s}  {ra:<12s}  {rb:<12s}  {c60:>6s}  {cstr:>7s}  {flag}")
 
 
+# ---------------------------------------------------------------------------
+# Recommend command group (trade generation)
+# ---------------------------------------------------------------------------
+
+@cli.group("recommend")
+def recommend_group():
+    """Generate trade lists that bring the portfolio back within the rules."""
+
+
+@recommend_group.command("cure")
+@click.option("--candidates", "candidates_file", type=click.Path(exists=True), default=None,
+              help="JSON list of instruments not held that may be bought (trades-v3 format; "
+                   "delta_aud ignored).")
+@click.option("--freeze", default=None, help="Comma-separated tickers that must not be traded.")
+@click.option("--targets", is_flag=True,
+              help="Also enforce the warning-level band edges (full target bands).")
+@click.option("--buffer", "buffer_pct", default=0.1, show_default=True,
+              help="Margin in percentage points kept inside every limit.")
+@click.option("--out", "out_path", type=click.Path(dir_okay=False), default=None,
+              help="Write the trades JSON here (default: print it).")
+def recommend_cure(candidates_file, freeze, targets, buffer_pct, out_path):
+    """Smallest-turnover trades that cure every linear rule breach.
+
+    Solves a linear program over the role bands, position and issuer caps,
+    Australia concentration, macro drivers, currency shares, yield exclusion,
+    stabiliser liquidity and duration buckets, then re-checks the projected
+    portfolio with the full rulebook.
+    """
+    import json as json_mod
+    from src.portfolio.cache import cached_valuation
+    from src.portfolio.valuation import project_valuation
+    from src.compliance.checks import run_checks
+    from src.compliance.context import ComplianceContext
+    from src.recommendations.solver import InfeasibleError, solve_breach_cure
+
+    candidates = []
+    if candidates_file:
+        with open(candidates_file) as f:
+            candidates = json_mod.load(f)
+    frozen = {t.strip() for t in freeze.split(",") if t.strip()} if freeze else set()
+
+    pv = cached_valuation()
+    ctx = ComplianceContext.load()
+    try:
+        solution = solve_breach_cure(pv, ctx=ctx, candidates=candidates, frozen=frozen,
+                                     targets=targets, buffer_pct=buffer_pct)
+    except InfeasibleError as exc:
+        raise click.ClickException(str(exc))
+
+    if not solution.trades:
+        click.echo("No trades needed: every linear rule is already within its limits.")
+        return
+
+    click.echo(f"\n{len(solution.trades)} trades, turnover AUD {solution.turnover_aud:,.0f}\n")
+    for t in solution.trades:
+        click.echo(f"  {t['ticker']:<10s}  AUD {t['delta_aud']:>+14,.0f}  {t['note']}")
+    if solution.binding:
+        click.echo(f"\nBinding constraints: {', '.join(solution.binding)}")
+
+    post = run_checks(project_valuation(pv, solution.trades), ctx=ctx)
+    remaining = [r for r in post if r.status == "breach"]
+    if remaining:
+        click.echo(click.style("\nBreaches remaining after trades (non-linear rules):", fg="yellow"))
+        for r in remaining:
+            click.echo(click.style(f"  ✗ [{r.rule_id}] {r.rule_name}: {r.detail}", fg="red"))
+    else:
+        click.echo(click.style("\nNo breaches after trades.", fg="green"))
+
+    payload = json_mod.dumps(solution.trades, indent=2)
+    if out_path:
+        with open(out_path, "w") as f:
+            f.write(payload + "\n")
+        click.echo(f"\nTrades written to {out_path}")
+    else:
+        click.echo(f"\n{payload}")
+
+
+@recommend_group.command("drift")
+@click.option("--dry-run", is_flag=True, help="Show the actions without writing them.")
+def recommend_drift_cmd(dry_run):
+    """Buy/sell actions that bring drifted roles and positions back to their band edges.
+
+    Bands come from the parameters table. Proposals replace the previous
+    unresolved drift proposals in the actions queue.
+    """
+    from src.portfolio.cache import cached_valuation
+    from src.recommendations.drift import recommend_drift, store_actions
+
+    pv = cached_valuation()
+    actions = recommend_drift(pv)
+    if not actions:
+        click.echo("No drift: every role and position is within its band.")
+    type_color = {"buy": "green", "sell": "red", "rebalance": "yellow"}
+    for a in actions:
+        click.echo(click.style(f"  {a.action_type:<9s}  {a.description}", fg=type_color[a.action_type]))
+        click.echo(f"             {a.rationale}")
+
+    if dry_run:
+        click.echo("\nDry run: actions not stored.")
+    else:
+        stored = store_actions(actions)
+        click.echo(f"\n{stored} actions proposed in the actions queue.")
+
+
+def _propose_drift_actions() -> None:
+    """Refresh the drift proposals after an import."""
+    from src.portfolio.cache import cached_valuation
+    from src.recommendations.drift import recommend_drift, store_actions
+
+    stored = store_actions(recommend_drift(cached_valuation()))
+    if stored:
+        click.echo(f"  Drift: {stored} rebalancing actions proposed (see `towsand recommend drift --dry-run`).")
+
+
 @cli.group("config")
 def config_group():
     """Manage stored credentials and settings (~/.config/towsand/credentials)."""
@@ -978,6 +1693,7 @@ def ib_import_flex(token, query_id, save_xml):
     click.echo("Importing into database...")
     results = import_all(report)
     _print_import_results(results)
+    _propose_drift_actions()
 
 
 @ib_group.command("import-file")
@@ -994,6 +1710,7 @@ def ib_import_file(xml_path):
     click.echo("Importing into database...")
     results = import_all(report)
     _print_import_results(results)
+    _propose_drift_actions()
 
 
 @ib_group.command("topics")
@@ -1066,6 +1783,7 @@ def commsec_import(csv_path):
     click.echo(f"Import complete: {results['holdings']} holdings, "
                f"{results['instruments']} instruments, "
                f"{results['prices']} prices{skipped_msg}")
+    _propose_drift_actions()
 
 
 # ---------------------------------------------------------------------------
@@ -1119,8 +1837,8 @@ def cash_update(account_name, balance, currency):
         today = date.today().isoformat()
 
         old = conn.execute(
-            "SELECT balance, as_of_date FROM cash_balances "
-            "WHERE account_id = ? AND currency = ? ORDER BY as_of_date DESC LIMIT 1",
+            "SELECT balance, as_of_date FROM latest_cash_balances "
+            "WHERE account_id = ? AND currency = ?",
             (acct["id"], ccy),
         ).fetchone()
 
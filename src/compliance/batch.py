@@ -0,0 +1,262 @@
+"""Vectorised compliance screening across a batch of portfolios.
+
+run_checks() evaluates one PortfolioValuation at a time and builds a
+CheckResult per finding. For screening many alternatives — projected trade
+lists, stress scenarios, allocation sweeps — evaluate_batch() takes an
+N × lines matrix of AUD values over shared line metadata and computes every
+allocation rule as array operations, returning an N × rules status matrix.
+
+Rules mirror checks.py edge cases and read the same RuleLimits and
+instrument class sets. Rules that do not depend
+on the allocation are included only where they are cheap and static
+(6.1 convexity, 2.2 income shock, 9 review triggers); data freshness (D.*)
+is a property of the stored data, not of a candidate, and is not screened.
+Per-entity rules (3.1 per holding, 3.2 per issuer, 4.2 per driver, ...)
+collapse to their worst entity: the value reported is the largest share.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.compliance.checks import GOVT_BOND_TYPES, RuleLimits, cap_class
+from src.compliance.context import ComplianceContext
+from src.portfolio.valuation import HoldingValue
+
+PASS, WARNING, BREACH = 0, 1, 2
+STATUS_NAMES = ("pass", "warning", "breach")
+
+BATCH_RULE_IDS = (
+    "1.1-S", "1.1-C", "1.1-O", "2.1", "2.2",
+    "3.1-eq", "3.1-cr", "3.1-sp", "3.1-sp-agg", "3.2",
+    "4.1", "4.2", "5.1", "5.2", "6.1", "6.2",
+    "7.1", "7.2", "7.3", "8.1", "8.2", "9.1",
+)
+
+_REVIEW_TRIGGERS = ("income_shock_active", "inflation_shift_active",
+                    "currency_regime_active", "correlation_convergence_active")
+
+
+@dataclass
+class BatchCompliance:
+    """Status and measured value per (candidate, rule)."""
+    rule_ids: tuple[str, ...]
+    status: np.ndarray          # (N, rules) int8: PASS / WARNING / BREACH
+    values: np.ndarray          # (N, rules) measured value (NaN where not applicable)
+
+    def column(self, rule_id: str) -> int:
+        return self.rule_ids.index(rule_id)
+
+    def breach_count(self) -> np.ndarray:
+        """Number of breached rules per candidate."""
+        return (self.status == BREACH).sum(axis=1)
+
+    def warning_count(self) -> np.ndarray:
+        return (self.status == WARNING).sum(axis=1)
+
+    def compliant(self) -> np.ndarray:
+        """Boolean mask of candidates with no breach."""
+        return ~(self.status == BREACH).any(axis=1)
+
+    def statuses(self, i: int) -> dict[str, str]:
+        """Rule id → status name for candidate i."""
+        return {rid: STATUS_NAMES[s] for rid, s in zip(self.rule_ids, self.status[i].tolist())}
+
+
+def _indicator(labels: list) -> tuple[list, np.ndarray]:
+    """Line × group 0/1 matrix; groups in first-seen order, None labels excluded."""
+    groups = list(dict.fromkeys(x for x in labels if x is not None))
+    index = {g: j for j, g in enumerate(groups)}
+    matrix = np.zeros((len(labels), len(groups)))
+    for i, x in enumerate(labels):
+        if x is not None:
+            matrix[i, index[x]] = 1.0
+    return groups, matrix
+
+
+def _mask(flags) -> np.ndarray:
+    return np.fromiter(flags, dtype=bool)
+
+
+def _pct(part: np.ndarray, whole: np.ndarray) -> np.ndarray:
+    """100 * part / whole, 0 where whole <= 0 (broadcasts part over columns)."""
+    whole = whole if part.ndim == 1 else whole[:, None]
+    return np.divide(part * 100, whole, out=np.zeros(np.broadcast(part, whole).shape),
+                     where=whole > 0)
+
+
+def _max_pct(values: np.ndarray, mask: np.ndarray, whole: np.ndarray) -> np.ndarray:
+    """Largest single-line share (%) among masked lines, 0 if none."""
+    if not mask.any():
+        return np.zeros(len(values))
+    return _pct(values[:, mask], whole).max(axis=1)
+
+
+def _max_group_pct(values: np.ndarray, labels: list, whole: np.ndarray,
+                   exclude: tuple = ()) -> np.ndarray:
+    """Largest group share (%) with groups given per line (None = ungrouped)."""
+    groups, matrix = _indicator([None if x in exclude else x for x in labels])
+    if not groups:
+        return np.zeros(len(values))
+    return _pct(values @ matrix, whole).max(axis=1)
+
+
+def evaluate_batch(
+    lines: list[HoldingValue],
+    values: np.ndarray,
+    investable_cash: np.ndarray,
+    ctx: ComplianceContext,
+) -> BatchCompliance:
+    """Screen N portfolios that share line metadata against the rulebook.
+
+    Args:
+        lines: Holding metadata per column of values (ticker, role, classes, ...).
+        values: (N, lines) AUD values; 0 means the line is not held.
+        investable_cash: (N,) investable cash per candidate (counts as stabiliser).
+        ctx: Compliance context for parameters and instrument flags.
+    """
+    values = np.asarray(values, dtype=float)
+    cash = np.asarray(investable_cash, dtype=float)
+    n = len(values)
+    flags = [ctx.flags(h.ticker) for h in lines]
+    roles = [h.capital_role for h in lines]
+    held = values > 0
+
+    total = values.sum(axis=1) + cash
+    status = np.zeros((n, len(BATCH_RULE_IDS)), dtype=np.int8)
+    measured = np.full((n, len(BATCH_RULE_IDS)), np.nan)
+
+    def put(rule_id: str, rule_status: np.ndarray, value: np.ndarray | None = None) -> None:
+        j = BATCH_RULE_IDS.index(rule_id)
+        status[:, j] = rule_status
+        if value is not None:
+            measured[:, j] = value
+
+    def where(cond, a, b):
+        return np.where(cond, a, b).astype(np.int8)
+
+    # ── 1.1 / 2.1 / 8.1: role bands and the 24-month floor ─────────────
+    is_stab = _mask(r == "stabiliser" for r in roles)
+    is_comp = _mask(r == "compounder" for r in roles)
+    is_opt = _mask(r == "optionality" for r in roles)
+    stabiliser = values[:, is_stab].sum(axis=1) + cash
+    compounder = values[:, is_comp].sum(axis=1)
+    optionality = values[:, is_opt].sum(axis=1)
+    s_pct, c_pct, o_pct = _pct(stabiliser, total), _pct(compounder, total), _pct(optionality, total)
+
+    lim = RuleLimits.from_context(ctx)
+    monthly = ctx.param_float("monthly_expenses", 9000)
+    floor = lim.stabiliser_floor(ctx)
+    s_low, s_high = lim.stabiliser_band
+    c_low, c_high = lim.compounder_band
+    o_low, o_high = lim.optionality_band
+    floor_binds = floor > total * s_high / 100
+    # As in check_capital_roles: an empty portfolio breaches 1.1, an unclassified
+    # one only warns, and neither is checked against the bands or the floor.
+    empty = total <= 0
+    banded = ~empty & (stabiliser + compounder + optionality > 0)
+    not_banded = where(empty, BREACH, WARNING)
+
+    put("1.1-S", where(banded, where(
+        s_pct < s_low, BREACH, where((s_pct > s_high) & ~floor_binds, WARNING, PASS)), not_banded), s_pct)
+    put("1.1-C", where(banded, where(
+        c_pct < c_low, BREACH, where(c_pct > c_high, WARNING, PASS)), not_banded), c_pct)
+    put("1.1-O", where(banded, where(
+        o_pct > o_high, BREACH, where(o_pct < o_low, WARNING, PASS)), not_banded), o_pct)
+    months = stabiliser / monthly if monthly > 0 else np.zeros(n)
+    put("2.1", where(banded & (stabiliser < floor), BREACH, PASS), months)
+    put("8.1", where(~empty & (stabiliser < floor), BREACH, PASS), stabiliser)
+
+    # ── 2.2 / 9: parameter-driven ──────────────────────────────────────
+    if ctx.param("income_shock_active", "false").lower() == "true":
+        put("2.2", where(o_pct > lim.shock_optionality_max, BREACH, PASS), o_pct)
+    active = any(ctx.param(k, "false").lower() == "true" for k in _REVIEW_TRIGGERS)
+    put("9.1", np.full(n, WARNING if active else PASS, dtype=np.int8))
+
+    # ── 3.1 / 3.2: position size ───────────────────────────────────────
+    caps = [cap_class(h) for h in lines]
+    is_credit = _mask(c == "credit" for c in caps)
+    is_equity = _mask(c == "equity" for c in caps)
+    is_spec = _mask(f.is_speculative for f in flags)
+
+    credit_max = _max_pct(values, is_credit, total)
+    equity_max = _max_pct(values, is_equity, total)
+    spec_max = _max_pct(values, is_spec, total)
+    spec_total = _pct(values[:, is_spec].sum(axis=1), total)
+    issuer_max = _max_group_pct(values, [h.corporate_group or None for h in lines], total)
+    put("3.1-cr", where(credit_max > lim.credit_cap, BREACH, PASS), credit_max)
+    put("3.1-eq", where(equity_max > lim.equity_cap, BREACH, PASS), equity_max)
+    put("3.1-sp", where(spec_max > lim.speculative_cap, BREACH, PASS), spec_max)
+    put("3.1-sp-agg", where(spec_total > lim.speculative_aggregate_cap, BREACH, PASS), spec_total)
+    put("3.2", where(issuer_max > lim.issuer_cap, BREACH, PASS), issuer_max)
+
+    # ── 4.1 / 4.2: macro exposure ──────────────────────────────────────
+    is_au_risk = _mask(h.country == "AU" and h.instrument_type not in GOVT_BOND_TYPES for h in lines)
+    au_pct = _pct(values[:, is_au_risk].sum(axis=1), total)
+    put("4.1", where(au_pct > lim.au_risk_max, BREACH, PASS), au_pct)
+    driver_names = sorted({d for h in lines for d in h.drivers} - {"untagged", "none"})
+    if driver_names:
+        driver_index = {d: j for j, d in enumerate(driver_names)}
+        driver_matrix = np.zeros((len(lines), len(driver_names)))
+        for i, h in enumerate(lines):
+            for d in h.drivers:
+                if d in driver_index:
+                    driver_matrix[i, driver_index[d]] = 1.0
+        driver_max = _pct(values @ driver_matrix, total).max(axis=1)
+    else:
+        driver_max = np.zeros(n)
+    put("4.2", where(driver_max > lim.driver_cap, BREACH, PASS), driver_max)
+
+    # ── 5.1 / 5.2: currency of growth capital ──────────────────────────
+    is_growth = is_comp | is_opt
+    is_aud = _mask((h.economic_currency or h.currency) == "AUD" for h in lines)
+    is_hedged = _mask(f.hedged == 1 for f in flags)
+    growth = values[:, is_growth].sum(axis=1)
+    aud_pct = _pct(values[:, is_growth & is_aud].sum(axis=1), growth)
+    aud_low, aud_high = lim.aud_growth_band
+    put("5.1", where(growth <= 0, WARNING, where(
+        aud_pct < aud_low, BREACH, where(aud_pct > aud_high, WARNING, PASS))), aud_pct)
+    intl = values[:, is_growth & ~is_aud].sum(axis=1)
+    unhedged_pct = _pct(values[:, is_growth & ~is_aud & ~is_hedged].sum(axis=1), intl)
+    put("5.2", where((intl > 0) & (unhedged_pct < lim.unhedged_min), BREACH, PASS), unhedged_pct)
+
+    # ── 6.1 / 6.2: optionality ─────────────────────────────────────────
+    convexity = np.array([
+        sum(1 for a in (f.convexity_defined_downside, f.convexity_nonlinear_upside,
+                        f.convexity_stress_outperform) if a == 1)
+        for f in flags
+    ], dtype=float).reshape(len(lines))
+    unclassified = _mask(not f.classified for f in flags)
+    opt_held = held & is_opt
+    fails = (opt_held & ~unclassified & (convexity < lim.convexity_min)).any(axis=1)
+    untagged = (opt_held & unclassified).any(axis=1)
+    put("6.1", where(fails, BREACH, where(untagged, WARNING, PASS)))
+    is_yield = _mask(f.yield_dominant == 1 for f in flags)
+    yield_pct = _pct(values[:, is_opt & is_yield].sum(axis=1), optionality)
+    put("6.2", where(yield_pct > lim.yield_max, BREACH, PASS), yield_pct)
+
+    # ── 7.x: stabiliser constraints ────────────────────────────────────
+    stab_total = stabiliser
+    is_liquid = _mask(f.liquidity_days is None or f.liquidity_days <= lim.liquidity_days for f in flags)
+    liquid_pct = _pct(values[:, is_stab & is_liquid].sum(axis=1) + cash, stab_total)
+    no_stab = stab_total <= 0
+    put("7.1", where(no_stab, WARNING, where(liquid_pct < lim.liquid_min, BREACH, PASS)), liquid_pct)
+    buckets = [f"{f.duration_years:.0f}y" if stab and f.duration_years is not None else None
+               for f, stab in zip(flags, is_stab)]
+    duration_max = _max_group_pct(values, buckets, stab_total)
+    put("7.2", where(~no_stab & (duration_max > lim.duration_max), BREACH, PASS), duration_max)
+    is_linked = _mask(f.is_inflation_linked == 1 for f in flags)
+    infl_pct = _pct(values[:, is_stab & is_linked].sum(axis=1), stab_total)
+    put("7.3", where(~no_stab & (infl_pct < lim.inflation_min), WARNING, PASS), infl_pct)
+
+    # ── 8.2: stress correlation groups ─────────────────────────────────
+    corr_max = _max_group_pct(values, [f.stress_correlation_group or None for f in flags], total)
+    put("8.2", where(corr_max > lim.correlation_group_max, WARNING, PASS), corr_max)
+
+    return BatchCompliance(rule_ids=BATCH_RULE_IDS, status=status, values=measured)
+
+
+def evaluate_projection(bp, ctx: ComplianceContext | None = None, db_path=None) -> BatchCompliance:
+    """Screen every candidate of a BatchProjection (see src.portfolio.batch)."""
+    ctx = ctx or ComplianceContext.load(db_path)
+    return evaluate_batch(bp.lines, bp.values_matrix(), bp.investable_cash_aud(), ctx)
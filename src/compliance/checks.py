@@ -1,17 +1,31 @@
 """Compliance engine — implements all portfolio management rules.
 
 Each check function takes a PortfolioValuation and returns a list of CheckResult.
-Status: pass / warning / breach.
+Status: pass / warning / breach. Database inputs (parameters, instrument flags)
+come from a ComplianceContext; run_checks() loads it once and shares it, and
+each check loads its own if called without one.
+
+Checks are registered in RULES (via @register_rule) with the rule ids they
+emit, the inputs they read and a relative cost. run_checks() can run a
+subset selected by rule-id pattern ("3.*", "5.1") and run the selected
+checks concurrently — they only read the valuation and the context. The
+declared inputs let IncrementalChecker (src.compliance.incremental) reuse
+results whose inputs have not changed since the previous run.
 
 Rules reference: current-finances/portfolio-management-rules.md
 """
 
 import json
 import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date
+from fnmatch import fnmatch
 
+from src.compliance.context import ComplianceContext
 from src.db.connection import get_connection
+from src.portfolio.fx import FxRateBook
 from src.portfolio.valuation import PortfolioValuation, HoldingValue
 
 logger = logging.getLogger(__name__)
@@ -28,18 +42,235 @@ class CheckResult:
     threshold: float | None = None   # rule threshold
 
 
-def _get_param(conn, key: str, default: str = "") -> str:
-    row = conn.execute("SELECT value FROM parameters WHERE key = ?", (key,)).fetchone()
-    return row["value"] if row else default
+# Input kinds a rule may declare (what invalidates its result when it changes):
+#   positions        which instruments are held, with their static metadata
+#   values           holding AUD values (move with every price or FX update)
+#   cash             cash balances
+#   price_dates      holding price dates
+#   fx               the FX rate book (rates and their dates)
+#   parameters       system parameters
+#   classifications  per-instrument flags (speculative, hedged, convexity, ...)
+#   calendar         today's date (for staleness tests)
+INPUTS = frozenset({"positions", "values", "cash", "price_dates", "fx",
+                    "parameters", "classifications", "calendar"})
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A registered compliance check."""
+    name: str
+    rule_ids: tuple[str, ...]     # ids of the CheckResults it can emit
+    inputs: frozenset[str]        # subset of INPUTS the check reads
+    cost: int                     # relative cost; costlier checks are scheduled first
+    check: Callable[..., list[CheckResult]]
+    depends: Callable[[ComplianceContext], set[str]] | None = None   # narrows inputs per run
+
+    def inputs_for(self, ctx: ComplianceContext) -> frozenset[str]:
+        """Inputs a run with this context depends on (declared inputs unless narrowed)."""
+        if self.depends is None:
+            return self.inputs
+        return self.inputs & frozenset(self.depends(ctx))
+
+    def matches(self, patterns: list[str]) -> bool:
+        """True if any of the rule's ids (or its name) matches any pattern."""
+        return any(fnmatch(rule_id, p) for rule_id in (self.name, *self.rule_ids) for p in patterns)
+
+
+RULES: list[Rule] = []   # registry order is report order
+
+
+def register_rule(name: str, rule_ids: tuple[str, ...], inputs: set[str], cost: int = 1,
+                  depends: Callable[[ComplianceContext], set[str]] | None = None):
+    """Decorator adding a check function to RULES.
+
+    depends, if given, maps the context to the subset of inputs a run
+    actually reads — e.g. a rule gated on a parameter only depends on the
+    parameters while the gate is off.
+    """
+    unknown = set(inputs) - INPUTS
+    if unknown:
+        raise ValueError(f"Unknown rule inputs for {name}: {sorted(unknown)}")
+
+    def decorator(check):
+        RULES.append(Rule(name, rule_ids, frozenset(inputs), cost, check, depends))
+        return check
+    return decorator
+
+
+# ─── Shared Limits ─────────────────────────────────────────────────────────
+# Batch screening, the drift recommender, the breach-cure solver and the
+# sensitivity report import these rather than keep their own copies.
+
+EQUITY_CLASSES = frozenset({"equity", "infrastructure"})
+EQUITY_TYPES = frozenset({"equity", "etf", "listed_fund"})
+CREDIT_CLASSES = frozenset({"credit"})
+GOVT_BOND_TYPES = frozenset({"govt_bond_nominal", "govt_bond_indexed"})
+
+
+def cap_class(h: HoldingValue) -> str | None:
+    """Which single-security cap (Rule 3.1) a holding falls under: 'credit', 'equity' or None.
+
+    asset_class determines the cap (not instrument_type/wrapper): credit in an
+    ETF wrapper is still credit for sizing purposes.
+    """
+    ac = h.asset_class or h.instrument_type  # fallback for unclassified
+    if ac in CREDIT_CLASSES:
+        return "credit"
+    if ac in EQUITY_CLASSES or h.instrument_type in EQUITY_TYPES:
+        return "equity"
+    return None
+
+
+@dataclass(frozen=True)
+class RuleLimits:
+    """Rule thresholds in percent of each rule's base.
+
+    Limits with a system parameter (stored as a fraction) are read from it;
+    the defaults are the seeded values.
+    """
+    stabiliser_months: float = 24.0                         # 2.1, 8.1
+    stabiliser_band: tuple[float, float] = (15.0, 25.0)     # 1.1, % of total
+    compounder_band: tuple[float, float] = (50.0, 65.0)
+    optionality_band: tuple[float, float] = (10.0, 20.0)
+    shock_optionality_max: float = 10.0                     # 2.2
+    equity_cap: float = 10.0                                # 3.1
+    credit_cap: float = 7.0
+    speculative_cap: float = 1.0
+    speculative_aggregate_cap: float = 3.0
+    issuer_cap: float = 20.0                                # 3.2
+    au_risk_max: float = 55.0                               # 4.1
+    driver_cap: float = 30.0                                # 4.2
+    aud_growth_band: tuple[float, float] = (50.0, 70.0)     # 5.1, % of growth capital
+    unhedged_min: float = 40.0                              # 5.2, % of international growth
+    convexity_min: int = 2                                  # 6.1, of 3 payoff attributes
+    yield_max: float = 25.0                                 # 6.2, % of optionality
+    liquidity_days: int = 5                                 # 7.1
+    liquid_min: float = 70.0                                # 7.1, % of stabiliser
+    duration_max: float = 40.0                              # 7.2
+    inflation_min: float = 25.0                             # 7.3
+    drawdown: float = 35.0                                  # 8.1, equity drawdown scenario
+    correlation_group_max: float = 20.0                     # 8.2, % of total
+
+    @classmethod
+    def from_context(cls, ctx: ComplianceContext) -> "RuleLimits":
+        def pct(key: str, default: float) -> float:
+            return round(ctx.param_float(key, default / 100) * 100, 9)
+
+        def band(role: str, default: tuple[float, float]) -> tuple[float, float]:
+            return (pct(f"{role}_band_low", default[0]), pct(f"{role}_band_high", default[1]))
+
+        d = cls()
+        return cls(
+            stabiliser_months=ctx.param_float("stabiliser_months", d.stabiliser_months),
+            stabiliser_band=band("stabiliser", d.stabiliser_band),
+            compounder_band=band("compounder", d.compounder_band),
+            optionality_band=band("optionality", d.optionality_band),
+            equity_cap=pct("max_single_equity_pct", d.equity_cap),
+            credit_cap=pct("max_single_credit_pct", d.credit_cap),
+            speculative_cap=pct("max_speculative_single_pct", d.speculative_cap),
+            speculative_aggregate_cap=pct("max_speculative_aggregate_pct", d.speculative_aggregate_cap),
+            issuer_cap=pct("max_issuer_concentration_pct", d.issuer_cap),
+            au_risk_max=pct("max_aud_risk_assets_pct", d.au_risk_max),
+            driver_cap=pct("max_single_macro_driver_pct", d.driver_cap),
+            aud_growth_band=band("aud_currency", d.aud_growth_band),
+            unhedged_min=pct("min_unhedged_international_pct", d.unhedged_min),
+            liquid_min=pct("min_stabiliser_liquid_pct", d.liquid_min),
+            duration_max=pct("max_stabiliser_single_duration_pct", d.duration_max),
+            inflation_min=pct("min_stabiliser_inflation_linked_pct", d.inflation_min),
+            drawdown=pct("drawdown_tolerance_pct", d.drawdown),
+        )
+
+    def band(self, role: str) -> tuple[float, float]:
+        """(low, high) percent of total for a capital role (Rule 1.1)."""
+        return getattr(self, f"{role}_band")
+
+    def cap(self, kind: str) -> float:
+        """Single-security cap (Rule 3.1) for a cap_class() result."""
+        return self.credit_cap if kind == "credit" else self.equity_cap
+
+    def stabiliser_floor(self, ctx: ComplianceContext) -> float:
+        """AUD the stabiliser must hold: stabiliser_months of monthly expenses (Rule 2.1)."""
+        return self.stabiliser_months * ctx.param_float("monthly_expenses", 9000)
 
 
-def _get_param_float(conn, key: str, default: float = 0.0) -> float:
-    return float(_get_param(conn, key, str(default)))
+# ─── Data Freshness ─────────────────────────────────────────────────────────
+
+@register_rule("data_freshness", ("D.1", "D.2"), {"positions", "price_dates", "fx", "calendar"})
+def check_data_freshness(pv: PortfolioValuation, db_path=None,
+                         ctx: ComplianceContext | None = None) -> list[CheckResult]:
+    """Check that prices and FX rates are recent enough for reliable compliance."""
+    results = []
+    today = date.today()
+
+    stale_prices = []
+    for h in pv.holdings:
+        if not h.price_date:
+            stale_prices.append(f"{h.ticker} (no price)")
+            continue
+        try:
+            price_date = date.fromisoformat(h.price_date)
+            age_days = (today - price_date).days
+            if age_days > 7:
+                stale_prices.append(f"{h.ticker} ({age_days}d old)")
+        except ValueError:
+            stale_prices.append(f"{h.ticker} (bad date: {h.price_date})")
+
+    if stale_prices:
+        results.append(CheckResult(
+            "D.1", "Price Freshness", "warning",
+            f"Stale prices (>7 days): {', '.join(stale_prices)}. "
+            "Run `towsand prices update` before relying on compliance results.",
+        ))
+
+    # Check FX freshness for non-AUD currencies held
+    fx_book = pv.fx_book
+    if fx_book is None:
+        with get_connection(db_path) as conn:
+            fx_book = FxRateBook.load(conn)
+
+    non_aud = {h.currency for h in pv.holdings if h.currency != "AUD"}
+
+    stale_fx = []
+    for ccy in sorted(non_aud):
+        fx_date = fx_book.rate_date(ccy, "AUD")
+        if fx_date is None:
+            stale_fx.append(f"{ccy}/AUD (no rate)")
+        else:
+            try:
+                age_days = (today - date.fromisoformat(fx_date)).days
+                if age_days > 7:
+                    stale_fx.append(f"{ccy}/AUD ({age_days}d old)")
+            except ValueError:
+                stale_fx.append(f"{ccy}/AUD (bad date)")
+
+    if stale_fx:
+        results.append(CheckResult(
+            "D.2", "FX Rate Freshness", "warning",
+            f"Stale FX rates (>7 days): {', '.join(stale_fx)}. "
+            "Run `towsand fx update` before relying on compliance results.",
+        ))
+
+    if not results:
+        results.append(CheckResult(
+            "D.1", "Data Freshness", "pass",
+            "All prices and FX rates are current (≤7 days old).",
+        ))
+
+    return results
 
 
 # ─── Rule 1.1 & 2.1: Capital Role Allocation ───────────────────────────────
 
-def check_capital_roles(pv: PortfolioValuation, db_path=None) -> list[CheckResult]:
+def _nearest_edge(value: float, band: tuple[float, float]) -> float:
+    """The band edge closest to value: the threshold a band result is stored against."""
+    low, high = band
+    return low if abs(value - low) <= abs(value - high) else high
+
+
+@register_rule("capital_roles", ("1.1", "1.1a", "1.1-S", "1.1-C", "1.1-O", "2.1"),
+               {"positions", "values", "cash", "parameters"})
+def check_capital_roles(pv: PortfolioValuation, db_path=None,
+                        ctx: ComplianceContext | None = None) -> list[CheckResult]:
     """Rules 1.1 and 2.1: capital role band checks + income substitution."""
     results = []
     total = pv.total_aud
@@ -79,28 +310,29 @@ def check_capital_roles(pv: PortfolioValuation, db_path=None) -> list[CheckResul
     o_pct = optionality / total * 100
 
     # Rule 2.1: Income Substitution — stabiliser must cover ≥24 months of expenses
-    with get_connection(db_path) as conn:
-        monthly_expenses = _get_param_float(conn, "monthly_expenses", 9000)
-    min_stabiliser_abs = 24 * monthly_expenses
+    ctx = ctx or ComplianceContext.load(db_path)
+    lim = RuleLimits.from_context(ctx)
+    monthly_expenses = ctx.param_float("monthly_expenses", 9000)
+    months = lim.stabiliser_months
+    min_stabiliser_abs = lim.stabiliser_floor(ctx)
 
     # Rule 1.1 + 2.1: stabiliser = max(24 months, 15-25% band)
-    min_stabiliser_pct = 15.0
-    max_stabiliser_pct = 25.0
+    min_stabiliser_pct, max_stabiliser_pct = lim.stabiliser_band
 
     if stabiliser < min_stabiliser_abs:
         months_covered = stabiliser / monthly_expenses if monthly_expenses > 0 else 0
         results.append(CheckResult(
             "2.1", "Income Substitution", "breach",
             f"Stabiliser AUD {stabiliser:,.0f} covers only {months_covered:.1f} months. "
-            f"Need ≥24 months = AUD {min_stabiliser_abs:,.0f}.",
-            value=months_covered, threshold=24,
+            f"Need ≥{months:g} months = AUD {min_stabiliser_abs:,.0f}.",
+            value=months_covered, threshold=months,
         ))
     else:
         months_covered = stabiliser / monthly_expenses if monthly_expenses > 0 else 0
         results.append(CheckResult(
             "2.1", "Income Substitution", "pass",
-            f"Stabiliser covers {months_covered:.1f} months of expenses (≥24 required).",
-            value=months_covered, threshold=24,
+            f"Stabiliser covers {months_covered:.1f} months of expenses (≥{months:g} required).",
+            value=months_covered, threshold=months,
         ))
 
     # Rule 1.1: Stabiliser band 15-25% (conditional on Rule 2.1)
@@ -111,7 +343,7 @@ def check_capital_roles(pv: PortfolioValuation, db_path=None) -> list[CheckResul
     if s_pct < min_stabiliser_pct:
         results.append(CheckResult(
             "1.1-S", "Stabiliser Band", "breach",
-            f"Stabiliser at {s_pct:.1f}% (min 15%). AUD {stabiliser:,.0f} of {total:,.0f}.",
+            f"Stabiliser at {s_pct:.1f}% (min {min_stabiliser_pct:g}%). AUD {stabiliser:,.0f} of {total:,.0f}.",
             value=s_pct, threshold=min_stabiliser_pct,
         ))
     elif s_pct > max_stabiliser_pct:
@@ -119,7 +351,8 @@ def check_capital_roles(pv: PortfolioValuation, db_path=None) -> list[CheckResul
             # Absolute floor (Rule 2.1) forces stabiliser above 25% — this is expected
             results.append(CheckResult(
                 "1.1-S", "Stabiliser Band", "pass",
-                f"Stabiliser at {s_pct:.1f}% (above 25% band, but 24-month expense floor "
+                f"Stabiliser at {s_pct:.1f}% (above {max_stabiliser_pct:g}% band, but "
+                f"{months:g}-month expense floor "
                 f"of AUD {min_stabiliser_abs:,.0f} binds — Rule 2.1 takes priority).",
                 value=s_pct, threshold=max_stabiliser_pct,
             ))
@@ -130,7 +363,8 @@ def check_capital_roles(pv: PortfolioValuation, db_path=None) -> list[CheckResul
             excess = stabiliser - total * max_stabiliser_pct / 100
             results.append(CheckResult(
                 "1.1-S", "Stabiliser Band", "warning",
-                f"Stabiliser at {s_pct:.1f}% (target 15-25%){cash_note}. "
+                f"Stabiliser at {s_pct:.1f}% (target {min_stabiliser_pct:g}-{max_stabiliser_pct:g}%)"
+                f"{cash_note}. "
                 f"Over-allocated by AUD {excess:,.0f} — "
                 "consider deploying into compounders/optionality.",
                 value=s_pct, threshold=max_stabiliser_pct,
@@ -138,48 +372,50 @@ def check_capital_roles(pv: PortfolioValuation, db_path=None) -> list[CheckResul
     else:
         results.append(CheckResult(
             "1.1-S", "Stabiliser Band", "pass",
-            f"Stabiliser at {s_pct:.1f}% (target 15-25%).",
-            value=s_pct,
+            f"Stabiliser at {s_pct:.1f}% (target {min_stabiliser_pct:g}-{max_stabiliser_pct:g}%).",
+            value=s_pct, threshold=_nearest_edge(s_pct, lim.stabiliser_band),
         ))
 
     # Rule 1.1: Compounder band 50-65%
-    if c_pct < 50:
+    c_low, c_high = lim.compounder_band
+    if c_pct < c_low:
         results.append(CheckResult(
             "1.1-C", "Compounder Band", "breach",
-            f"Compounder at {c_pct:.1f}% (min 50%). AUD {compounder:,.0f}.",
-            value=c_pct, threshold=50,
+            f"Compounder at {c_pct:.1f}% (min {c_low:g}%). AUD {compounder:,.0f}.",
+            value=c_pct, threshold=c_low,
         ))
-    elif c_pct > 65:
+    elif c_pct > c_high:
         results.append(CheckResult(
             "1.1-C", "Compounder Band", "warning",
-            f"Compounder at {c_pct:.1f}% (target 50-65%). AUD {compounder:,.0f}.",
-            value=c_pct, threshold=65,
+            f"Compounder at {c_pct:.1f}% (target {c_low:g}-{c_high:g}%). AUD {compounder:,.0f}.",
+            value=c_pct, threshold=c_high,
         ))
     else:
         results.append(CheckResult(
             "1.1-C", "Compounder Band", "pass",
-            f"Compounder at {c_pct:.1f}% (target 50-65%).",
-            value=c_pct,
+            f"Compounder at {c_pct:.1f}% (target {c_low:g}-{c_high:g}%).",
+            value=c_pct, threshold=_nearest_edge(c_pct, lim.compounder_band),
         ))
 
     # Rule 1.1: Optionality band 10-20%
-    if o_pct < 10:
+    o_low, o_high = lim.optionality_band
+    if o_pct < o_low:
         results.append(CheckResult(
             "1.1-O", "Optionality Band", "warning",
-            f"Optionality at {o_pct:.1f}% (target 10-20%). AUD {optionality:,.0f}.",
-            value=o_pct, threshold=10,
+            f"Optionality at {o_pct:.1f}% (target {o_low:g}-{o_high:g}%). AUD {optionality:,.0f}.",
+            value=o_pct, threshold=o_low,
         ))
-    elif o_pct > 20:
+    elif o_pct > o_high:
         results.append(CheckResult(
             "1.1-O", "Optionality Band", "breach",
-            f"Optionality at {o_pct:.1f}% (max 20%). AUD {optionality:,.0f}.",
-            value=o_pct, threshold=20,
+            f"Optionality at {o_pct:.1f}% (max {o_high:g}%). AUD {optionality:,.0f}.",
+            value=o_pct, threshold=o_high,
         ))
     else:
         results.append(CheckResult(
             "1.1-O", "Optionality Band", "pass",
-            f"Optionality at {o_pct:.1f}% (target 10-20%).",
-            value=o_pct,
+            f"Optionality at {o_pct:.1f}% (target {o_low:g}-{o_high:g}%).",
+            value=o_pct, threshold=_nearest_edge(o_pct, lim.optionality_band),
         ))
 
     return results
@@ -187,12 +423,21 @@ def check_capital_roles(pv: PortfolioValuation, db_path=None) -> list[CheckResul
 
 # ─── Rule 2.2: Income Shock Trigger ────────────────────────────────────────
 
-def check_income_shock(pv: PortfolioValuation, db_path=None) -> list[CheckResult]:
+def _income_shock_inputs(ctx: ComplianceContext) -> set[str]:
+    if ctx.param("income_shock_active", "false").lower() != "true":
+        return {"parameters"}
+    return {"positions", "values", "cash", "parameters"}
+
+
+@register_rule("income_shock", ("2.2",), {"positions", "values", "cash", "parameters"},
+               depends=_income_shock_inputs)
+def check_income_shock(pv: PortfolioValuation, db_path=None,
+                       ctx: ComplianceContext | None = None) -> list[CheckResult]:
     """Rule 2.2: if income shock is active, check emergency constraints."""
     results = []
 
-    with get_connection(db_path) as conn:
-        shock_active = _get_param(conn, "income_shock_active", "false")
+    ctx = ctx or ComplianceContext.load(db_path)
+    shock_active = ctx.param("income_shock_active", "false")
 
     if shock_active.lower() != "true":
         results.append(CheckResult(
@@ -207,17 +452,18 @@ def check_income_shock(pv: PortfolioValuation, db_path=None) -> list[CheckResult
     o_pct = (optionality / total * 100) if total > 0 else 0
 
     # Under shock: optionality capped at 10%
-    if o_pct > 10:
+    cap = RuleLimits.from_context(ctx).shock_optionality_max
+    if o_pct > cap:
         results.append(CheckResult(
             "2.2", "Income Shock — Optionality Cap", "breach",
-            f"INCOME SHOCK ACTIVE. Optionality at {o_pct:.1f}% (max 10% during shock).",
-            value=o_pct, threshold=10,
+            f"INCOME SHOCK ACTIVE. Optionality at {o_pct:.1f}% (max {cap:g}% during shock).",
+            value=o_pct, threshold=cap,
         ))
     else:
         results.append(CheckResult(
             "2.2", "Income Shock — Optionality Cap", "pass",
-            f"Income shock active. Optionality at {o_pct:.1f}% (≤10% OK).",
-            value=o_pct, threshold=10,
+            f"Income shock active. Optionality at {o_pct:.1f}% (≤{cap:g}% OK).",
+            value=o_pct, threshold=cap,
         ))
 
     return results
@@ -225,7 +471,10 @@ def check_income_shock(pv: PortfolioValuation, db_path=None) -> list[CheckResult
 
 # ─── Rules 3.1, 3.2: Position Size ─────────────────────────────────────────
 
-def check_position_size(pv: PortfolioValuation) -> list[CheckResult]:
+@register_rule("position_size", ("3.1", "3.1-eq", "3.1-cr", "3.1-sp", "3.1-sp-agg", "3.2"),
+               {"positions", "values", "cash", "parameters", "classifications"}, cost=2)
+def check_position_size(pv: PortfolioValuation, db_path=None,
+                        ctx: ComplianceContext | None = None) -> list[CheckResult]:
     """Rules 3.1 and 3.2: single security caps and issuer concentration."""
     results = []
     total = pv.total_aud
@@ -233,55 +482,45 @@ def check_position_size(pv: PortfolioValuation) -> list[CheckResult]:
     if total <= 0:
         return results
 
+    ctx = ctx or ComplianceContext.load(db_path)
+    lim = RuleLimits.from_context(ctx)
+
     # Rule 3.1: Single equity ≤ 10%, single credit ≤ 7%, speculative ≤ 1%/3%
-    # asset_class determines which cap applies (not instrument_type/wrapper).
-    # Credit instruments in an ETF wrapper are still credit for sizing purposes.
-    equity_classes = {"equity", "infrastructure"}
-    credit_classes = {"credit"}
     speculative_total = 0
+    limits: list[tuple[float, float]] = []    # (value, cap) of every capped position or group
 
     for h in pv.holdings:
         pct = (h.value_aud / total * 100) if total > 0 else 0
         ac = h.asset_class or h.instrument_type  # fallback for unclassified
 
-        if ac in credit_classes:
-            if pct > 7:
-                results.append(CheckResult(
-                    "3.1-cr", f"Single Credit Cap: {h.ticker}", "breach",
-                    f"{h.ticker} ({ac}) at {pct:.1f}% (max 7%). AUD {h.value_aud:,.0f}.",
-                    value=pct, threshold=7,
-                ))
-        elif ac in equity_classes or h.instrument_type in {"equity", "etf", "listed_fund"}:
-            if pct > 10:
-                results.append(CheckResult(
-                    "3.1-eq", f"Single Equity Cap: {h.ticker}", "breach",
-                    f"{h.ticker} ({ac}) at {pct:.1f}% (max 10%). AUD {h.value_aud:,.0f}.",
-                    value=pct, threshold=10,
-                ))
-
-        # Check speculative flag from DB
-        with get_connection() as conn:
-            inst_row = conn.execute(
-                "SELECT is_speculative FROM instruments WHERE ticker = ?",
-                (h.ticker,),
-            ).fetchone()
-        is_spec = inst_row and inst_row["is_speculative"]
+        kind = cap_class(h)
+        if kind is not None:
+            limits.append((pct, lim.cap(kind)))
+        if kind is not None and pct > lim.cap(kind):
+            rule_id, label = ("3.1-cr", "Credit") if kind == "credit" else ("3.1-eq", "Equity")
+            results.append(CheckResult(
+                rule_id, f"Single {label} Cap: {h.ticker}", "breach",
+                f"{h.ticker} ({ac}) at {pct:.1f}% (max {lim.cap(kind):g}%). AUD {h.value_aud:,.0f}.",
+                value=pct, threshold=lim.cap(kind),
+            ))
 
-        if is_spec:
-            if pct > 1:
+        if ctx.flags(h.ticker).is_speculative:
+            limits.append((pct, lim.speculative_cap))
+            if pct > lim.speculative_cap:
                 results.append(CheckResult(
                     "3.1-sp", f"Speculative Cap: {h.ticker}", "breach",
-                    f"Speculative {h.ticker} at {pct:.1f}% (max 1%).",
-                    value=pct, threshold=1,
+                    f"Speculative {h.ticker} at {pct:.1f}% (max {lim.speculative_cap:g}%).",
+                    value=pct, threshold=lim.speculative_cap,
                 ))
             speculative_total += h.value_aud
 
     spec_pct = (speculative_total / total * 100) if total > 0 else 0
-    if spec_pct > 3:
+    limits.append((spec_pct, lim.speculative_aggregate_cap))
+    if spec_pct > lim.speculative_aggregate_cap:
         results.append(CheckResult(
             "3.1-sp-agg", "Speculative Aggregate", "breach",
-            f"Total speculative at {spec_pct:.1f}% (max 3%).",
-            value=spec_pct, threshold=3,
+            f"Total speculative at {spec_pct:.1f}% (max {lim.speculative_aggregate_cap:g}%).",
+            value=spec_pct, threshold=lim.speculative_aggregate_cap,
         ))
 
     # Rule 3.2: Issuer concentration ≤ 20% per corporate group
@@ -293,17 +532,21 @@ def check_position_size(pv: PortfolioValuation) -> list[CheckResult]:
 
     for grp, value in groups.items():
         pct = (value / total * 100) if total > 0 else 0
-        if pct > 20:
+        limits.append((pct, lim.issuer_cap))
+        if pct > lim.issuer_cap:
             results.append(CheckResult(
                 "3.2", f"Issuer Concentration: {grp}", "breach",
-                f"Corporate group '{grp}' at {pct:.1f}% (max 20%). AUD {value:,.0f}.",
-                value=pct, threshold=20,
+                f"Corporate group '{grp}' at {pct:.1f}% (max {lim.issuer_cap:g}%). AUD {value:,.0f}.",
+                value=pct, threshold=lim.issuer_cap,
             ))
 
     if not results:
+        # Stored against the position or group with the least headroom
+        value, cap = min(limits, key=lambda vc: vc[1] - vc[0])
         results.append(CheckResult(
             "3.1", "Position Size", "pass",
             "All positions within size limits.",
+            value=value, threshold=cap,
         ))
 
     return results
@@ -311,7 +554,10 @@ def check_position_size(pv: PortfolioValuation) -> list[CheckResult]:
 
 # ─── Rules 4.1, 4.2: Macro Factor Exposure ─────────────────────────────────
 
-def check_macro_exposure(pv: PortfolioValuation) -> list[CheckResult]:
+@register_rule("macro_exposure", ("4.1", "4.2"), {"positions", "values", "cash", "parameters"},
+               cost=2)
+def check_macro_exposure(pv: PortfolioValuation, db_path=None,
+                         ctx: ComplianceContext | None = None) -> list[CheckResult]:
     """Rules 4.1 and 4.2: Australia concentration and single macro driver caps."""
     results = []
     total = pv.total_aud
@@ -319,43 +565,49 @@ def check_macro_exposure(pv: PortfolioValuation) -> list[CheckResult]:
     if total <= 0:
         return results
 
+    ctx = ctx or ComplianceContext.load(db_path)
+    lim = RuleLimits.from_context(ctx)
+
     # Rule 4.1: AUD-domiciled risk assets ≤ 55% (excl AUD govt bonds)
     aud_risk = 0
     for h in pv.holdings:
-        if h.country == "AU" and h.instrument_type not in ("govt_bond_nominal", "govt_bond_indexed"):
+        if h.country == "AU" and h.instrument_type not in GOVT_BOND_TYPES:
             aud_risk += h.value_aud
 
     aud_risk_pct = (aud_risk / total * 100) if total > 0 else 0
-    if aud_risk_pct > 55:
+    if aud_risk_pct > lim.au_risk_max:
         results.append(CheckResult(
             "4.1", "Australia Concentration", "breach",
-            f"AUD risk assets at {aud_risk_pct:.1f}% (max 55%). AUD {aud_risk:,.0f}.",
-            value=aud_risk_pct, threshold=55,
+            f"AUD risk assets at {aud_risk_pct:.1f}% (max {lim.au_risk_max:g}%). AUD {aud_risk:,.0f}.",
+            value=aud_risk_pct, threshold=lim.au_risk_max,
         ))
     else:
         results.append(CheckResult(
             "4.1", "Australia Concentration", "pass",
-            f"AUD risk assets at {aud_risk_pct:.1f}% (max 55%).",
-            value=aud_risk_pct, threshold=55,
+            f"AUD risk assets at {aud_risk_pct:.1f}% (max {lim.au_risk_max:g}%).",
+            value=aud_risk_pct, threshold=lim.au_risk_max,
         ))
 
     # Rule 4.2: Single macro driver ≤ 30%
     macro = pv.by_macro_driver()
+    driver_max = 0.0
     for driver, value in macro.items():
         if driver in ("untagged", "none"):
             continue
         pct = (value / total * 100) if total > 0 else 0
-        if pct > 30:
+        driver_max = max(driver_max, pct)
+        if pct > lim.driver_cap:
             results.append(CheckResult(
                 "4.2", f"Macro Driver: {driver}", "breach",
-                f"Macro driver '{driver}' at {pct:.1f}% (max 30%). AUD {value:,.0f}.",
-                value=pct, threshold=30,
+                f"Macro driver '{driver}' at {pct:.1f}% (max {lim.driver_cap:g}%). AUD {value:,.0f}.",
+                value=pct, threshold=lim.driver_cap,
             ))
 
     if not any(r.rule_id == "4.2" for r in results):
         results.append(CheckResult(
             "4.2", "Macro Driver Exposure", "pass",
-            "No macro driver exceeds 30%.",
+            f"No macro driver exceeds {lim.driver_cap:g}%.",
+            value=driver_max, threshold=lim.driver_cap,
         ))
 
     return results
@@ -363,7 +615,10 @@ def check_macro_exposure(pv: PortfolioValuation) -> list[CheckResult]:
 
 # ─── Rules 5.1, 5.2: Currency Exposure ─────────────────────────────────────
 
-def check_currency_exposure(pv: PortfolioValuation) -> list[CheckResult]:
+@register_rule("currency_exposure", ("5.1", "5.2"),
+               {"positions", "values", "parameters", "classifications"}, cost=2)
+def check_currency_exposure(pv: PortfolioValuation, db_path=None,
+                            ctx: ComplianceContext | None = None) -> list[CheckResult]:
     """Rules 5.1 and 5.2: currency bands for growth capital, hedging rule."""
     results = []
 
@@ -385,67 +640,70 @@ def check_currency_exposure(pv: PortfolioValuation) -> list[CheckResult]:
         if (h.economic_currency or h.currency) == "AUD"
     )
     aud_pct = (aud_growth / growth_total * 100)
+    ctx = ctx or ComplianceContext.load(db_path)
+    lim = RuleLimits.from_context(ctx)
 
     # Rule 5.1: AUD 50-70%, non-AUD 30-50%
-    if aud_pct < 50:
+    low, high = lim.aud_growth_band
+    if aud_pct < low:
         results.append(CheckResult(
             "5.1", "AUD Growth Exposure", "breach",
-            f"AUD growth at {aud_pct:.1f}% (min 50%). AUD {aud_growth:,.0f} of {growth_total:,.0f}.",
-            value=aud_pct, threshold=50,
+            f"AUD growth at {aud_pct:.1f}% (min {low:g}%). AUD {aud_growth:,.0f} of {growth_total:,.0f}.",
+            value=aud_pct, threshold=low,
         ))
-    elif aud_pct > 70:
+    elif aud_pct > high:
         results.append(CheckResult(
             "5.1", "AUD Growth Exposure", "warning",
-            f"AUD growth at {aud_pct:.1f}% (target 50-70%).",
-            value=aud_pct, threshold=70,
+            f"AUD growth at {aud_pct:.1f}% (target {low:g}-{high:g}%).",
+            value=aud_pct, threshold=high,
         ))
     else:
         results.append(CheckResult(
             "5.1", "AUD Growth Exposure", "pass",
-            f"AUD growth at {aud_pct:.1f}% (target 50-70%).",
-            value=aud_pct,
+            f"AUD growth at {aud_pct:.1f}% (target {low:g}-{high:g}%).",
+            value=aud_pct, threshold=_nearest_edge(aud_pct, lim.aud_growth_band),
         ))
 
     # Rule 5.2: ≥40% of international growth assets unhedged
     intl_growth = [h for h in growth_holdings if (h.economic_currency or h.currency) != "AUD"]
     intl_total = sum(h.value_aud for h in intl_growth)
     if intl_total > 0:
-        unhedged = sum(h.value_aud for h in intl_growth if h.capital_role and not _is_hedged(h))
+        unhedged = sum(h.value_aud for h in intl_growth
+                       if h.capital_role and not _is_hedged(h, ctx))
         unhedged_pct = (unhedged / intl_total * 100) if intl_total > 0 else 0
 
-        if unhedged_pct < 40:
+        if unhedged_pct < lim.unhedged_min:
             results.append(CheckResult(
                 "5.2", "Hedging Rule", "breach",
-                f"Only {unhedged_pct:.1f}% of international growth is unhedged (min 40%).",
-                value=unhedged_pct, threshold=40,
+                f"Only {unhedged_pct:.1f}% of international growth is unhedged "
+                f"(min {lim.unhedged_min:g}%).",
+                value=unhedged_pct, threshold=lim.unhedged_min,
             ))
         else:
             results.append(CheckResult(
                 "5.2", "Hedging Rule", "pass",
-                f"{unhedged_pct:.1f}% of international growth is unhedged (≥40% required).",
-                value=unhedged_pct, threshold=40,
+                f"{unhedged_pct:.1f}% of international growth is unhedged "
+                f"(≥{lim.unhedged_min:g}% required).",
+                value=unhedged_pct, threshold=lim.unhedged_min,
             ))
 
     return results
 
 
-def _is_hedged(h: HoldingValue) -> bool:
+def _is_hedged(h: HoldingValue, ctx: ComplianceContext) -> bool:
     """Check if a holding is marked as hedged in classifications."""
-    with get_connection() as conn:
-        row = conn.execute("""
-            SELECT hedged FROM instrument_classifications ic
-            JOIN instruments i ON i.id = ic.instrument_id
-            WHERE i.ticker = ?
-        """, (h.ticker,)).fetchone()
-    if row and row["hedged"] is not None:
-        return row["hedged"] == 1
+    hedged = ctx.flags(h.ticker).hedged
+    if hedged is not None:
+        return hedged == 1
     return False  # assume unhedged if not specified
 
 
 # ─── Rules 6.1, 6.2: Optionality Constraints ──────────────────────────────
 
-def check_optionality(pv: PortfolioValuation) -> list[CheckResult]:
-    """Rules 6.1 and 6.2: convexity payoff test, yield exclusion."""
+@register_rule("convexity", ("6.1",), {"positions", "classifications"})
+def check_convexity(pv: PortfolioValuation, db_path=None,
+                    ctx: ComplianceContext | None = None) -> list[CheckResult]:
+    """Rule 6.1: optionality holdings must pass the convexity payoff test."""
     results = []
 
     opt_holdings = [h for h in pv.holdings if h.capital_role == "optionality"]
@@ -456,71 +714,76 @@ def check_optionality(pv: PortfolioValuation) -> list[CheckResult]:
         ))
         return results
 
-    opt_total = sum(h.value_aud for h in opt_holdings)
-
-    with get_connection() as conn:
-        for h in opt_holdings:
-            row = conn.execute("""
-                SELECT convexity_defined_downside, convexity_nonlinear_upside,
-                       convexity_stress_outperform
-                FROM instrument_classifications ic
-                JOIN instruments i ON i.id = ic.instrument_id
-                WHERE i.ticker = ?
-            """, (h.ticker,)).fetchone()
-
-            if not row:
-                results.append(CheckResult(
-                    "6.1", f"Convexity Test: {h.ticker}", "warning",
-                    f"{h.ticker} has no convexity metadata. Tag using `towsand classify tag`.",
-                ))
-                continue
+    ctx = ctx or ComplianceContext.load(db_path)
 
-            score = sum(1 for attr in [
-                row["convexity_defined_downside"],
-                row["convexity_nonlinear_upside"],
-                row["convexity_stress_outperform"],
-            ] if attr == 1)
+    for h in opt_holdings:
+        flags = ctx.flags(h.ticker)
+        if not flags.classified:
+            results.append(CheckResult(
+                "6.1", f"Convexity Test: {h.ticker}", "warning",
+                f"{h.ticker} has no convexity metadata. Tag using `towsand classify tag`.",
+            ))
+            continue
 
-            if score < 2:
-                results.append(CheckResult(
-                    "6.1", f"Convexity Test: {h.ticker}", "breach",
-                    f"{h.ticker} scores {score}/3 on payoff shape (need ≥2).",
-                    value=score, threshold=2,
-                ))
+        score = sum(1 for attr in [
+            flags.convexity_defined_downside,
+            flags.convexity_nonlinear_upside,
+            flags.convexity_stress_outperform,
+        ] if attr == 1)
 
-    # Rule 6.2: Yield-dominant ≤ 25% of optionality
-    yield_total = 0
-    with get_connection() as conn:
-        for h in opt_holdings:
-            row = conn.execute("""
-                SELECT yield_dominant FROM instrument_classifications ic
-                JOIN instruments i ON i.id = ic.instrument_id
-                WHERE i.ticker = ?
-            """, (h.ticker,)).fetchone()
-            if row and row["yield_dominant"] == 1:
-                yield_total += h.value_aud
-
-    if opt_total > 0:
-        yield_pct = (yield_total / opt_total * 100)
-        if yield_pct > 25:
+        if score < RuleLimits.convexity_min:
             results.append(CheckResult(
-                "6.2", "Yield Exclusion", "breach",
-                f"Yield-dominant instruments are {yield_pct:.1f}% of optionality (max 25%).",
-                value=yield_pct, threshold=25,
+                "6.1", f"Convexity Test: {h.ticker}", "breach",
+                f"{h.ticker} scores {score}/3 on payoff shape (need ≥{RuleLimits.convexity_min}).",
+                value=score, threshold=RuleLimits.convexity_min,
             ))
 
     if not results:
         results.append(CheckResult(
             "6.1", "Optionality Constraints", "pass",
-            "All optionality holdings pass convexity and yield tests.",
+            "All optionality holdings pass the convexity test.",
         ))
 
     return results
 
 
+@register_rule("yield_exclusion", ("6.2",), {"positions", "values", "classifications"})
+def check_yield_exclusion(pv: PortfolioValuation, db_path=None,
+                          ctx: ComplianceContext | None = None) -> list[CheckResult]:
+    """Rule 6.2: yield-dominant instruments ≤ 25% of optionality (reported on breach)."""
+    opt_holdings = [h for h in pv.holdings if h.capital_role == "optionality"]
+    opt_total = sum(h.value_aud for h in opt_holdings)
+    if opt_total <= 0:
+        return []
+
+    ctx = ctx or ComplianceContext.load(db_path)
+    yield_total = sum(h.value_aud for h in opt_holdings
+                      if ctx.flags(h.ticker).yield_dominant == 1)
+
+    yield_pct = (yield_total / opt_total * 100)
+    if yield_pct > RuleLimits.yield_max:
+        return [CheckResult(
+            "6.2", "Yield Exclusion", "breach",
+            f"Yield-dominant instruments are {yield_pct:.1f}% of optionality "
+            f"(max {RuleLimits.yield_max:g}%).",
+            value=yield_pct, threshold=RuleLimits.yield_max,
+        )]
+    return []
+
+
+def check_optionality(pv: PortfolioValuation, db_path=None,
+                      ctx: ComplianceContext | None = None) -> list[CheckResult]:
+    """Rules 6.1 and 6.2 together: convexity payoff test, yield exclusion."""
+    ctx = ctx or ComplianceContext.load(db_path)
+    return check_convexity(pv, db_path, ctx) + check_yield_exclusion(pv, db_path, ctx)
+
+
 # ─── Rules 7.1, 7.2, 7.3: Stabiliser Constraints ──────────────────────────
 
-def check_stabiliser(pv: PortfolioValuation) -> list[CheckResult]:
+@register_rule("stabiliser", ("7.1", "7.2", "7.3"),
+               {"positions", "values", "cash", "parameters", "classifications"}, cost=2)
+def check_stabiliser(pv: PortfolioValuation, db_path=None,
+                     ctx: ComplianceContext | None = None) -> list[CheckResult]:
     """Rules 7.1, 7.2, 7.3: liquidity, duration, inflation coverage."""
     results = []
 
@@ -537,85 +800,78 @@ def check_stabiliser(pv: PortfolioValuation) -> list[CheckResult]:
         ))
         return results
 
+    ctx = ctx or ComplianceContext.load(db_path)
+    lim = RuleLimits.from_context(ctx)
+
     # Rule 7.1: ≥70% liquid within 5 days
     liquid_total = stab_cash  # cash is always liquid
-    with get_connection() as conn:
-        for h in stab_holdings:
-            row = conn.execute("""
-                SELECT liquidity_days FROM instrument_classifications ic
-                JOIN instruments i ON i.id = ic.instrument_id
-                WHERE i.ticker = ?
-            """, (h.ticker,)).fetchone()
-            if row and row["liquidity_days"] is not None and row["liquidity_days"] <= 5:
-                liquid_total += h.value_aud
-            elif not row or row["liquidity_days"] is None:
-                # Assume liquid if no data (conservative: flag as warning)
-                liquid_total += h.value_aud
+    for h in stab_holdings:
+        liquidity_days = ctx.flags(h.ticker).liquidity_days
+        if liquidity_days is not None and liquidity_days <= lim.liquidity_days:
+            liquid_total += h.value_aud
+        elif liquidity_days is None:
+            # Assume liquid if no data (conservative: flag as warning)
+            liquid_total += h.value_aud
 
     liquid_pct = (liquid_total / stab_total * 100) if stab_total > 0 else 0
-    if liquid_pct < 70:
+    days = lim.liquidity_days
+    if liquid_pct < lim.liquid_min:
         results.append(CheckResult(
             "7.1", "Stabiliser Liquidity", "breach",
-            f"Only {liquid_pct:.1f}% of stabiliser liquid within 5 days (need ≥70%).",
-            value=liquid_pct, threshold=70,
+            f"Only {liquid_pct:.1f}% of stabiliser liquid within {days} days "
+            f"(need ≥{lim.liquid_min:g}%).",
+            value=liquid_pct, threshold=lim.liquid_min,
         ))
     else:
         results.append(CheckResult(
             "7.1", "Stabiliser Liquidity", "pass",
-            f"{liquid_pct:.1f}% of stabiliser liquid within 5 days (≥70% required).",
-            value=liquid_pct, threshold=70,
+            f"{liquid_pct:.1f}% of stabiliser liquid within {days} days "
+            f"(≥{lim.liquid_min:g}% required).",
+            value=liquid_pct, threshold=lim.liquid_min,
         ))
 
     # Rule 7.2: No single duration point >40% of stabiliser capital
     duration_buckets: dict[str, float] = {}
-    with get_connection() as conn:
-        for h in stab_holdings:
-            row = conn.execute("""
-                SELECT duration_years FROM instrument_classifications ic
-                JOIN instruments i ON i.id = ic.instrument_id
-                WHERE i.ticker = ?
-            """, (h.ticker,)).fetchone()
-            if row and row["duration_years"] is not None:
-                bucket = f"{row['duration_years']:.0f}y"
-            else:
-                bucket = "unknown"
-            duration_buckets[bucket] = duration_buckets.get(bucket, 0) + h.value_aud
+    for h in stab_holdings:
+        duration_years = ctx.flags(h.ticker).duration_years
+        bucket = f"{duration_years:.0f}y" if duration_years is not None else "unknown"
+        duration_buckets[bucket] = duration_buckets.get(bucket, 0) + h.value_aud
 
+    bucket_max = 0.0
     for bucket, value in duration_buckets.items():
         if bucket == "unknown":
             continue
         pct = (value / stab_total * 100) if stab_total > 0 else 0
-        if pct > 40:
+        bucket_max = max(bucket_max, pct)
+        if pct > lim.duration_max:
             results.append(CheckResult(
                 "7.2", f"Duration Concentration: {bucket}", "breach",
-                f"Duration bucket '{bucket}' is {pct:.1f}% of stabiliser (max 40%).",
-                value=pct, threshold=40,
+                f"Duration bucket '{bucket}' is {pct:.1f}% of stabiliser (max {lim.duration_max:g}%).",
+                value=pct, threshold=lim.duration_max,
             ))
+    if not any(r.rule_id == "7.2" for r in results):
+        results.append(CheckResult(
+            "7.2", "Duration Concentration", "pass",
+            f"No duration bucket exceeds {lim.duration_max:g}% of stabiliser.",
+            value=bucket_max, threshold=lim.duration_max,
+        ))
 
     # Rule 7.3: ≥25% of stabiliser in inflation-linked/real-rate
-    inflation_total = 0
-    with get_connection() as conn:
-        for h in stab_holdings:
-            row = conn.execute("""
-                SELECT is_inflation_linked FROM instrument_classifications ic
-                JOIN instruments i ON i.id = ic.instrument_id
-                WHERE i.ticker = ?
-            """, (h.ticker,)).fetchone()
-            if row and row["is_inflation_linked"] == 1:
-                inflation_total += h.value_aud
+    inflation_total = sum(h.value_aud for h in stab_holdings
+                          if ctx.flags(h.ticker).is_inflation_linked == 1)
 
     infl_pct = (inflation_total / stab_total * 100) if stab_total > 0 else 0
-    if infl_pct < 25:
+    if infl_pct < lim.inflation_min:
         results.append(CheckResult(
             "7.3", "Inflation Coverage", "warning",
-            f"Only {infl_pct:.1f}% of stabiliser is inflation-linked (target ≥25%).",
-            value=infl_pct, threshold=25,
+            f"Only {infl_pct:.1f}% of stabiliser is inflation-linked (target ≥{lim.inflation_min:g}%).",
+            value=infl_pct, threshold=lim.inflation_min,
         ))
     else:
         results.append(CheckResult(
             "7.3", "Inflation Coverage", "pass",
-            f"{infl_pct:.1f}% of stabiliser is inflation-linked (≥25% required).",
-            value=infl_pct, threshold=25,
+            f"{infl_pct:.1f}% of stabiliser is inflation-linked (≥{lim.inflation_min:g}% required).",
+            value=infl_pct, threshold=lim.inflation_min,
         ))
 
     return results
@@ -623,7 +879,10 @@ def check_stabiliser(pv: PortfolioValuation) -> list[CheckResult]:
 
 # ─── Rules 8.1, 8.2: Drawdown & Correlation ────────────────────────────────
 
-def check_drawdown(pv: PortfolioValuation) -> list[CheckResult]:
+@register_rule("drawdown", ("8.1", "8.2"),
+               {"positions", "values", "cash", "parameters", "classifications"}, cost=2)
+def check_drawdown(pv: PortfolioValuation, db_path=None,
+                   ctx: ComplianceContext | None = None) -> list[CheckResult]:
     """Rules 8.1 and 8.2: drawdown tolerance, stress correlation."""
     results = []
     total = pv.total_aud
@@ -631,16 +890,17 @@ def check_drawdown(pv: PortfolioValuation) -> list[CheckResult]:
     if total <= 0:
         return results
 
+    ctx = ctx or ComplianceContext.load(db_path)
+    lim = RuleLimits.from_context(ctx)
+
     # Rule 8.1: 35% equity drawdown must not force liquidation
     # Model: equity-like holdings lose 35%, check if stabiliser still covers expenses
     equity_loss = 0
     for h in pv.holdings:
         if h.capital_role in ("compounder", "optionality"):
-            equity_loss += h.value_aud * 0.35
+            equity_loss += h.value_aud * lim.drawdown / 100
 
-    with get_connection() as conn:
-        monthly = _get_param_float(conn, "monthly_expenses", 9000)
-    min_needed = 24 * monthly  # must still cover 24 months
+    min_needed = lim.stabiliser_floor(ctx)  # must still cover 24 months
 
     roles = pv.by_capital_role()
     # by_capital_role() already includes cash in stabiliser — no separate addition
@@ -649,39 +909,33 @@ def check_drawdown(pv: PortfolioValuation) -> list[CheckResult]:
     if stabiliser_post < min_needed:
         results.append(CheckResult(
             "8.1", "Drawdown Tolerance", "breach",
-            f"After 35% equity drawdown, stabiliser AUD {stabiliser_post:,.0f} "
-            f"< 24-month floor AUD {min_needed:,.0f}. Risk of forced liquidation.",
+            f"After {lim.drawdown:g}% equity drawdown, stabiliser AUD {stabiliser_post:,.0f} "
+            f"< {lim.stabiliser_months:g}-month floor AUD {min_needed:,.0f}. Risk of forced liquidation.",
             value=stabiliser_post, threshold=min_needed,
         ))
     else:
         results.append(CheckResult(
             "8.1", "Drawdown Tolerance", "pass",
-            f"After 35% equity drawdown, stabiliser AUD {stabiliser_post:,.0f} still covers "
-            f"24 months (AUD {min_needed:,.0f}).",
+            f"After {lim.drawdown:g}% equity drawdown, stabiliser AUD {stabiliser_post:,.0f} still covers "
+            f"{lim.stabiliser_months:g} months (AUD {min_needed:,.0f}).",
             value=stabiliser_post, threshold=min_needed,
         ))
 
     # Rule 8.2: Stress correlation — check via correlation groups
     corr_groups: dict[str, float] = {}
-    with get_connection() as conn:
-        for h in pv.holdings:
-            row = conn.execute("""
-                SELECT stress_correlation_group FROM instrument_classifications ic
-                JOIN instruments i ON i.id = ic.instrument_id
-                WHERE i.ticker = ?
-            """, (h.ticker,)).fetchone()
-            if row and row["stress_correlation_group"]:
-                grp = row["stress_correlation_group"]
-                corr_groups[grp] = corr_groups.get(grp, 0) + h.value_aud
+    for h in pv.holdings:
+        grp = ctx.flags(h.ticker).stress_correlation_group
+        if grp:
+            corr_groups[grp] = corr_groups.get(grp, 0) + h.value_aud
 
     for grp, value in corr_groups.items():
         pct = (value / total * 100) if total > 0 else 0
-        if pct > 20:
+        if pct > lim.correlation_group_max:
             results.append(CheckResult(
                 "8.2", f"Stress Correlation: {grp}", "warning",
                 f"Correlation group '{grp}' at {pct:.1f}% (>0.7 stress corr → single risk). "
                 "Consider as one position for sizing.",
-                value=pct,
+                value=pct, threshold=lim.correlation_group_max,
             ))
 
     return results
@@ -689,23 +943,25 @@ def check_drawdown(pv: PortfolioValuation) -> list[CheckResult]:
 
 # ─── Rule 9: Review Triggers ───────────────────────────────────────────────
 
-def check_review_triggers(pv: PortfolioValuation, db_path=None) -> list[CheckResult]:
+@register_rule("review_triggers", ("9.1", "9.2"), {"parameters"})
+def check_review_triggers(pv: PortfolioValuation, db_path=None,
+                          ctx: ComplianceContext | None = None) -> list[CheckResult]:
     """Rule 9: check if any review triggers are active."""
     results = []
 
-    with get_connection(db_path) as conn:
-        triggers = {
-            "income_shock_active": "Income shock",
-            "inflation_shift_active": "Structural inflation shift",
-            "currency_regime_active": "Currency regime change",
-            "correlation_convergence_active": "Correlation convergence",
-        }
-
-        active = []
-        for key, label in triggers.items():
-            val = _get_param(conn, key, "false")
-            if val.lower() == "true":
-                active.append(label)
+    ctx = ctx or ComplianceContext.load(db_path)
+    triggers = {
+        "income_shock_active": "Income shock",
+        "inflation_shift_active": "Structural inflation shift",
+        "currency_regime_active": "Currency regime change",
+        "correlation_convergence_active": "Correlation convergence",
+    }
+
+    active = []
+    for key, label in triggers.items():
+        val = ctx.param(key, "false")
+        if val.lower() == "true":
+            active.append(label)
 
     # Check for rule breaches (proxy: count breach results from other checks)
     # This is handled by the caller — just report trigger status
@@ -723,90 +979,67 @@ def check_review_triggers(pv: PortfolioValuation, db_path=None) -> list[CheckRes
     return results
 
 
-# ─── Data Freshness ─────────────────────────────────────────────────────────
-
-def check_data_freshness(pv: PortfolioValuation, db_path=None) -> list[CheckResult]:
-    """Check that prices and FX rates are recent enough for reliable compliance."""
-    results = []
-    today = date.today()
-
-    stale_prices = []
-    for h in pv.holdings:
-        if not h.price_date:
-            stale_prices.append(f"{h.ticker} (no price)")
-            continue
-        try:
-            price_date = date.fromisoformat(h.price_date)
-            age_days = (today - price_date).days
-            if age_days > 7:
-                stale_prices.append(f"{h.ticker} ({age_days}d old)")
-        except ValueError:
-            stale_prices.append(f"{h.ticker} (bad date: {h.price_date})")
-
-    if stale_prices:
-        results.append(CheckResult(
-            "D.1", "Price Freshness", "warning",
-            f"Stale prices (>7 days): {', '.join(stale_prices)}. "
-            "Run `towsand prices update` before relying on compliance results.",
-        ))
-
-    # Check FX freshness for non-AUD currencies held
-    with get_connection(db_path) as conn:
-        non_aud = set()
-        for h in pv.holdings:
-            if h.currency != "AUD":
-                non_aud.add(h.currency)
-
-        stale_fx = []
-        for ccy in sorted(non_aud):
-            row = conn.execute(
-                "SELECT date FROM fx_rates WHERE from_currency = ? AND to_currency = 'AUD' "
-                "ORDER BY date DESC LIMIT 1",
-                (ccy,),
-            ).fetchone()
-            if not row:
-                stale_fx.append(f"{ccy}/AUD (no rate)")
-            else:
-                try:
-                    fx_date = date.fromisoformat(row["date"])
-                    age_days = (today - fx_date).days
-                    if age_days > 7:
-                        stale_fx.append(f"{ccy}/AUD ({age_days}d old)")
-                except ValueError:
-                    stale_fx.append(f"{ccy}/AUD (bad date)")
-
-    if stale_fx:
-        results.append(CheckResult(
-            "D.2", "FX Rate Freshness", "warning",
-            f"Stale FX rates (>7 days): {', '.join(stale_fx)}. "
-            "Run `towsand fx update` before relying on compliance results.",
-        ))
+# ─── Run All Checks ────────────────────────────────────────────────────────
 
-    if not results:
-        results.append(CheckResult(
-            "D.1", "Data Freshness", "pass",
-            "All prices and FX rates are current (≤7 days old).",
-        ))
+def select_rules(patterns: list[str] | None = None) -> list[Rule]:
+    """Registered rules matching any of the patterns (fnmatch on rule id or name).
+
+    Selection is per check function: a check emitting several rule ids runs
+    (and reports all of them) if any one matches. No patterns selects all.
+    """
+    if not patterns:
+        return list(RULES)
+    selected = [r for r in RULES if r.matches(patterns)]
+    if not selected:
+        raise ValueError(f"No compliance rules match {patterns}. "
+                         f"Known ids: {', '.join(i for r in RULES for i in r.rule_ids)}")
+    return selected
+
+
+def run_checks(
+    pv: PortfolioValuation,
+    db_path=None,
+    ctx: ComplianceContext | None = None,
+    rules: list[str] | None = None,
+    parallel: bool = False,
+    max_workers: int | None = None,
+) -> list[CheckResult]:
+    """Run the selected compliance checks and return results in registry order.
+
+    Args:
+        pv: Portfolio to check.
+        db_path: Optional database path override.
+        ctx: Preloaded ComplianceContext (loaded once here if omitted).
+        rules: Rule-id patterns to run, e.g. ["3.*", "5.1"]; all rules if omitted.
+        parallel: Run the checks concurrently on a thread pool. They share the
+            valuation and context read-only; costlier checks are submitted first.
+        max_workers: Thread pool size when parallel.
+    """
+    selected = select_rules(rules)
+    ctx = ctx or ComplianceContext.load(db_path)
+
+    if parallel and len(selected) > 1:
+        _ = pv.columns  # build the shared aggregate cache before the threads read it
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                rule.name: pool.submit(rule.check, pv, db_path, ctx)
+                for rule in sorted(selected, key=lambda r: -r.cost)
+            }
+            per_rule = [futures[rule.name].result() for rule in selected]
+    else:
+        per_rule = [rule.check(pv, db_path, ctx) for rule in selected]
 
-    return results
+    return [result for results in per_rule for result in results]
 
 
-# ─── Run All Checks ────────────────────────────────────────────────────────
+def run_all_checks(pv: PortfolioValuation, db_path=None,
+                   ctx: ComplianceContext | None = None) -> list[CheckResult]:
+    """Run all compliance checks and return results.
 
-def run_all_checks(pv: PortfolioValuation, db_path=None) -> list[CheckResult]:
-    """Run all compliance checks and return results."""
-    all_results = []
-    all_results.extend(check_data_freshness(pv, db_path))
-    all_results.extend(check_capital_roles(pv, db_path))
-    all_results.extend(check_income_shock(pv, db_path))
-    all_results.extend(check_position_size(pv))
-    all_results.extend(check_macro_exposure(pv))
-    all_results.extend(check_currency_exposure(pv))
-    all_results.extend(check_optionality(pv))
-    all_results.extend(check_stabiliser(pv))
-    all_results.extend(check_drawdown(pv))
-    all_results.extend(check_review_triggers(pv, db_path))
-    return all_results
+    The ComplianceContext is loaded once (or passed in, e.g. by a stress loop
+    checking many stressed portfolios) and shared by every rule.
+    """
+    return run_checks(pv, db_path, ctx)
 
 
 def store_compliance_snapshot(results: list[CheckResult], total_aud: float,
@@ -824,12 +1057,11 @@ def store_compliance_snapshot(results: list[CheckResult], total_aud: float,
         )
         snap_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
 
-        # Store each check result
-        for r in results:
-            conn.execute(
-                "INSERT INTO compliance_snapshots (portfolio_snapshot_id, date, rule_id, status, detail) "
-                "VALUES (?, ?, ?, ?, ?)",
-                (snap_id, today, r.rule_id, r.status, r.detail),
-            )
+        conn.executemany(
+            "INSERT INTO compliance_snapshots "
+            "(portfolio_snapshot_id, date, rule_id, status, detail, value, threshold) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(snap_id, today, r.rule_id, r.status, r.detail, r.value, r.threshold) for r in results],
+        )
 
     return snap_id
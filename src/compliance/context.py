@@ -0,0 +1,86 @@
+"""Compliance context — everything the rules read from the database, loaded once.
+
+The checks need system parameters and per-instrument flags (speculative,
+hedged, convexity, yield, duration, liquidity, inflation linkage, stress
+correlation group). ComplianceContext loads all of them in two queries so a
+full compliance run — or one per stress scenario or what-if candidate —
+needs a constant number of queries regardless of portfolio size.
+"""
+
+from dataclasses import dataclass, field
+
+from src.db.connection import get_connection
+
+
+@dataclass(frozen=True)
+class InstrumentFlags:
+    """Rule-relevant flags for one instrument.
+
+    classified is False when the instrument has no instrument_classifications
+    row (or is not in the database at all, e.g. a projected new buy).
+    """
+    is_speculative: bool = False
+    classified: bool = False
+    hedged: int | None = None
+    convexity_defined_downside: int | None = None
+    convexity_nonlinear_upside: int | None = None
+    convexity_stress_outperform: int | None = None
+    yield_dominant: int | None = None
+    duration_years: float | None = None
+    liquidity_days: int | None = None
+    is_inflation_linked: int | None = None
+    stress_correlation_group: str | None = None
+
+
+UNKNOWN_INSTRUMENT = InstrumentFlags()
+
+
+@dataclass
+class ComplianceContext:
+    """Parameters and per-ticker instrument flags for a compliance run."""
+    params: dict[str, str] = field(default_factory=dict)
+    instruments: dict[str, InstrumentFlags] = field(default_factory=dict)
+
+    @classmethod
+    def from_connection(cls, conn) -> "ComplianceContext":
+        """Load parameters and flags for every instrument over an open connection."""
+        ctx = cls()
+        ctx.params = {r["key"]: r["value"] for r in conn.execute("SELECT key, value FROM parameters")}
+        for r in conn.execute("""
+            SELECT i.ticker, i.is_speculative, ic.instrument_id IS NOT NULL AS classified,
+                   ic.hedged, ic.convexity_defined_downside, ic.convexity_nonlinear_upside,
+                   ic.convexity_stress_outperform, ic.yield_dominant, ic.duration_years,
+                   ic.liquidity_days, ic.is_inflation_linked, ic.stress_correlation_group
+            FROM instruments i
+            LEFT JOIN instrument_classifications ic ON ic.instrument_id = i.id
+        """):
+            ctx.instruments[r["ticker"]] = InstrumentFlags(
+                is_speculative=bool(r["is_speculative"]),
+                classified=bool(r["classified"]),
+                hedged=r["hedged"],
+                convexity_defined_downside=r["convexity_defined_downside"],
+                convexity_nonlinear_upside=r["convexity_nonlinear_upside"],
+                convexity_stress_outperform=r["convexity_stress_outperform"],
+                yield_dominant=r["yield_dominant"],
+                duration_years=r["duration_years"],
+                liquidity_days=r["liquidity_days"],
+                is_inflation_linked=r["is_inflation_linked"],
+                stress_correlation_group=r["stress_correlation_group"],
+            )
+        return ctx
+
+    @classmethod
+    def load(cls, db_path=None) -> "ComplianceContext":
+        with get_connection(db_path) as conn:
+            return cls.from_connection(conn)
+
+    def param(self, key: str, default: str = "") -> str:
+        return self.params.get(key, default)
+
+    def param_float(self, key: str, default: float = 0.0) -> float:
+        value = self.params.get(key)
+        return float(value) if value else default
+
+    def flags(self, ticker: str) -> InstrumentFlags:
+        """Flags for a ticker; all-unset for instruments not in the database."""
+        return self.instruments.get(ticker, UNKNOWN_INSTRUMENT)
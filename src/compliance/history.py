@@ -0,0 +1,64 @@
+"""Compliance history — a rule's measured value over stored snapshots.
+
+store_compliance_snapshot() records each CheckResult with its numeric value
+and threshold, so trends (e.g. distance to a breach) are read directly from
+the idx_compliance_rule_date covering index rather than parsed out of the
+detail strings.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+
+from src.db.connection import get_connection
+
+
+@dataclass
+class RuleHistoryPoint:
+    """One stored result of a rule."""
+    date: str
+    snapshot_id: int | None
+    status: str
+    value: float | None
+    threshold: float | None
+
+    @property
+    def margin(self) -> float | None:
+        """value - threshold; None if either is unknown.
+
+        Whether a positive margin is safe depends on the rule: it is headroom
+        for a floor (7.3 min 25%) and excess for a cap (4.2 max 30%). Band
+        rules (1.1-S/C/O, 5.1) are stored against their nearest edge, and
+        aggregate passes (3.1, 4.2, 7.2) against the position or group with
+        the least headroom.
+        """
+        if self.value is None or self.threshold is None:
+            return None
+        return self.value - self.threshold
+
+
+def rule_history(
+    rule_id: str,
+    since: date | str | None = None,
+    until: date | str | None = None,
+    db_path=None,
+) -> list[RuleHistoryPoint]:
+    """Stored results of a rule in date order, optionally within [since, until].
+
+    A snapshot can hold several results for one rule id (e.g. one 3.1-cr
+    breach per holding); each is returned.
+    """
+    since = since.isoformat() if isinstance(since, date) else since
+    until = until.isoformat() if isinstance(until, date) else until
+
+    with get_connection(db_path) as conn:
+        rows = conn.execute("""
+            SELECT date, portfolio_snapshot_id, status, value, threshold
+            FROM compliance_snapshots
+            WHERE rule_id = ? AND date >= ? AND date <= ?
+            ORDER BY date, portfolio_snapshot_id
+        """, (rule_id, since or "", until or "9999-12-31")).fetchall()
+
+    return [
+        RuleHistoryPoint(r["date"], r["portfolio_snapshot_id"], r["status"], r["value"], r["threshold"])
+        for r in rows
+    ]
@@ -0,0 +1,127 @@
+"""Incremental compliance: re-evaluate only the rules whose inputs changed.
+
+Every registered Rule declares the input kinds it reads (checks.INPUTS).
+IncrementalChecker fingerprints those inputs on each run and keeps, per
+rule, the last results together with the fingerprints they were computed
+from; a rule is re-run only when one of its fingerprints differs. A price
+tick changes holding values and price dates but not positions, parameters
+or classifications, so rules such as the convexity test (6.1), review
+triggers and an inactive income shock (2.2) are served from the cache.
+
+Intended for a watch loop that rechecks compliance after every price
+update; results are identical to run_checks() on the same inputs.
+"""
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import date
+
+from src.compliance.checks import CheckResult, Rule, select_rules
+from src.compliance.context import ComplianceContext
+from src.portfolio.valuation import PortfolioValuation
+
+logger = logging.getLogger(__name__)
+
+
+def _positions(pv: PortfolioValuation, ctx: ComplianceContext) -> tuple:
+    return tuple(
+        (h.ticker, h.account_name, h.institution_name, h.instrument_type, h.currency,
+         h.country, h.capital_role, h.asset_class, h.economic_currency, h.corporate_group,
+         h.macro_drivers)
+        for h in pv.holdings
+    )
+
+
+def _values(pv: PortfolioValuation, ctx: ComplianceContext) -> tuple:
+    return tuple(h.value_aud for h in pv.holdings)
+
+
+def _cash(pv: PortfolioValuation, ctx: ComplianceContext) -> tuple:
+    return tuple((c.account_name, c.currency, c.value_aud, c.is_investable) for c in pv.cash)
+
+
+def _price_dates(pv: PortfolioValuation, ctx: ComplianceContext) -> tuple:
+    return tuple(h.price_date for h in pv.holdings)
+
+
+def _fx(pv: PortfolioValuation, ctx: ComplianceContext):
+    # None (no book attached) never equals a previous fingerprint: checks reload rates
+    return frozenset(pv.fx_book.rates.items()) if pv.fx_book is not None else object()
+
+
+def _parameters(pv: PortfolioValuation, ctx: ComplianceContext) -> frozenset:
+    return frozenset(ctx.params.items())
+
+
+def _classifications(pv: PortfolioValuation, ctx: ComplianceContext) -> frozenset:
+    return frozenset(ctx.instruments.items())
+
+
+def _calendar(pv: PortfolioValuation, ctx: ComplianceContext) -> date:
+    return date.today()
+
+
+FINGERPRINTS: dict[str, Callable[[PortfolioValuation, ComplianceContext], object]] = {
+    "positions": _positions,
+    "values": _values,
+    "cash": _cash,
+    "price_dates": _price_dates,
+    "fx": _fx,
+    "parameters": _parameters,
+    "classifications": _classifications,
+    "calendar": _calendar,
+}
+
+
+def input_fingerprints(pv: PortfolioValuation, ctx: ComplianceContext,
+                       kinds: set[str] | frozenset[str]) -> dict[str, object]:
+    """Comparable snapshot of each requested input kind."""
+    return {kind: FINGERPRINTS[kind](pv, ctx) for kind in kinds}
+
+
+@dataclass
+class _CachedRule:
+    inputs: dict[str, object]       # fingerprints the results were computed from
+    results: list[CheckResult]
+
+
+@dataclass
+class IncrementalChecker:
+    """Runs the selected rules, reusing cached results whose inputs are unchanged.
+
+    Keep one instance across runs (e.g. for the lifetime of a watch loop).
+    """
+    db_path: object = None
+    rules: list[str] | None = None          # rule-id patterns, as for run_checks()
+    _selected: list[Rule] = field(default_factory=list, repr=False)
+    _cache: dict[str, _CachedRule] = field(default_factory=dict, repr=False)
+    last_evaluated: list[str] = field(default_factory=list)   # rule names re-run last time
+
+    def __post_init__(self):
+        self._selected = select_rules(self.rules)
+
+    def run(self, pv: PortfolioValuation, ctx: ComplianceContext | None = None) -> list[CheckResult]:
+        """Results for every selected rule, in registry order."""
+        ctx = ctx or ComplianceContext.load(self.db_path)
+        needed = {kind for rule in self._selected for kind in rule.inputs}
+        fingerprints = input_fingerprints(pv, ctx, needed)
+
+        self.last_evaluated = []
+        results = []
+        for rule in self._selected:
+            inputs = {kind: fingerprints[kind] for kind in rule.inputs_for(ctx)}
+            cached = self._cache.get(rule.name)
+            if cached is None or cached.inputs != inputs:
+                cached = self._cache[rule.name] = _CachedRule(inputs, rule.check(pv, self.db_path, ctx))
+                self.last_evaluated.append(rule.name)
+            results.extend(cached.results)
+
+        logger.debug("Incremental compliance: %d of %d rules re-evaluated (%s)",
+                     len(self.last_evaluated), len(self._selected),
+                     ", ".join(self.last_evaluated) or "none")
+        return results
+
+    def invalidate(self) -> None:
+        """Drop all cached results; the next run evaluates every rule."""
+        self._cache.clear()
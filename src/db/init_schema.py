@@ -6,7 +6,7 @@ Or via CLI:   towsand init
 
 from src.db.connection import get_connection
 
-SCHEMA_VERSION = 1
+SCHEMA_VERSION = 7
 
 TABLES = [
     # --- Reference data ---
@@ -101,6 +101,43 @@ TABLES = [
     )
     """,
 
+    # --- Materialised latest values (maintained by TRIGGERS below) ---
+    """
+    CREATE TABLE IF NOT EXISTS latest_prices (
+        instrument_id   INTEGER PRIMARY KEY REFERENCES instruments(id),
+        date            TEXT    NOT NULL,
+        close_price     REAL    NOT NULL,
+        currency        TEXT    NOT NULL,
+        version         INTEGER NOT NULL DEFAULT 0  -- prices counter when last changed
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS latest_fx_rates (
+        from_currency   TEXT    NOT NULL,
+        to_currency     TEXT    NOT NULL,
+        date            TEXT    NOT NULL,
+        rate            REAL    NOT NULL,
+        PRIMARY KEY (from_currency, to_currency)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS latest_cash_balances (
+        account_id      INTEGER NOT NULL REFERENCES accounts(id),
+        currency        TEXT    NOT NULL,
+        as_of_date      TEXT    NOT NULL,
+        balance         REAL    NOT NULL,
+        PRIMARY KEY (account_id, currency)
+    )
+    """,
+
+    # --- Change tracking (bumped by TRIGGERS below; see src/portfolio/cache.py) ---
+    """
+    CREATE TABLE IF NOT EXISTS table_versions (
+        table_name      TEXT    PRIMARY KEY,
+        version         INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+
     # --- Classification & tagging ---
     """
     CREATE TABLE IF NOT EXISTS instrument_classifications (
@@ -125,6 +162,16 @@ TABLES = [
     )
     """,
 
+    # Normalised macro_drivers (one row per instrument × driver), maintained by
+    # TRIGGERS below so driver exposure is an indexed join rather than JSON parsing.
+    """
+    CREATE TABLE IF NOT EXISTS instrument_macro_drivers (
+        instrument_id   INTEGER NOT NULL REFERENCES instruments(id),
+        driver          TEXT    NOT NULL,
+        PRIMARY KEY (instrument_id, driver)
+    )
+    """,
+
     # --- System parameters ---
     """
     CREATE TABLE IF NOT EXISTS parameters (
@@ -153,6 +200,8 @@ TABLES = [
         rule_id                 TEXT    NOT NULL,
         status                  TEXT    NOT NULL CHECK(status IN ('pass','warning','breach')),
         detail                  TEXT,
+        value                   REAL,           -- measured value (CheckResult.value)
+        threshold               REAL,           -- rule threshold it was compared against
         created_at              TEXT    NOT NULL DEFAULT (datetime('now'))
     )
     """,
@@ -181,6 +230,27 @@ TABLES = [
     )
     """,
 
+    # --- Stress scenario library (user-defined; built-ins live in analytics.stress) ---
+    """
+    CREATE TABLE IF NOT EXISTS stress_scenarios (
+        id              INTEGER PRIMARY KEY AUTOINCREMENT,
+        scenario_id     TEXT    NOT NULL UNIQUE,    -- key used by `towsand stress --scenario`
+        name            TEXT    NOT NULL,
+        description     TEXT,
+        created_at      TEXT    NOT NULL DEFAULT (datetime('now')),
+        updated_at      TEXT    NOT NULL DEFAULT (datetime('now'))
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stress_scenario_shocks (
+        scenario_id     INTEGER NOT NULL REFERENCES stress_scenarios(id) ON DELETE CASCADE,
+        dimension       TEXT    NOT NULL CHECK(dimension IN ('asset_class','macro_driver','currency')),
+        key             TEXT    NOT NULL,
+        shock           REAL    NOT NULL,           -- AUD return, e.g. -0.30
+        PRIMARY KEY (scenario_id, dimension, key)
+    )
+    """,
+
     # --- Action queue (for recommendations) ---
     """
     CREATE TABLE IF NOT EXISTS actions (
@@ -194,6 +264,7 @@ TABLES = [
         status          TEXT    NOT NULL DEFAULT 'proposed' CHECK(status IN ('proposed','approved','executed','skipped')),
         decision_id     INTEGER REFERENCES decisions(id),
         resolved_at     TEXT,
+        source          TEXT,           -- generator of a proposal (e.g. 'drift'); NULL = manual
         created_at      TEXT    NOT NULL DEFAULT (datetime('now'))
     )
     """,
@@ -204,21 +275,237 @@ INDEXES = [
     "CREATE INDEX IF NOT EXISTS idx_holdings_instrument ON holdings(instrument_id)",
     "CREATE INDEX IF NOT EXISTS idx_prices_instrument_date ON prices(instrument_id, date)",
     "CREATE INDEX IF NOT EXISTS idx_fx_rates_pair_date ON fx_rates(from_currency, to_currency, date)",
+    "CREATE INDEX IF NOT EXISTS idx_macro_drivers_driver ON instrument_macro_drivers(driver)",
     "CREATE INDEX IF NOT EXISTS idx_compliance_date ON compliance_snapshots(date)",
+    # Covers rule history queries (rule_id = ? AND date >= ?) without touching the table
+    "CREATE INDEX IF NOT EXISTS idx_compliance_rule_date ON compliance_snapshots"
+    "(rule_id, date, portfolio_snapshot_id, status, value, threshold)",
     "CREATE INDEX IF NOT EXISTS idx_decisions_date ON decisions(date)",
     "CREATE INDEX IF NOT EXISTS idx_actions_status ON actions(status)",
 ]
 
 
+# Keep the latest_* tables in step with their history tables. Inserts (including
+# INSERT OR REPLACE, which fires only the INSERT trigger) take the fast path: an
+# upsert that wins only if it is at least as recent. Updates and deletes may
+# remove the current latest row, so they re-derive it from the (indexed) history.
+# latest_prices.version records the prices change counter (table_versions) at the
+# time of the change, so a cached valuation can fetch just the instruments
+# repriced since it was computed.
+TRIGGERS = {
+    "trg_prices_insert_latest": """
+        AFTER INSERT ON prices BEGIN
+            INSERT INTO latest_prices (instrument_id, date, close_price, currency, version)
+            VALUES (NEW.instrument_id, NEW.date, NEW.close_price, NEW.currency,
+                    (SELECT version FROM table_versions WHERE table_name = 'prices'))
+            ON CONFLICT(instrument_id) DO UPDATE SET
+                date = excluded.date, close_price = excluded.close_price,
+                currency = excluded.currency, version = excluded.version
+            WHERE excluded.date >= latest_prices.date;
+        END
+    """,
+    "trg_prices_update_latest": """
+        AFTER UPDATE ON prices BEGIN
+            DELETE FROM latest_prices WHERE instrument_id IN (OLD.instrument_id, NEW.instrument_id);
+            INSERT INTO latest_prices (instrument_id, date, close_price, currency, version)
+            SELECT instrument_id, MAX(date), close_price, currency,
+                   (SELECT version FROM table_versions WHERE table_name = 'prices')
+            FROM prices
+            WHERE instrument_id IN (OLD.instrument_id, NEW.instrument_id)
+            GROUP BY instrument_id;
+        END
+    """,
+    "trg_prices_delete_latest": """
+        AFTER DELETE ON prices BEGIN
+            DELETE FROM latest_prices WHERE instrument_id = OLD.instrument_id;
+            INSERT INTO latest_prices (instrument_id, date, close_price, currency, version)
+            SELECT instrument_id, MAX(date), close_price, currency,
+                   (SELECT version FROM table_versions WHERE table_name = 'prices')
+            FROM prices
+            WHERE instrument_id = OLD.instrument_id
+            GROUP BY instrument_id;
+        END
+    """,
+    "trg_fx_rates_insert_latest": """
+        AFTER INSERT ON fx_rates BEGIN
+            INSERT INTO latest_fx_rates (from_currency, to_currency, date, rate)
+            VALUES (NEW.from_currency, NEW.to_currency, NEW.date, NEW.rate)
+            ON CONFLICT(from_currency, to_currency) DO UPDATE SET
+                date = excluded.date, rate = excluded.rate
+            WHERE excluded.date >= latest_fx_rates.date;
+        END
+    """,
+    "trg_fx_rates_update_latest": """
+        AFTER UPDATE ON fx_rates BEGIN
+            DELETE FROM latest_fx_rates
+            WHERE (from_currency = OLD.from_currency AND to_currency = OLD.to_currency)
+               OR (from_currency = NEW.from_currency AND to_currency = NEW.to_currency);
+            INSERT INTO latest_fx_rates (from_currency, to_currency, date, rate)
+            SELECT from_currency, to_currency, MAX(date), rate FROM fx_rates
+            WHERE (from_currency = OLD.from_currency AND to_currency = OLD.to_currency)
+               OR (from_currency = NEW.from_currency AND to_currency = NEW.to_currency)
+            GROUP BY from_currency, to_currency;
+        END
+    """,
+    "trg_fx_rates_delete_latest": """
+        AFTER DELETE ON fx_rates BEGIN
+            DELETE FROM latest_fx_rates
+            WHERE from_currency = OLD.from_currency AND to_currency = OLD.to_currency;
+            INSERT INTO latest_fx_rates (from_currency, to_currency, date, rate)
+            SELECT from_currency, to_currency, MAX(date), rate FROM fx_rates
+            WHERE from_currency = OLD.from_currency AND to_currency = OLD.to_currency
+            GROUP BY from_currency, to_currency;
+        END
+    """,
+    "trg_cash_balances_insert_latest": """
+        AFTER INSERT ON cash_balances BEGIN
+            INSERT INTO latest_cash_balances (account_id, currency, as_of_date, balance)
+            VALUES (NEW.account_id, NEW.currency, NEW.as_of_date, NEW.balance)
+            ON CONFLICT(account_id, currency) DO UPDATE SET
+                as_of_date = excluded.as_of_date, balance = excluded.balance
+            WHERE excluded.as_of_date >= latest_cash_balances.as_of_date;
+        END
+    """,
+    "trg_cash_balances_update_latest": """
+        AFTER UPDATE ON cash_balances BEGIN
+            DELETE FROM latest_cash_balances
+            WHERE (account_id = OLD.account_id AND currency = OLD.currency)
+               OR (account_id = NEW.account_id AND currency = NEW.currency);
+            INSERT INTO latest_cash_balances (account_id, currency, as_of_date, balance)
+            SELECT account_id, currency, MAX(as_of_date), balance FROM cash_balances
+            WHERE (account_id = OLD.account_id AND currency = OLD.currency)
+               OR (account_id = NEW.account_id AND currency = NEW.currency)
+            GROUP BY account_id, currency;
+        END
+    """,
+    "trg_cash_balances_delete_latest": """
+        AFTER DELETE ON cash_balances BEGIN
+            DELETE FROM latest_cash_balances
+            WHERE account_id = OLD.account_id AND currency = OLD.currency;
+            INSERT INTO latest_cash_balances (account_id, currency, as_of_date, balance)
+            SELECT account_id, currency, MAX(as_of_date), balance FROM cash_balances
+            WHERE account_id = OLD.account_id AND currency = OLD.currency
+            GROUP BY account_id, currency;
+        END
+    """,
+    # Malformed or non-array macro_drivers yield no rows (json_each over '[]').
+    "trg_classifications_insert_drivers": """
+        AFTER INSERT ON instrument_classifications BEGIN
+            INSERT OR IGNORE INTO instrument_macro_drivers (instrument_id, driver)
+            SELECT NEW.instrument_id, value FROM json_each(
+                CASE WHEN json_valid(NEW.macro_drivers) THEN NEW.macro_drivers ELSE '[]' END)
+            WHERE type = 'text';
+        END
+    """,
+    "trg_classifications_update_drivers": """
+        AFTER UPDATE OF instrument_id, macro_drivers ON instrument_classifications BEGIN
+            DELETE FROM instrument_macro_drivers WHERE instrument_id = OLD.instrument_id;
+            INSERT OR IGNORE INTO instrument_macro_drivers (instrument_id, driver)
+            SELECT NEW.instrument_id, value FROM json_each(
+                CASE WHEN json_valid(NEW.macro_drivers) THEN NEW.macro_drivers ELSE '[]' END)
+            WHERE type = 'text';
+        END
+    """,
+    "trg_classifications_delete_drivers": """
+        AFTER DELETE ON instrument_classifications BEGIN
+            DELETE FROM instrument_macro_drivers WHERE instrument_id = OLD.instrument_id;
+        END
+    """,
+}
+
+# Tables the portfolio valuation reads. Any row change bumps the table's counter
+# in table_versions, so cached results can be checked with one small query.
+VERSIONED_TABLES = [
+    "institutions", "accounts", "instruments", "holdings", "prices", "fx_rates",
+    "cash_balances", "instrument_classifications", "parameters",
+]
+
+TRIGGERS.update({
+    f"trg_{table}_{event.lower()}_version": f"""
+        AFTER {event} ON {table} BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+        END
+    """
+    for table in VERSIONED_TABLES
+    for event in ("INSERT", "UPDATE", "DELETE")
+})
+
+# Rebuild the derived tables (macro driver links, latest_*) from their sources.
+# SQLite returns the bare columns from the row holding MAX(date), so each
+# GROUP BY picks the latest row per key.
+BACKFILLS = [
+    "DELETE FROM instrument_macro_drivers",
+    """
+    INSERT OR IGNORE INTO instrument_macro_drivers (instrument_id, driver)
+    SELECT ic.instrument_id, j.value
+    FROM instrument_classifications ic, json_each(
+        CASE WHEN json_valid(ic.macro_drivers) THEN ic.macro_drivers ELSE '[]' END) j
+    WHERE j.type = 'text'
+    """,
+    """
+    INSERT OR REPLACE INTO latest_prices (instrument_id, date, close_price, currency)
+    SELECT instrument_id, MAX(date), close_price, currency FROM prices GROUP BY instrument_id
+    """,
+    """
+    INSERT OR REPLACE INTO latest_fx_rates (from_currency, to_currency, date, rate)
+    SELECT from_currency, to_currency, MAX(date), rate FROM fx_rates
+    GROUP BY from_currency, to_currency
+    """,
+    """
+    INSERT OR REPLACE INTO latest_cash_balances (account_id, currency, as_of_date, balance)
+    SELECT account_id, currency, MAX(as_of_date), balance FROM cash_balances
+    GROUP BY account_id, currency
+    """,
+]
+
+# Columns added after a table was first released: CREATE TABLE IF NOT EXISTS
+# leaves existing tables alone, so init_db adds these where missing.
+ADDED_COLUMNS = {
+    "latest_prices": {"version": "INTEGER NOT NULL DEFAULT 0"},
+    "compliance_snapshots": {"value": "REAL", "threshold": "REAL"},
+    "actions": {"source": "TEXT"},
+}
+
+
+def _ensure_columns(conn, table: str, columns: dict[str, str]) -> None:
+    """ALTER TABLE ADD COLUMN for any of columns (name → type/default DDL) missing from table."""
+    existing = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+    for name, ddl in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+
+
 def init_db(db_path=None):
-    """Create all tables and indexes. Safe to run repeatedly (IF NOT EXISTS)."""
+    """Create all tables, indexes and triggers. Safe to run repeatedly.
+
+    Triggers are dropped and recreated so an upgraded definition replaces the
+    old one, and the latest_* tables are re-derived from history — re-running
+    `towsand init` brings an existing database up to the current schema.
+    """
     with get_connection(db_path) as conn:
         for ddl in TABLES:
             conn.execute(ddl)
+        for table, columns in ADDED_COLUMNS.items():
+            _ensure_columns(conn, table, columns)
         for idx in INDEXES:
             conn.execute(idx)
+        for name, body in TRIGGERS.items():
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(f"CREATE TRIGGER {name} {body}")
+        for backfill in BACKFILLS:
+            conn.execute(backfill)
+        conn.executemany(
+            "INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)",
+            [(t,) for t in VERSIONED_TABLES],
+        )
+        # Random per-database token: a recreated database never matches a stale cache
+        conn.execute(
+            "INSERT OR IGNORE INTO table_versions (table_name, version) "
+            "VALUES ('__database__', abs(random()))"
+        )
         conn.execute(
-            "INSERT OR IGNORE INTO parameters (key, value, description) VALUES (?, ?, ?)",
+            "INSERT INTO parameters (key, value, description) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = datetime('now')",
             ("schema_version", str(SCHEMA_VERSION), "Current database schema version"),
         )
     return True
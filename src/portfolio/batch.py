@@ -0,0 +1,327 @@
+"""Batch what-if projection.
+
+Applies N candidate trade lists to one base portfolio in a single call.
+The candidates share one line table — the base holdings followed by every
+new instrument bought by any candidate — and each candidate stores only its
+changes, CSR-style: candidate i touches line_index[indptr[i]:indptr[i+1]]
+by deltas[indptr[i]:indptr[i+1]] AUD, plus a net cash delta.
+
+Instrument metadata for new tickers is resolved with one query for the
+whole batch. Aggregates come back as N × category matrices (one matrix
+product per dimension); portfolio(i) materialises a single candidate as a
+PortfolioValuation, identical to project_valuation() for that trade list.
+"""
+
+import logging
+from copy import copy
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.db.connection import get_connection
+from src.portfolio.columns import PortfolioColumns
+from src.portfolio.fx import FxRateBook
+from src.portfolio.valuation import HoldingValue, PortfolioValuation
+
+logger = logging.getLogger(__name__)
+
+# Trade-dict keys that describe a new instrument (as opposed to notes etc.)
+METADATA_KEYS = (
+    "currency", "instrument_type", "capital_role", "corporate_group",
+    "asset_class", "economic_currency", "macro_drivers",
+)
+
+
+def resolve_instruments(conn, tickers) -> dict:
+    """Instrument, classification and latest price rows for tickers, in one query."""
+    tickers = list(tickers)
+    if not tickers:
+        return {}
+    marks = ",".join("?" * len(tickers))
+    rows = conn.execute(f"""
+        SELECT i.ticker, i.name, i.instrument_type, i.exchange,
+               i.currency, i.country_domicile,
+               ic.capital_role, ic.macro_drivers, ic.corporate_group,
+               ic.asset_class, ic.economic_currency,
+               lp.close_price, lp.date AS price_date
+        FROM instruments i
+        LEFT JOIN instrument_classifications ic ON ic.instrument_id = i.id
+        LEFT JOIN latest_prices lp ON lp.instrument_id = i.id
+        WHERE i.ticker IN ({marks})
+    """, tickers).fetchall()
+    return {r["ticker"]: r for r in rows}
+
+
+def new_holding(ticker: str, amount_aud: float, row, overrides: dict,
+                fx_book: FxRateBook) -> HoldingValue:
+    """HoldingValue for a projected buy of an instrument not currently held.
+
+    Uses the database row when the instrument is known, otherwise the
+    trade-spec metadata alone.
+    """
+    if row is None:
+        currency = overrides.get("currency", "AUD")
+        return HoldingValue(
+            ticker=ticker, name=ticker,
+            instrument_type=overrides.get("instrument_type", "etf"),
+            exchange=None,
+            currency=currency, country=None,
+            account_name="(projected)", institution_name="(projected)",
+            quantity=0, price=0, price_date="",
+            local_value=amount_aud, fx_rate=1.0, value_aud=amount_aud,
+            capital_role=overrides.get("capital_role"),
+            macro_drivers=overrides.get("macro_drivers"),
+            corporate_group=overrides.get("corporate_group"),
+            asset_class=overrides.get("asset_class"),
+            economic_currency=overrides.get("economic_currency", currency),
+        )
+
+    currency = overrides.get("currency", row["currency"])
+    fx_rate = fx_book.rate(currency) or 1.0
+    local_value = amount_aud / fx_rate
+    price = row["close_price"] or 0
+    quantity = local_value / price if price > 0 else 0
+    return HoldingValue(
+        ticker=row["ticker"],
+        name=row["name"] or ticker,
+        instrument_type=overrides.get("instrument_type", row["instrument_type"]),
+        exchange=row["exchange"],
+        currency=currency,
+        country=row["country_domicile"],
+        account_name="(projected)",
+        institution_name="(projected)",
+        quantity=quantity,
+        price=price,
+        price_date=row["price_date"] or "",
+        local_value=local_value,
+        fx_rate=fx_rate,
+        value_aud=amount_aud,
+        capital_role=overrides.get("capital_role", row["capital_role"]),
+        macro_drivers=row["macro_drivers"],
+        corporate_group=overrides.get("corporate_group", row["corporate_group"]),
+        asset_class=overrides.get("asset_class", row["asset_class"]),
+        economic_currency=overrides.get("economic_currency", row["economic_currency"]),
+    )
+
+
+@dataclass
+class _NewLine:
+    """A new-instrument line shared by every candidate buying it with the same metadata."""
+    ticker: str
+    row: object                 # sqlite3.Row, or None if not in the database
+    overrides: dict
+
+
+@dataclass
+class BatchProjection:
+    """N projected portfolios stored as sparse changes against one base."""
+    base: PortfolioValuation
+    lines: list[HoldingValue]           # base holdings, then new-instrument templates
+    indptr: np.ndarray                  # (N + 1,) offsets into line_index / deltas
+    line_index: np.ndarray              # line touched by each change
+    deltas: np.ndarray                  # AUD change per entry
+    cash_delta: np.ndarray              # (N,) net AUD cash flow per candidate
+    fx_book: FxRateBook | None = field(default=None, repr=False)
+    _new_lines: dict[int, _NewLine] = field(default_factory=dict, repr=False)
+    _columns: PortfolioColumns | None = field(default=None, repr=False)
+    _values: np.ndarray | None = field(default=None, repr=False)
+    _memberships: dict[str, tuple[list, np.ndarray]] = field(default_factory=dict, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.cash_delta)
+
+    @property
+    def columns(self) -> PortfolioColumns:
+        """Categorical codes over the shared lines (+ base investable cash)."""
+        if self._columns is None:
+            self._columns = PortfolioColumns.build(self.lines, self.base.cash)
+        return self._columns
+
+    # ── Values ──────────────────────────────────────────────────────────
+
+    def values_matrix(self) -> np.ndarray:
+        """N × lines matrix of projected AUD values; sold-out lines are 0."""
+        if self._values is None:
+            n_base = len(self.base.holdings)
+            base = np.zeros(len(self.lines))
+            base[:n_base] = [h.value_aud for h in self.base.holdings]
+            values = np.tile(base, (len(self), 1))
+            rows = np.repeat(np.arange(len(self)), np.diff(self.indptr))
+            values[rows, self.line_index] += self.deltas
+            values[values <= 0] = 0.0
+            self._values = values
+        return self._values
+
+    def investable_cash_matrix(self) -> np.ndarray:
+        """N × investable-cash-line matrix of AUD values, net trade flow applied.
+
+        As in project_valuation(), the whole flow goes to the first investable
+        balance; with no investable cash it is dropped.
+        """
+        cash = [c for c in self.base.cash if c.is_investable]
+        values = np.tile(np.array([c.value_aud for c in cash], dtype=float), (len(self), 1))
+        if cash:
+            values[:, 0] += self.cash_delta
+        return values
+
+    def total_holdings_aud(self) -> np.ndarray:
+        return self.values_matrix().sum(axis=1)
+
+    def investable_cash_aud(self) -> np.ndarray:
+        return self.investable_cash_matrix().sum(axis=1)
+
+    def total_aud(self) -> np.ndarray:
+        """Total investable assets per candidate (holdings + investable cash)."""
+        return self.total_holdings_aud() + self.investable_cash_aud()
+
+    # ── Aggregates ──────────────────────────────────────────────────────
+
+    def _membership(self, dimension: str) -> tuple[list, np.ndarray]:
+        """Categories and a (lines [+ investable cash]) × categories 0/1 matrix."""
+        found = self._memberships.get(dimension)
+        if found is None:
+            cols = self.columns
+            categories, codes = cols.categories[dimension], cols.codes[dimension]
+            if dimension == "macro_driver":
+                # A line counts fully towards each of its drivers
+                matrix = np.zeros((len(self.lines), len(categories)))
+                np.add.at(matrix, (cols.driver_rows, codes), 1.0)
+            else:
+                matrix = np.zeros((len(codes), len(categories)))
+                matrix[np.arange(len(codes)), codes] = 1.0
+            found = self._memberships[dimension] = (categories, matrix)
+        return found
+
+    def group_sum(self, dimension: str, include_cash: bool = False) -> tuple[list, np.ndarray]:
+        """Categories and the N × categories matrix of AUD value per category.
+
+        Dimensions are those of PortfolioColumns; with include_cash, investable
+        cash is grouped alongside holdings (currency, institution, account).
+        Categories cover every line in the batch, so a candidate may hold 0.
+        """
+        categories, matrix = self._membership(dimension)
+        values = self.values_matrix()
+        if include_cash:
+            values = np.hstack([values, self.investable_cash_matrix()])
+        return categories, values @ matrix[:values.shape[1]]
+
+    def capital_role_sum(self) -> tuple[list, np.ndarray]:
+        """Per-candidate AUD value by capital role, investable cash in stabiliser."""
+        categories, sums = self.group_sum("capital_role")
+        if "stabiliser" not in categories:
+            categories = categories + ["stabiliser"]
+            sums = np.hstack([sums, np.zeros((len(self), 1))])
+        sums[:, categories.index("stabiliser")] += self.investable_cash_aud()
+        return categories, sums
+
+    # ── Materialisation ─────────────────────────────────────────────────
+
+    def portfolio(self, i: int) -> PortfolioValuation:
+        """Materialise candidate i as a standalone PortfolioValuation."""
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        changes = dict(zip(self.line_index[start:stop].tolist(), self.deltas[start:stop].tolist()))
+        projected = PortfolioValuation(fx_book=self.fx_book)
+
+        for j, h in enumerate(self.base.holdings):
+            new_value = h.value_aud + changes.get(j, 0)
+            if new_value <= 0:
+                continue  # fully sold
+            scale = new_value / h.value_aud if h.value_aud > 0 else 0
+            held = copy(h)
+            held.quantity = h.quantity * scale
+            held.local_value = h.local_value * scale
+            held.value_aud = new_value
+            projected.holdings.append(held)
+
+        for j, amount_aud in changes.items():
+            line = self._new_lines.get(j)
+            if line is not None:
+                projected.holdings.append(
+                    new_holding(line.ticker, amount_aud, line.row, line.overrides, self.fx_book))
+
+        projected.cash = [copy(cv) for cv in self.base.cash]
+        net_cash_delta = float(self.cash_delta[i])
+        if net_cash_delta != 0:
+            for cv in projected.cash:
+                if cv.is_investable:
+                    cv.balance += net_cash_delta / cv.fx_rate
+                    cv.value_aud += net_cash_delta
+                    break
+        return projected
+
+
+def project_batch(
+    pv: PortfolioValuation,
+    trade_lists: list[list[dict]],
+    db_path=None,
+) -> BatchProjection:
+    """Apply N candidate trade lists to a portfolio in one pass.
+
+    Each trade list has the format accepted by project_valuation(). Trades on
+    a held ticker change every holding of that ticker; buys of tickers not
+    held become new lines, resolved against the database once for the batch.
+    """
+    n_base = len(pv.holdings)
+    base_lines: dict[str, list[int]] = {}
+    for j, h in enumerate(pv.holdings):
+        base_lines.setdefault(h.ticker, []).append(j)
+
+    trade_maps: list[dict[str, float]] = []
+    override_maps: list[dict[str, dict]] = []
+    for trades in trade_lists:
+        trade_map: dict[str, float] = {}
+        overrides: dict[str, dict] = {}
+        for t in trades:
+            trade_map[t["ticker"]] = trade_map.get(t["ticker"], 0) + t["delta_aud"]
+            overrides[t["ticker"]] = t
+        trade_maps.append(trade_map)
+        override_maps.append(overrides)
+
+    new_tickers = {t for tm in trade_maps for t, d in tm.items() if t not in base_lines and d > 0}
+    fx_book = pv.fx_book
+    rows: dict = {}
+    if new_tickers:
+        with get_connection(db_path) as conn:
+            fx_book = fx_book or FxRateBook.load(conn)
+            rows = resolve_instruments(conn, sorted(new_tickers))
+        for ticker in sorted(new_tickers - rows.keys()):
+            logger.warning(
+                "Instrument %s not in database — using trade-spec metadata for projection",
+                ticker,
+            )
+
+    lines = list(pv.holdings)
+    new_lines: dict[int, _NewLine] = {}
+    new_line_ids: dict[tuple, int] = {}
+    indptr, line_index, deltas, cash_delta = [0], [], [], []
+    for trade_map, overrides in zip(trade_maps, override_maps):
+        for ticker, delta in trade_map.items():
+            if ticker in base_lines:
+                for j in base_lines[ticker]:
+                    line_index.append(j)
+                    deltas.append(delta)
+            elif delta > 0:
+                spec = {k: overrides[ticker][k] for k in METADATA_KEYS if k in overrides[ticker]}
+                key = (ticker, tuple(sorted(spec.items())))
+                j = new_line_ids.get(key)
+                if j is None:
+                    j = new_line_ids[key] = len(lines)
+                    new_lines[j] = _NewLine(ticker, rows.get(ticker), spec)
+                    lines.append(new_holding(ticker, 0.0, rows.get(ticker), spec, fx_book))
+                line_index.append(j)
+                deltas.append(delta)
+        indptr.append(len(line_index))
+        cash_delta.append(-sum(trade_map.values()))  # negative delta_aud = sell = cash in
+
+    logger.debug("Projected %d candidates over %d lines (%d new)",
+                 len(trade_lists), len(lines), len(lines) - n_base)
+    return BatchProjection(
+        base=pv,
+        lines=lines,
+        indptr=np.array(indptr, dtype=np.intp),
+        line_index=np.array(line_index, dtype=np.intp),
+        deltas=np.array(deltas, dtype=float),
+        cash_delta=np.array(cash_delta, dtype=float),
+        fx_book=fx_book,
+        _new_lines=new_lines,
+    )
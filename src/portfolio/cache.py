@@ -0,0 +1,130 @@
+"""On-disk cache of the last PortfolioValuation.
+
+compute_valuation() is deterministic in the database contents, so its
+result can be reused until something it reads changes. Triggers bump a
+per-table counter in table_versions on every row change (see init_schema);
+the counters plus a random per-database token form the cache fingerprint.
+PRAGMA data_version is not used: it only reports changes made by other
+connections and is not comparable across processes.
+
+The cache lives next to the database (towsand.db → towsand.valuation.pkl)
+and holds a single entry. When only prices or FX rates changed since it
+was written, the cached valuation is patched incrementally; any other
+change, or an unreadable file, means a full recompute.
+"""
+
+import logging
+import os
+import pickle
+from datetime import date
+from pathlib import Path
+
+from src.db.connection import DEFAULT_DB_PATH, get_connection
+from src.portfolio.fx import FxRateBook
+from src.portfolio.valuation import PortfolioValuation, apply_market_updates, compute_valuation
+
+logger = logging.getLogger(__name__)
+
+# Tables whose changes can be applied to a cached valuation incrementally
+MARKET_TABLES = {"prices", "fx_rates"}
+
+
+def cache_path(db_path=None) -> Path:
+    """Cache file for a database."""
+    path = Path(db_path) if db_path else DEFAULT_DB_PATH
+    return path.with_suffix(".valuation.pkl")
+
+
+def data_fingerprint(conn) -> tuple:
+    """Snapshot of the table change counters; equal fingerprints mean unchanged data."""
+    return tuple(
+        (r["table_name"], r["version"])
+        for r in conn.execute("SELECT table_name, version FROM table_versions ORDER BY table_name")
+    )
+
+
+def _read_cache(path: Path) -> tuple | None:
+    """(key, PortfolioValuation) from the cache file, or None if absent or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:  # corrupt or from an incompatible code version
+        logger.debug("Ignoring unreadable valuation cache %s: %s", path, exc)
+        return None
+
+
+def _write_cache(path: Path, key: tuple, pv: PortfolioValuation) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump((key, pv), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError as exc:
+        logger.warning("Could not write valuation cache %s: %s", path, exc)
+
+
+def _update_market_data(conn, cached_key: tuple, key: tuple, pv: PortfolioValuation) -> bool:
+    """Bring a cached current valuation up to date in place if only prices/FX changed.
+
+    Fetches the instruments repriced since the cached prices counter and
+    reloads the FX book, then lets apply_market_updates() revalue just the
+    affected lines. Returns False if anything else changed (holdings, cash,
+    classifications, ...) or a price history vanished, which need a full
+    revaluation.
+    """
+    old_versions, old_priced, old_as_of = cached_key
+    versions, priced, as_of = key
+    if as_of is not None or old_as_of is not None or priced != old_priced:
+        return False
+    old, new = dict(old_versions), dict(versions)
+    if old.keys() != new.keys() or any(old[t] != new[t] for t in new if t not in MARKET_TABLES):
+        return False
+
+    prices = {}
+    if new["prices"] != old["prices"]:
+        # Rows changed while the counter was at old["prices"] may predate the cache;
+        # re-applying them is harmless, missing them is not.
+        prices = {
+            r["ticker"]: (r["close_price"] or 0, r["date"])
+            for r in conn.execute("""
+                SELECT i.ticker, lp.close_price, lp.date
+                FROM latest_prices lp
+                JOIN instruments i ON i.id = lp.instrument_id
+                WHERE lp.version >= ?
+            """, (old["prices"],))
+        }
+    fx_book = FxRateBook.load(conn) if new["fx_rates"] != old["fx_rates"] else None
+    revalued = apply_market_updates(pv, prices, fx_book)
+    logger.debug("Incremental revaluation: %d new prices, %d lines revalued", len(prices), revalued)
+    return True
+
+
+def cached_valuation(db_path=None, as_of: date | str | None = None) -> PortfolioValuation:
+    """compute_valuation(), reusing the cached result while the database is unchanged.
+
+    If only prices or FX rates changed since the cached (current) valuation,
+    it is revalued incrementally instead of recomputed.
+    """
+    as_of = as_of.isoformat() if isinstance(as_of, date) else as_of
+    path = cache_path(db_path)
+    cached = _read_cache(path)
+
+    with get_connection(db_path) as conn:
+        priced = conn.execute("SELECT COUNT(*) FROM latest_prices").fetchone()[0]
+        key = (data_fingerprint(conn), priced, as_of)
+        if cached is not None:
+            cached_key, pv = cached
+            if cached_key == key:
+                logger.debug("Valuation cache hit (%s)", path)
+                return pv
+            if _update_market_data(conn, cached_key, key, pv):
+                _write_cache(path, key, pv)
+                return pv
+
+    # Fingerprint was taken before computing: a concurrent write leaves the
+    # stored key stale, so the next call recomputes rather than reusing it.
+    pv = compute_valuation(db_path, as_of=as_of)
+    _write_cache(path, key, pv)
+    return pv
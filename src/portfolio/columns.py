@@ -0,0 +1,202 @@
+"""Columnar backing store for PortfolioValuation aggregates.
+
+Holds holding and cash values as NumPy arrays with categorical codes for
+each grouping dimension (role, currency, institution, ...). Every group-by
+is a single np.bincount over the codes, computed once and memoised — the
+compliance, sensitivity and stress code call the same aggregates many
+times per portfolio.
+
+The HoldingValue / CashValue lists on PortfolioValuation remain the source
+of truth; a PortfolioColumns instance is a snapshot of them, patched in
+place (patch()) when an incremental revaluation changes a few values.
+"""
+
+import json
+import sys
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import numpy as np
+
+
+def factorize(labels: list) -> tuple[list, np.ndarray]:
+    """Map labels to integer codes. Categories keep first-seen order."""
+    index: dict = {}
+    codes = np.fromiter((index.setdefault(x, len(index)) for x in labels),
+                        dtype=np.intp, count=len(labels))
+    return list(index), codes
+
+
+@lru_cache(maxsize=None)
+def parse_macro_drivers(raw: str | None) -> tuple[str, ...]:
+    """Decode a macro_drivers JSON list into a tuple of interned driver names.
+
+    Empty on missing or malformed input. Cached per distinct raw string, so
+    each tag list is parsed once per process however many holdings,
+    projections or stress copies carry it.
+    """
+    if not raw:
+        return ()
+    try:
+        drivers = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return ()
+    if not isinstance(drivers, list):
+        return ()
+    return tuple(sys.intern(d) for d in drivers if isinstance(d, str))
+
+
+@dataclass
+class PortfolioColumns:
+    """Value arrays + categorical codes for one portfolio snapshot.
+
+    Codes for cash-inclusive dimensions (currency, institution, account) run
+    over holdings followed by investable cash balances, so the first
+    categories are exactly those present in holdings.
+    """
+    holding_values: np.ndarray
+    cash_values: np.ndarray
+    cash_investable: np.ndarray                                 # bool mask over cash_values
+    categories: dict[str, list] = field(default_factory=dict)        # dimension → category labels
+    codes: dict[str, np.ndarray] = field(default_factory=dict)       # dimension → codes
+    driver_rows: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.intp))
+    _source: tuple = field(default=(), repr=False)
+    _aggregates: dict[str, dict[str, float]] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def build(cls, holdings: list, cash: list) -> "PortfolioColumns":
+        """Snapshot holdings and cash into column arrays."""
+        investable_cash = [c for c in cash if c.is_investable]
+        labels = {
+            "capital_role": [h.capital_role or "unclassified" for h in holdings],
+            "instrument_type": [h.instrument_type for h in holdings],
+            "country": [h.country or "Unknown" for h in holdings],
+            "currency": [h.currency for h in holdings] + [c.currency for c in investable_cash],
+            "institution": ([h.institution_name for h in holdings]
+                            + [c.institution_name for c in investable_cash]),
+            "account": [h.account_name for h in holdings] + [c.account_name for c in investable_cash],
+        }
+        cols = cls(
+            holding_values=np.array([h.value_aud for h in holdings], dtype=float),
+            cash_values=np.array([c.value_aud for c in cash], dtype=float),
+            cash_investable=np.array([c.is_investable for c in cash], dtype=bool),
+            _source=(holdings, len(holdings), cash, len(cash)),
+        )
+        for dimension, dim_labels in labels.items():
+            cols.categories[dimension], cols.codes[dimension] = factorize(dim_labels)
+
+        # Macro drivers exploded to (holding row, driver code) pairs; untagged holdings
+        # count once under "untagged".
+        exploded = [(i, d) for i, h in enumerate(holdings)
+                    for d in (h.drivers or ("untagged",))]
+        cols.driver_rows = np.array([i for i, _ in exploded], dtype=np.intp)
+        cols.categories["macro_driver"], cols.codes["macro_driver"] = factorize(
+            [d for _, d in exploded])
+        return cols
+
+    def matches(self, holdings: list, cash: list) -> bool:
+        """True while the snapshot still reflects these lists (same objects, same length)."""
+        src_holdings, n_holdings, src_cash, n_cash = self._source
+        return (src_holdings is holdings and n_holdings == len(holdings)
+                and src_cash is cash and n_cash == len(cash))
+
+    def patch(self, holding_values: dict[int, float], cash_values: dict[int, float]) -> None:
+        """Set new values for some rows, adjusting memoised aggregates by the difference.
+
+        Keys are row indexes into holding_values / cash_values. Categories
+        are unchanged, so each cached group-by only needs the deltas of the
+        changed rows added to their categories.
+        """
+        h_rows = np.fromiter(holding_values, dtype=np.intp, count=len(holding_values))
+        h_new = np.fromiter(holding_values.values(), dtype=float, count=len(holding_values))
+        h_deltas = h_new - self.holding_values[h_rows]
+        self.holding_values[h_rows] = h_new
+        c_rows = np.fromiter(cash_values, dtype=np.intp, count=len(cash_values))
+        c_new = np.fromiter(cash_values.values(), dtype=float, count=len(cash_values))
+        c_deltas = c_new - self.cash_values[c_rows]
+        self.cash_values[c_rows] = c_new
+
+        # Investable cash rows sit after the holdings in cash-inclusive codes
+        investable = self.cash_investable[c_rows]
+        inv_rows = len(self.holding_values) + (np.cumsum(self.cash_investable) - 1)[c_rows[investable]]
+
+        for key, sums in list(self._aggregates.items()):
+            dimension, _, extra = key.partition("+")
+            if extra == "stabiliser_cash":
+                del self._aggregates[key]  # derived from capital_role; cheap to rebuild
+                continue
+            if dimension == "macro_driver":
+                row_deltas = np.zeros(len(self.holding_values))
+                row_deltas[h_rows] = h_deltas
+                touched = np.isin(self.driver_rows, h_rows)
+                codes = self.codes[dimension][touched]
+                deltas = row_deltas[self.driver_rows[touched]]
+            elif extra == "cash":
+                codes = self.codes[dimension][np.concatenate([h_rows, inv_rows])]
+                deltas = np.concatenate([h_deltas, c_deltas[investable]])
+            else:
+                codes, deltas = self.codes[dimension][h_rows], h_deltas
+            categories = self.categories[dimension]
+            for code, delta in zip(codes.tolist(), deltas.tolist()):
+                sums[categories[code]] += delta
+
+    # ── Totals ──────────────────────────────────────────────────────────
+
+    @property
+    def total_holdings(self) -> float:
+        return float(self.holding_values.sum())
+
+    @property
+    def total_cash(self) -> float:
+        return float(self.cash_values.sum())
+
+    @property
+    def investable_cash(self) -> float:
+        return float(self.cash_values[self.cash_investable].sum())
+
+    @property
+    def non_investable_cash(self) -> float:
+        return float(self.cash_values[~self.cash_investable].sum())
+
+    # ── Group-bys ───────────────────────────────────────────────────────
+
+    def group_sum(self, dimension: str, include_cash: bool = False) -> dict[str, float]:
+        """AUD value per category of a dimension, memoised per (dimension, include_cash).
+
+        With include_cash, investable cash balances are grouped alongside holdings.
+        """
+        key = f"{dimension}+cash" if include_cash else dimension
+        cached = self._aggregates.get(key)
+        if cached is None:
+            categories, codes = self.categories[dimension], self.codes[dimension]
+            n = len(self.holding_values)
+            if include_cash:
+                values = np.concatenate([self.holding_values, self.cash_values[self.cash_investable]])
+            else:
+                codes, values = codes[:n], self.holding_values
+                categories = categories[:int(codes.max()) + 1] if n else []
+            sums = np.bincount(codes, weights=values, minlength=len(categories))
+            cached = self._aggregates[key] = dict(zip(categories, sums.tolist()))
+        return dict(cached)
+
+    def capital_role_sum(self) -> dict[str, float]:
+        """AUD value per capital role, with investable cash allocated to stabiliser."""
+        cached = self._aggregates.get("capital_role+stabiliser_cash")
+        if cached is None:
+            cached = self.group_sum("capital_role")
+            inv_cash = self.investable_cash
+            if inv_cash:
+                cached["stabiliser"] = cached.get("stabiliser", 0) + inv_cash
+            self._aggregates["capital_role+stabiliser_cash"] = cached
+        return dict(cached)
+
+    def macro_driver_sum(self) -> dict[str, float]:
+        """AUD value per macro driver; a holding counts fully towards each of its drivers."""
+        cached = self._aggregates.get("macro_driver")
+        if cached is None:
+            categories = self.categories["macro_driver"]
+            sums = np.bincount(self.codes["macro_driver"],
+                               weights=self.holding_values[self.driver_rows],
+                               minlength=len(categories))
+            cached = self._aggregates["macro_driver"] = dict(zip(categories, sums.tolist()))
+        return dict(cached)
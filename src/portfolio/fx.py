@@ -0,0 +1,88 @@
+"""In-memory FX rate book.
+
+Loads the latest rate for every stored currency pair in a single query and
+answers conversions from memory. Rates not stored directly are derived:
+
+  - inverse pairs (AUD→USD from USD→AUD)
+  - cross rates through the pivot currency (GBP→EUR via GBP→AUD→EUR)
+
+A derived rate is only as fresh as its oldest leg, so the reported date of
+a cross rate is the earlier of the two leg dates.
+"""
+
+import logging
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+PIVOT_CURRENCY = "AUD"
+
+
+@dataclass
+class FxRateBook:
+    """Latest FX rate per (from_currency, to_currency) pair."""
+    rates: dict[tuple[str, str], tuple[float, str]] = field(default_factory=dict)
+    pivot: str = PIVOT_CURRENCY
+
+    @classmethod
+    def load(cls, conn, pivot: str = PIVOT_CURRENCY, as_of: str | None = None) -> "FxRateBook":
+        """Load the latest stored rate for every currency pair in one query.
+
+        Current rates come from the trigger-maintained latest_fx_rates table.
+        With as_of (ISO date), loads the last rate on or before that date.
+        """
+        if as_of is None:
+            rows = conn.execute(
+                "SELECT from_currency, to_currency, rate, date FROM latest_fx_rates"
+            ).fetchall()
+        else:
+            # SQLite returns the bare columns (rate) from the row holding MAX(date).
+            rows = conn.execute("""
+                SELECT from_currency, to_currency, rate, MAX(date) AS date
+                FROM fx_rates
+                WHERE date <= ?
+                GROUP BY from_currency, to_currency
+            """, (as_of,)).fetchall()
+        book = cls(pivot=pivot)
+        for r in rows:
+            if r["rate"]:
+                book.rates[(r["from_currency"], r["to_currency"])] = (r["rate"], r["date"])
+        return book
+
+    def _lookup(self, from_currency: str, to_currency: str) -> tuple[float, str] | None:
+        """Direct or inverse quote for a pair (no cross derivation)."""
+        direct = self.rates.get((from_currency, to_currency))
+        if direct:
+            return direct
+        inverse = self.rates.get((to_currency, from_currency))
+        if inverse:
+            return 1.0 / inverse[0], inverse[1]
+        return None
+
+    def quote(self, from_currency: str, to_currency: str = PIVOT_CURRENCY) -> tuple[float, str] | None:
+        """Return (rate, date) for a pair, deriving inverse/cross rates if needed.
+
+        Same-currency quotes return (1.0, "") — there is no date to report.
+        """
+        if from_currency == to_currency:
+            return 1.0, ""
+        found = self._lookup(from_currency, to_currency)
+        if found:
+            return found
+        if self.pivot in (from_currency, to_currency):
+            return None
+        leg1 = self._lookup(from_currency, self.pivot)
+        leg2 = self._lookup(self.pivot, to_currency)
+        if not leg1 or not leg2:
+            return None
+        return leg1[0] * leg2[0], min(leg1[1], leg2[1])
+
+    def rate(self, from_currency: str, to_currency: str = PIVOT_CURRENCY) -> float | None:
+        """Get the latest rate for a currency pair, or None if unavailable."""
+        found = self.quote(from_currency, to_currency)
+        return found[0] if found else None
+
+    def rate_date(self, from_currency: str, to_currency: str = PIVOT_CURRENCY) -> str | None:
+        """Get the date of the latest rate for a currency pair, or None if unavailable."""
+        found = self.quote(from_currency, to_currency)
+        return found[1] if found else None
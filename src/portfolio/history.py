@@ -0,0 +1,228 @@
+"""NAV history engine.
+
+Builds a daily AUD NAV series for the whole portfolio in one pass, instead
+of calling compute_valuation() once per day:
+
+  1. Load the price, FX and cash-balance panels once (date × instrument,
+     date × currency, date × cash line) and forward-fill them.
+  2. Multiply by a date × holding quantity matrix in NumPy.
+  3. Group the resulting line values by capital role, currency and
+     institution with one matrix product per breakdown.
+
+Holdings carry no history, so current quantities are applied to every date
+(masked before date_acquired where known) — the series answers "what would
+today's positions have been worth", the same convention as
+compute_valuation(as_of=...). Cash uses its recorded balance history.
+Totals follow PortfolioValuation.total_aud: holdings + investable cash,
+with investable cash allocated to the stabiliser role.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.db.connection import get_connection
+from src.portfolio.valuation import excluded_account_ids
+
+logger = logging.getLogger(__name__)
+
+BASE_CURRENCY = "AUD"
+
+
+@dataclass
+class NavHistory:
+    """Daily AUD NAV with its breakdowns, all indexed by date."""
+    nav: pd.Series = field(default_factory=lambda: pd.Series(dtype=float))
+    by_capital_role: pd.DataFrame = field(default_factory=pd.DataFrame)
+    by_currency: pd.DataFrame = field(default_factory=pd.DataFrame)
+    by_institution: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Flatten into one wide frame: nav, role:*, currency:*, institution:* columns."""
+        parts = [self.nav.rename("nav").to_frame()]
+        for prefix, df in (("role", self.by_capital_role),
+                           ("currency", self.by_currency),
+                           ("institution", self.by_institution)):
+            parts.append(df.add_prefix(f"{prefix}:"))
+        frame = pd.concat(parts, axis=1)
+        frame.index.name = "date"
+        return frame
+
+    def write(self, path: str | Path, chunk_rows: int = 1000) -> int:
+        """Stream the flattened series to CSV or Parquet (by file suffix).
+
+        Writes chunk_rows dates at a time so long histories never need a
+        second full copy in memory. Returns the number of rows written.
+        """
+        path = Path(path)
+        frame = self.to_frame()
+        frame.index = frame.index.strftime("%Y-%m-%d")
+
+        if path.suffix == ".parquet":
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError as exc:
+                raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)") from exc
+            writer = None
+            try:
+                for start in range(0, len(frame), chunk_rows):
+                    table = pa.Table.from_pandas(frame.iloc[start:start + chunk_rows])
+                    if writer is None:
+                        writer = pq.ParquetWriter(str(path), table.schema)
+                    writer.write_table(table)
+            finally:
+                if writer is not None:
+                    writer.close()
+        else:
+            with open(path, "w", newline="") as f:
+                for start in range(0, len(frame), chunk_rows):
+                    frame.iloc[start:start + chunk_rows].to_csv(f, header=(start == 0))
+
+        return len(frame)
+
+
+def _group_matrix(labels: list[str]) -> tuple[list[str], np.ndarray]:
+    """One-hot line → group matrix (lines × groups), groups in first-seen order."""
+    groups = list(dict.fromkeys(labels))
+    index = {g: i for i, g in enumerate(groups)}
+    matrix = np.zeros((len(labels), len(groups)))
+    matrix[np.arange(len(labels)), [index[g] for g in labels]] = 1.0
+    return groups, matrix
+
+
+def _fx_panel(conn, currencies: set[str], end: str | None) -> pd.DataFrame:
+    """Date × currency panel of rates to AUD (direct quotes preferred over inverses)."""
+    currencies = sorted(currencies - {BASE_CURRENCY})
+    if not currencies:
+        return pd.DataFrame()
+    marks = ",".join("?" * len(currencies))
+    rows = conn.execute(f"""
+        SELECT from_currency, to_currency, date, rate FROM fx_rates
+        WHERE ((to_currency = ? AND from_currency IN ({marks}))
+            OR (from_currency = ? AND to_currency IN ({marks})))
+          AND (? IS NULL OR date <= ?) AND rate > 0
+    """, (BASE_CURRENCY, *currencies, BASE_CURRENCY, *currencies, end, end)).fetchall()
+    if not rows:
+        return pd.DataFrame()
+
+    df = pd.DataFrame([tuple(r) for r in rows], columns=["from", "to", "date", "rate"])
+    direct = df[df["to"] == BASE_CURRENCY].pivot(index="date", columns="from", values="rate")
+    inverse = df[df["from"] == BASE_CURRENCY].pivot(index="date", columns="to", values="rate")
+    panel = direct.combine_first(1.0 / inverse) if not inverse.empty else direct
+    panel.index = pd.DatetimeIndex(panel.index)
+    return panel
+
+
+def compute_nav_history(
+    start: date | str | None = None, end: date | str | None = None, db_path=None,
+) -> NavHistory:
+    """Compute the daily AUD NAV and its breakdowns over the stored price history."""
+    start = start.isoformat() if isinstance(start, date) else start
+    end = end.isoformat() if isinstance(end, date) else end
+
+    with get_connection(db_path) as conn:
+        lines = conn.execute("""
+            SELECT h.instrument_id, i.ticker, i.currency, h.quantity, h.date_acquired,
+                   COALESCE(ic.capital_role, 'unclassified') AS capital_role,
+                   inst.name AS institution_name
+            FROM holdings h
+            JOIN instruments i ON i.id = h.instrument_id
+            JOIN accounts a ON a.id = h.account_id
+            JOIN institutions inst ON inst.id = a.institution_id
+            LEFT JOIN instrument_classifications ic ON ic.instrument_id = i.id
+            ORDER BY i.ticker
+        """).fetchall()
+
+        price_rows = conn.execute("""
+            SELECT instrument_id, date, close_price FROM prices
+            WHERE instrument_id IN (SELECT instrument_id FROM holdings)
+              AND (? IS NULL OR date <= ?)
+        """, (end, end)).fetchall()
+
+        exclude_ids = excluded_account_ids(conn)
+        cash_rows = conn.execute("""
+            SELECT cb.account_id, cb.currency, cb.as_of_date, cb.balance,
+                   inst.name AS institution_name
+            FROM cash_balances cb
+            JOIN accounts a ON a.id = cb.account_id
+            JOIN institutions inst ON inst.id = a.institution_id
+            WHERE ? IS NULL OR cb.as_of_date <= ?
+        """, (end, end)).fetchall()
+        cash_rows = [r for r in cash_rows if r["account_id"] not in exclude_ids]
+
+        currencies = {r["currency"] for r in lines} | {r["currency"] for r in cash_rows}
+        fx = _fx_panel(conn, currencies, end)
+
+    if not price_rows and not cash_rows:
+        return NavHistory()
+
+    # --- Panels (forward-filled over the union of observed dates) ---
+    prices = pd.DataFrame([tuple(r) for r in price_rows], columns=["instrument_id", "date", "close"])
+    prices = prices.pivot(index="date", columns="instrument_id", values="close")
+    prices.index = pd.DatetimeIndex(prices.index)
+
+    cash = pd.DataFrame([tuple(r)[:4] for r in cash_rows],
+                        columns=["account_id", "currency", "date", "balance"])
+    cash = cash.pivot(index="date", columns=["account_id", "currency"], values="balance")
+    cash.index = pd.DatetimeIndex(cash.index)
+
+    dates = prices.index.union(cash.index).union(fx.index)
+    if start:
+        dates = dates[dates >= pd.Timestamp(start)]
+    if len(dates) == 0:
+        return NavHistory()
+
+    prices = prices.reindex(prices.index.union(dates)).ffill().reindex(dates)
+    cash = cash.reindex(cash.index.union(dates)).ffill().reindex(dates).fillna(0.0)
+    fx = fx.reindex(fx.index.union(dates)).ffill().reindex(dates) if not fx.empty else fx
+
+    def fx_matrix(ccys: list[str]) -> np.ndarray:
+        """Date × line matrix of rates to AUD.
+
+        Missing rates fall back to 1.0, as in compute_valuation().
+        """
+        out = np.ones((len(dates), len(ccys)))
+        for j, ccy in enumerate(ccys):
+            if ccy == BASE_CURRENCY:
+                continue
+            if ccy in fx.columns:
+                out[:, j] = fx[ccy].to_numpy()
+            else:
+                logger.warning("No %s/%s rate stored — valued at 1.0", ccy, BASE_CURRENCY)
+        return np.nan_to_num(out, nan=1.0)
+
+    # --- Holdings: quantity matrix × price panel × FX panel ---
+    instrument_ids = [r["instrument_id"] for r in lines]
+    price_matrix = prices.reindex(columns=instrument_ids).to_numpy()
+    quantities = np.tile(np.array([r["quantity"] for r in lines], dtype=float), (len(dates), 1))
+    for j, r in enumerate(lines):
+        if r["date_acquired"]:
+            quantities[dates < pd.Timestamp(r["date_acquired"]), j] = 0.0
+    line_values = np.nan_to_num(quantities * price_matrix, nan=0.0)
+    line_values *= fx_matrix([r["currency"] for r in lines])
+
+    # --- Investable cash lines ---
+    cash_keys = list(cash.columns)
+    cash_values = cash.to_numpy() * fx_matrix([ccy for _, ccy in cash_keys])
+    institution_of = {(r["account_id"], r["currency"]): r["institution_name"] for r in cash_rows}
+
+    values = np.hstack([line_values, cash_values])
+    roles = [r["capital_role"] for r in lines] + ["stabiliser"] * len(cash_keys)
+    ccys = [r["currency"] for r in lines] + [ccy for _, ccy in cash_keys]
+    institutions = [r["institution_name"] for r in lines] + [institution_of[k] for k in cash_keys]
+
+    def breakdown(labels: list[str]) -> pd.DataFrame:
+        groups, matrix = _group_matrix(labels)
+        return pd.DataFrame(values @ matrix, index=dates, columns=groups)
+
+    return NavHistory(
+        nav=pd.Series(values.sum(axis=1), index=dates, name="nav"),
+        by_capital_role=breakdown(roles),
+        by_currency=breakdown(ccys),
+        by_institution=breakdown(institutions),
+    )
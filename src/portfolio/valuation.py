@@ -1,13 +1,17 @@
 """Portfolio valuation engine.
 
 Computes market value in AUD for every holding and cash balance,
-using the latest prices and FX rates from the database.
+using the latest prices and FX rates from the database — or, for a
+point-in-time valuation, the last ones on or before a given date.
 """
 
 import logging
 from dataclasses import dataclass, field
+from datetime import date
 
 from src.db.connection import get_connection
+from src.portfolio.columns import PortfolioColumns, parse_macro_drivers
+from src.portfolio.fx import FxRateBook
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +39,11 @@ class HoldingValue:
     asset_class: str | None = None
     economic_currency: str | None = None
 
+    @property
+    def drivers(self) -> tuple[str, ...]:
+        """Macro drivers parsed from the macro_drivers JSON (parsed once per distinct value)."""
+        return parse_macro_drivers(self.macro_drivers)
+
 
 @dataclass
 class CashValue:
@@ -51,27 +60,47 @@ class CashValue:
 
 @dataclass
 class PortfolioValuation:
-    """Complete portfolio snapshot."""
+    """Complete portfolio snapshot.
+
+    Aggregates are served from a columnar snapshot (PortfolioColumns) built on
+    first use and cached. Appending to or replacing the holdings/cash lists is
+    detected automatically; editing a HoldingValue or CashValue in place is
+    not — call invalidate() afterwards.
+    """
     holdings: list[HoldingValue] = field(default_factory=list)
     cash: list[CashValue] = field(default_factory=list)
+    fx_book: FxRateBook | None = field(default=None, repr=False)  # rates used for conversion
+    _columns: PortfolioColumns | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def columns(self) -> PortfolioColumns:
+        """Columnar view of the holdings and cash, rebuilt when the lists change."""
+        cols = self._columns
+        if cols is None or not cols.matches(self.holdings, self.cash):
+            cols = self._columns = PortfolioColumns.build(self.holdings, self.cash)
+        return cols
+
+    def invalidate(self) -> None:
+        """Drop cached aggregates after editing holdings or cash in place."""
+        self._columns = None
 
     @property
     def total_holdings_aud(self) -> float:
-        return sum(h.value_aud for h in self.holdings)
+        return self.columns.total_holdings
 
     @property
     def total_cash_aud(self) -> float:
-        return sum(c.value_aud for c in self.cash)
+        return self.columns.total_cash
 
     @property
     def investable_cash_aud(self) -> float:
         """Cash included in investable assets (excludes receivables, credit liabilities)."""
-        return sum(c.value_aud for c in self.cash if c.is_investable)
+        return self.columns.investable_cash
 
     @property
     def non_investable_cash_aud(self) -> float:
         """Cash excluded from investable assets (receivables, credit liabilities)."""
-        return sum(c.value_aud for c in self.cash if not c.is_investable)
+        return self.columns.non_investable_cash
 
     @property
     def total_aud(self) -> float:
@@ -85,79 +114,33 @@ class PortfolioValuation:
         Cash balances are allocated to stabiliser: cash satisfies every stabiliser
         criterion (liquid, short duration, yield-bearing) and its optionality value
         is a portfolio-level strategic property, not an instrument payoff shape.
+        Non-investable cash (receivables, credit liabilities) is excluded per §0.
         """
-        result: dict[str, float] = {}
-        for h in self.holdings:
-            role = h.capital_role or "unclassified"
-            result[role] = result.get(role, 0) + h.value_aud
-        # Investable cash → stabiliser: liquid, short-duration, yield-bearing capital
-        # Non-investable (receivables, credit liabilities) excluded per §0.
-        inv_cash = sum(c.value_aud for c in self.cash if c.is_investable)
-        if inv_cash:
-            result["stabiliser"] = result.get("stabiliser", 0) + inv_cash
-        return result
+        return self.columns.capital_role_sum()
 
     def by_instrument_type(self) -> dict[str, float]:
         """Aggregate AUD value by instrument type."""
-        result: dict[str, float] = {}
-        for h in self.holdings:
-            result[h.instrument_type] = result.get(h.instrument_type, 0) + h.value_aud
-        return result
+        return self.columns.group_sum("instrument_type")
 
     def by_currency(self) -> dict[str, float]:
         """Aggregate AUD value by original currency (holdings + investable cash)."""
-        result: dict[str, float] = {}
-        for h in self.holdings:
-            result[h.currency] = result.get(h.currency, 0) + h.value_aud
-        for c in self.cash:
-            if c.is_investable:
-                result[c.currency] = result.get(c.currency, 0) + c.value_aud
-        return result
+        return self.columns.group_sum("currency", include_cash=True)
 
     def by_country(self) -> dict[str, float]:
         """Aggregate AUD value by country domicile (holdings only)."""
-        result: dict[str, float] = {}
-        for h in self.holdings:
-            country = h.country or "Unknown"
-            result[country] = result.get(country, 0) + h.value_aud
-        return result
+        return self.columns.group_sum("country")
 
     def by_institution(self) -> dict[str, float]:
         """Aggregate AUD value by institution (holdings + investable cash)."""
-        result: dict[str, float] = {}
-        for h in self.holdings:
-            result[h.institution_name] = result.get(h.institution_name, 0) + h.value_aud
-        for c in self.cash:
-            if c.is_investable:
-                result[c.institution_name] = result.get(c.institution_name, 0) + c.value_aud
-        return result
+        return self.columns.group_sum("institution", include_cash=True)
 
     def by_account(self) -> dict[str, float]:
         """Aggregate AUD value by account (holdings + investable cash)."""
-        result: dict[str, float] = {}
-        for h in self.holdings:
-            result[h.account_name] = result.get(h.account_name, 0) + h.value_aud
-        for c in self.cash:
-            if c.is_investable:
-                result[c.account_name] = result.get(c.account_name, 0) + c.value_aud
-        return result
+        return self.columns.group_sum("account", include_cash=True)
 
     def by_macro_driver(self) -> dict[str, float]:
         """Aggregate AUD value by macro driver (an instrument may have multiple)."""
-        import json
-        result: dict[str, float] = {}
-        for h in self.holdings:
-            drivers = []
-            if h.macro_drivers:
-                try:
-                    drivers = json.loads(h.macro_drivers)
-                except (json.JSONDecodeError, TypeError):
-                    pass
-            if not drivers:
-                drivers = ["untagged"]
-            for d in drivers:
-                result[d] = result.get(d, 0) + h.value_aud
-        return result
+        return self.columns.macro_driver_sum()
 
 
 def project_valuation(
@@ -186,167 +169,121 @@ def project_valuation(
     For new instruments (not in current holdings), looks up classification
     data from the database and creates a new holding entry.
     Net cash impact (sum of sells minus buys) adjusts investable cash.
+
+    This is a one-candidate batch; see project_batch() for scoring many
+    alternative trade lists at once.
+    """
+    from src.portfolio.batch import project_batch
+
+    return project_batch(pv, [trades], db_path).portfolio(0)
+
+
+def apply_market_updates(
+    pv: PortfolioValuation,
+    prices: dict[str, tuple[float, str]],
+    fx_book: FxRateBook | None = None,
+) -> int:
+    """Revalue in place only the lines affected by new prices or FX rates.
+
+    Args:
+        pv: Valuation to update (typically a cached one).
+        prices: ticker → (close_price, date) for instruments with a new latest price.
+        fx_book: Fresh rate book if FX rates changed; lines whose rate moved are revalued.
+
+    Values follow compute_valuation() exactly, and the cached aggregates are
+    patched by the difference instead of rebuilt. Returns the number of
+    holdings and cash lines revalued.
     """
-    from copy import deepcopy
-
-    projected = PortfolioValuation()
-    projected.cash = deepcopy(pv.cash)
-
-    trade_map: dict[str, float] = {}
-    for t in trades:
-        ticker = t["ticker"]
-        trade_map[ticker] = trade_map.get(ticker, 0) + t["delta_aud"]
-
-    # Apply deltas to existing holdings
-    seen_tickers: set[str] = set()
-    for h in pv.holdings:
-        delta = trade_map.get(h.ticker, 0)
-        new_value = h.value_aud + delta
-        seen_tickers.add(h.ticker)
-
-        if new_value <= 0:
-            continue  # fully sold
-
-        scale = new_value / h.value_aud if h.value_aud > 0 else 0
-        projected.holdings.append(HoldingValue(
-            ticker=h.ticker,
-            name=h.name,
-            instrument_type=h.instrument_type,
-            exchange=h.exchange,
-            currency=h.currency,
-            country=h.country,
-            account_name=h.account_name,
-            institution_name=h.institution_name,
-            quantity=h.quantity * scale,
-            price=h.price,
-            price_date=h.price_date,
-            local_value=h.local_value * scale,
-            fx_rate=h.fx_rate,
-            value_aud=new_value,
-            capital_role=h.capital_role,
-            macro_drivers=h.macro_drivers,
-            corporate_group=h.corporate_group,
-            asset_class=h.asset_class,
-            economic_currency=h.economic_currency,
-        ))
-
-    # Build a lookup of per-ticker overrides from trade dicts
-    trade_overrides: dict[str, dict] = {}
-    for t in trades:
-        ticker = t["ticker"]
-        trade_overrides[ticker] = t
-
-    # Add new instruments not currently held
-    new_tickers = {t: d for t, d in trade_map.items() if t not in seen_tickers and d > 0}
-    if new_tickers:
-        from src.db.connection import get_connection
-        with get_connection(db_path) as conn:
-            for ticker, amount_aud in new_tickers.items():
-                overrides = trade_overrides.get(ticker, {})
-
-                row = conn.execute("""
-                    SELECT i.ticker, i.name, i.instrument_type, i.exchange,
-                           i.currency, i.country_domicile,
-                           ic.capital_role, ic.macro_drivers, ic.corporate_group,
-                           ic.asset_class, ic.economic_currency
-                    FROM instruments i
-                    LEFT JOIN instrument_classifications ic ON ic.instrument_id = i.id
-                    WHERE i.ticker = ?
-                """, (ticker,)).fetchone()
-
-                if row:
-                    currency = overrides.get("currency", row["currency"])
-                    fx_rate = _get_fx_rate(conn, currency) or 1.0
-                    local_value = amount_aud / fx_rate
-                    price_row = conn.execute("""
-                        SELECT close_price, date FROM prices p
-                        JOIN instruments i ON i.id = p.instrument_id
-                        WHERE i.ticker = ? ORDER BY p.date DESC LIMIT 1
-                    """, (ticker,)).fetchone()
-                    price = price_row["close_price"] if price_row else 0
-                    price_date = price_row["date"] if price_row else ""
-                    quantity = local_value / price if price > 0 else 0
-
-                    projected.holdings.append(HoldingValue(
-                        ticker=row["ticker"],
-                        name=row["name"] or ticker,
-                        instrument_type=overrides.get("instrument_type", row["instrument_type"]),
-                        exchange=row["exchange"],
-                        currency=currency,
-                        country=row["country_domicile"],
-                        account_name="(projected)",
-                        institution_name="(projected)",
-                        quantity=quantity,
-                        price=price,
-                        price_date=price_date,
-                        local_value=local_value,
-                        fx_rate=fx_rate,
-                        value_aud=amount_aud,
-                        capital_role=overrides.get("capital_role", row["capital_role"]),
-                        macro_drivers=row["macro_drivers"],
-                        corporate_group=overrides.get("corporate_group", row["corporate_group"]),
-                        asset_class=overrides.get("asset_class", row["asset_class"]),
-                        economic_currency=overrides.get("economic_currency", row["economic_currency"]),
-                    ))
-                else:
-                    logger.warning(
-                        "Instrument %s not in database — using trade-spec metadata for projection",
-                        ticker,
-                    )
-                    currency = overrides.get("currency", "AUD")
-                    projected.holdings.append(HoldingValue(
-                        ticker=ticker, name=ticker,
-                        instrument_type=overrides.get("instrument_type", "etf"),
-                        exchange=None,
-                        currency=currency, country=None,
-                        account_name="(projected)", institution_name="(projected)",
-                        quantity=0, price=0, price_date="",
-                        local_value=amount_aud, fx_rate=1.0, value_aud=amount_aud,
-                        capital_role=overrides.get("capital_role"),
-                        macro_drivers=overrides.get("macro_drivers"),
-                        corporate_group=overrides.get("corporate_group"),
-                        asset_class=overrides.get("asset_class"),
-                        economic_currency=overrides.get("economic_currency", currency),
-                    ))
-
-    # Adjust investable cash by net trade flow (sells add, buys consume)
-    net_cash_delta = -sum(trade_map.values())  # negative delta_aud = sell = cash in
-    if net_cash_delta != 0 and projected.cash:
-        # Apply to the first investable cash balance
-        for cv in projected.cash:
-            if cv.is_investable:
-                cv.balance += net_cash_delta / cv.fx_rate
-                cv.value_aud += net_cash_delta
-                break
-
-    return projected
-
-
-def _get_fx_rate(conn, from_currency: str, to_currency: str = "AUD") -> float | None:
-    """Get the latest FX rate for a currency pair."""
-    if from_currency == to_currency:
-        return 1.0
-    row = conn.execute(
-        "SELECT rate FROM fx_rates "
-        "WHERE from_currency = ? AND to_currency = ? "
-        "ORDER BY date DESC LIMIT 1",
-        (from_currency, to_currency),
+    cols = pv.columns
+    holding_values: dict[int, float] = {}
+    cash_values: dict[int, float] = {}
+
+    for j, h in enumerate(pv.holdings):
+        price, price_date = prices.get(h.ticker, (h.price, h.price_date))
+        fx_rate = (fx_book.rate(h.currency) or 1.0) if fx_book else h.fx_rate
+        if price == h.price and price_date == h.price_date and fx_rate == h.fx_rate:
+            continue
+        h.price, h.price_date, h.fx_rate = price, price_date, fx_rate
+        h.local_value = h.quantity * price
+        h.value_aud = h.local_value * fx_rate
+        holding_values[j] = h.value_aud
+
+    if fx_book:
+        for j, cv in enumerate(pv.cash):
+            fx_rate = fx_book.rate(cv.currency) or 1.0
+            if fx_rate != cv.fx_rate:
+                cv.fx_rate = fx_rate
+                cv.value_aud = cv.balance * fx_rate
+                cash_values[j] = cv.value_aud
+        pv.fx_book = fx_book
+
+    cols.patch(holding_values, cash_values)
+    return len(holding_values) + len(cash_values)
+
+
+def excluded_account_ids(conn) -> set[int]:
+    """Accounts whose cash is excluded from investable assets (receivables, credit liabilities)."""
+    exclude_param = conn.execute(
+        "SELECT value FROM parameters WHERE key = 'exclude_account_ids'"
     ).fetchone()
-    return row["rate"] if row else None
+    if exclude_param:
+        import json
+        return set(json.loads(exclude_param["value"]))
+    # Default: exclude credit-type accounts
+    return {
+        row["id"] for row in
+        conn.execute("SELECT id FROM accounts WHERE account_type IN ('credit', 'liability')")
+    }
+
+
+# Current values come from the trigger-maintained latest_* tables; as-of values
+# are derived from history with the last row on or before :as_of.
+_LATEST_PRICES = "SELECT instrument_id, date, close_price FROM latest_prices"
+_AS_OF_PRICES = """
+    SELECT p.instrument_id, p.date, p.close_price
+    FROM prices p
+    JOIN (
+        SELECT instrument_id, MAX(date) AS date
+        FROM prices
+        WHERE instrument_id IN (SELECT instrument_id FROM holdings) AND date <= :as_of
+        GROUP BY instrument_id
+    ) lp ON lp.instrument_id = p.instrument_id AND lp.date = p.date
+"""
+_LATEST_CASH = "SELECT account_id, currency, balance, as_of_date FROM latest_cash_balances"
+_AS_OF_CASH = """
+    SELECT account_id, currency, balance, as_of_date
+    FROM cash_balances
+    WHERE (account_id, currency, as_of_date) IN (
+        SELECT account_id, currency, MAX(as_of_date)
+        FROM cash_balances
+        WHERE as_of_date <= :as_of
+        GROUP BY account_id, currency
+    )
+"""
 
 
-def compute_valuation(db_path=None) -> PortfolioValuation:
+def compute_valuation(db_path=None, as_of: date | str | None = None) -> PortfolioValuation:
     """Compute the full portfolio valuation.
 
     For each holding: latest price * quantity * FX rate → AUD.
     For each cash balance: balance * FX rate → AUD.
     Includes classification data (capital_role, macro_drivers, corporate_group).
+    FX rates come from a single FxRateBook load, kept on the result as pv.fx_book.
+
+    With as_of, values the portfolio at that date instead: the last price, FX
+    rate and cash balance on or before as_of. Holdings carry no history, so
+    current quantities are used — only positions with date_acquired after
+    as_of are left out.
     """
     pv = PortfolioValuation()
+    as_of = as_of.isoformat() if isinstance(as_of, date) else as_of
 
     with get_connection(db_path) as conn:
-        # Holdings with latest prices and classifications
-        rows = conn.execute("""
+        pv.fx_book = FxRateBook.load(conn, as_of=as_of)
+
+        # Holdings with latest (or as-of) prices and classifications
+        price_source = _LATEST_PRICES if as_of is None else _AS_OF_PRICES
+        rows = conn.execute(f"""
             SELECT
                 i.ticker, i.name, i.instrument_type, i.exchange, i.currency,
                 i.country_domicile,
@@ -360,17 +297,17 @@ def compute_valuation(db_path=None) -> PortfolioValuation:
             JOIN instruments i ON i.id = h.instrument_id
             JOIN accounts a ON a.id = h.account_id
             JOIN institutions inst ON inst.id = a.institution_id
-            LEFT JOIN prices p ON p.instrument_id = i.id
-                AND p.date = (SELECT MAX(p2.date) FROM prices p2 WHERE p2.instrument_id = i.id)
+            LEFT JOIN ({price_source}) p ON p.instrument_id = i.id
             LEFT JOIN instrument_classifications ic ON ic.instrument_id = i.id
+            WHERE :as_of IS NULL OR h.date_acquired IS NULL OR h.date_acquired <= :as_of
             ORDER BY i.ticker
-        """).fetchall()
+        """, {"as_of": as_of}).fetchall()
 
         for r in rows:
             price = r["close_price"] or 0
             quantity = r["quantity"]
             local_value = quantity * price
-            fx_rate = _get_fx_rate(conn, r["currency"]) or 1.0
+            fx_rate = pv.fx_book.rate(r["currency"]) or 1.0
             value_aud = local_value * fx_rate
 
             if price == 0:
@@ -399,38 +336,23 @@ def compute_valuation(db_path=None) -> PortfolioValuation:
             ))
 
         # Cash balances
-        # Determine excluded accounts (receivables, credit liabilities)
-        exclude_param = conn.execute(
-            "SELECT value FROM parameters WHERE key = 'exclude_account_ids'"
-        ).fetchone()
-        if exclude_param:
-            import json
-            exclude_ids = set(json.loads(exclude_param["value"]))
-        else:
-            # Default: exclude credit-type accounts
-            exclude_ids = set()
-            for row in conn.execute("SELECT id FROM accounts WHERE account_type IN ('credit', 'liability')"):
-                exclude_ids.add(row["id"])
-
-        cash_rows = conn.execute("""
+        exclude_ids = excluded_account_ids(conn)
+
+        cash_source = _LATEST_CASH if as_of is None else _AS_OF_CASH
+        cash_rows = conn.execute(f"""
             SELECT
                 a.id AS account_id,
                 a.name AS account_name,
                 inst.name AS institution_name,
                 cb.currency, cb.balance, cb.as_of_date
-            FROM cash_balances cb
+            FROM ({cash_source}) cb
             JOIN accounts a ON a.id = cb.account_id
             JOIN institutions inst ON inst.id = a.institution_id
-            WHERE (cb.account_id, cb.currency, cb.as_of_date) IN (
-                SELECT account_id, currency, MAX(as_of_date)
-                FROM cash_balances
-                GROUP BY account_id, currency
-            )
             ORDER BY inst.name, a.name, cb.currency
-        """).fetchall()
+        """, {"as_of": as_of}).fetchall()
 
         for r in cash_rows:
-            fx_rate = _get_fx_rate(conn, r["currency"]) or 1.0
+            fx_rate = pv.fx_book.rate(r["currency"]) or 1.0
             value_aud = r["balance"] * fx_rate
             investable = r["account_id"] not in exclude_ids
 
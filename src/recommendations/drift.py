@@ -0,0 +1,236 @@
+"""Drift-band rebalancing recommender.
+
+Compares a PortfolioValuation with the target bands stored in parameters
+(stabiliser/compounder/optionality band_low/high, single-position caps — read
+through the compliance RuleLimits, so drift and the checks agree) and
+proposes actions sized to bring each drifted allocation back to the nearest
+band edge:
+
+  1. Positions above their single-security cap are trimmed to the cap.
+  2. Growth roles above their band are sold to the upper edge, and a
+     stabiliser below its band (or the 24-month floor) is topped up by
+     selling growth holdings — investable cash counts as stabiliser.
+  3. Growth roles below their band are bought to the lower edge, pro rata
+     across the role's holdings in every account, within each position's
+     cap and the cash the stabiliser can spare.
+
+Whatever cannot be placed, and any stabiliser excess left over, becomes a
+'rebalance' action without an instrument for a discretionary decision.
+
+Quantities are whole units at the latest price, rounded up so the result
+lands inside the band. Proposals are written to the actions table in one
+transaction, replacing the previous unresolved drift proposals, so the
+recommender can run after every import.
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.compliance.checks import RuleLimits, cap_class
+from src.compliance.context import ComplianceContext
+from src.db.connection import get_connection
+from src.portfolio.valuation import HoldingValue, PortfolioValuation
+
+logger = logging.getLogger(__name__)
+
+SOURCE = "drift"
+ROLES = ("stabiliser", "compounder", "optionality")
+
+
+@dataclass
+class DriftAction:
+    """A proposed action (one row of the actions table)."""
+    action_type: str            # buy / sell / rebalance
+    description: str
+    rationale: str
+    amount_aud: float           # signed: + buy, - sell
+    ticker: str | None = None
+    account_name: str | None = None
+    quantity: float | None = None   # whole units at the latest price; None if unpriced
+
+
+def _position_cap(h: HoldingValue, ctx: ComplianceContext,
+                  lim: RuleLimits) -> tuple[float, str] | None:
+    """(cap fraction, rule label) for a holding, or None if uncapped."""
+    caps = []
+    kind = cap_class(h)
+    if kind is not None:
+        caps.append((lim.cap(kind) / 100, f"single {kind} cap (3.1)"))
+    if ctx.flags(h.ticker).is_speculative:
+        caps.append((lim.speculative_cap / 100, "speculative cap (3.1)"))
+    return min(caps) if caps else None
+
+
+def _allocate(amount: float, weights: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+    """Split amount pro rata to weights, capping each part at capacity and redistributing.
+
+    Zero weights take part equally when every weight is zero. The parts sum to
+    min(amount, capacity.sum()).
+    """
+    weights = np.where(weights > 0, weights, 0.0) if weights.sum() > 0 else np.ones(len(weights))
+    filled = np.zeros(len(weights))
+    open_ = capacity > 0
+    remaining = amount
+    while remaining > 1e-6 and open_.any():
+        share = weights * open_
+        if share.sum() <= 0:
+            share = open_.astype(float)
+        part = remaining * share / share.sum()
+        part = np.minimum(part, capacity - filled)
+        filled += part
+        remaining -= part.sum()
+        open_ &= capacity - filled > 1e-6
+    return filled
+
+
+def _units(h: HoldingValue, amount_aud: float) -> float | None:
+    """Whole units covering |amount_aud| at the latest price (sells capped at the holding)."""
+    unit_aud = h.price * h.fx_rate
+    if unit_aud <= 0:
+        return None
+    units = math.ceil(abs(amount_aud) / unit_aud - 1e-9)
+    return float(min(units, h.quantity) if amount_aud < 0 else units)
+
+
+def _trade(h: HoldingValue, amount: float, rationale: str) -> DriftAction:
+    quantity = _units(h, amount)
+    verb, action_type = ("Buy", "buy") if amount > 0 else ("Sell", "sell")
+    size = f"{quantity:,.0f} units of {h.ticker}" if quantity is not None else h.ticker
+    return DriftAction(
+        action_type=action_type,
+        description=f"{verb} {size} in {h.account_name} (≈ AUD {abs(amount):,.0f})",
+        rationale=rationale,
+        amount_aud=amount,
+        ticker=h.ticker,
+        account_name=h.account_name,
+        quantity=quantity,
+    )
+
+
+def recommend_drift(pv: PortfolioValuation, ctx: ComplianceContext | None = None,
+                    db_path=None, min_trade_aud: float = 500.0,
+                    buffer_pct: float = 0.1) -> list[DriftAction]:
+    """Actions bringing position caps and role bands back to their nearest edge.
+
+    Edges are moved buffer_pct percentage points inwards so that rounding and
+    small price moves do not leave a position exactly on a limit.
+    """
+    ctx = ctx or ComplianceContext.load(db_path)
+    lim = RuleLimits.from_context(ctx)
+    total = pv.total_aud
+    if total <= 0:
+        return []
+    buffer = buffer_pct / 100 * total
+
+    holdings = pv.holdings
+    values = np.array([h.value_aud for h in holdings], dtype=float)
+    cash = sum(c.value_aud for c in pv.cash if c.is_investable)
+    actions: list[DriftAction] = []
+
+    # 1. Single-position caps
+    for i, h in enumerate(holdings):
+        cap = _position_cap(h, ctx, lim)
+        if cap is None:
+            continue
+        limit, label = cap
+        excess = values[i] - (limit * total - buffer)
+        if values[i] > limit * total and excess >= min_trade_aud:
+            actions.append(_trade(h, -excess, f"{h.ticker} at {values[i] / total:.1%} exceeds the "
+                                              f"{label} of {limit:.0%}; trim to the cap."))
+            values[i] -= excess
+            cash += excess
+
+    # 2. Role bands (investable cash counts as stabiliser)
+    roles = np.array([h.capital_role for h in holdings], dtype=object)
+    bands = {}
+    for role in ROLES:
+        low, high = lim.band(role)
+        bands[role] = (low / 100 * total + buffer, high / 100 * total - buffer)
+    # The 24-month floor overrides the stabiliser band (Rule 2.1)
+    floor = lim.stabiliser_floor(ctx)
+    stab_low, stab_high = bands["stabiliser"]
+    bands["stabiliser"] = (max(stab_low, floor + buffer), max(stab_high, floor + buffer))
+
+    def role_value(role: str) -> float:
+        return values[roles == role].sum() + (cash if role == "stabiliser" else 0.0)
+
+    def trade_role(members: np.ndarray, amount: float, capacity: np.ndarray, rationale: str) -> float:
+        """Spread amount over members pro rata to value within capacity; returns the shortfall."""
+        nonlocal cash
+        filled = _allocate(abs(amount), values[members], capacity)
+        sign = 1.0 if amount > 0 else -1.0
+        for j, part in zip(members, filled):
+            if part >= min_trade_aud:
+                actions.append(_trade(holdings[j], sign * part, rationale))
+                values[j] += sign * part
+                cash -= sign * part
+        return abs(amount) - filled[filled >= min_trade_aud].sum()
+
+    def note(amount: float, text: str, rationale: str) -> None:
+        if abs(amount) >= min_trade_aud:
+            actions.append(DriftAction("rebalance", text, rationale, amount))
+
+    growth_roles = ("compounder", "optionality")
+    # Growth roles above their band: sell down to the upper edge (cash in)
+    for role in growth_roles:
+        excess = role_value(role) - bands[role][1]
+        if excess >= min_trade_aud:
+            members = np.flatnonzero(roles == role)
+            trade_role(members, -excess, values[members].copy(),
+                       f"{role.capitalize()} above its band; sell AUD {excess:,.0f} to the upper edge.")
+
+    # Stabiliser below its band: raise cash from growth holdings
+    deficit = bands["stabiliser"][0] - role_value("stabiliser")
+    if deficit >= min_trade_aud:
+        members = np.flatnonzero(np.isin(roles, growth_roles))
+        rationale = (f"Stabiliser below its band/24-month floor; raise AUD {deficit:,.0f} of cash "
+                     "from growth holdings.")
+        short = trade_role(members, -deficit, values[members].copy(), rationale)
+        note(short, f"Raise a further AUD {short:,.0f} for the stabiliser — no growth holdings left",
+             rationale)
+
+    # Growth roles below their band: buy up to the lower edge from cash the stabiliser can spare
+    for role in growth_roles:
+        need = bands[role][0] - role_value(role)
+        if need < min_trade_aud:
+            continue
+        rationale = f"{role.capitalize()} below its band; add AUD {need:,.0f} to the lower edge."
+        spendable = max(min(cash, role_value("stabiliser") - bands["stabiliser"][0]), 0.0)
+        members = np.flatnonzero(roles == role)
+        caps = np.array([(_position_cap(holdings[j], ctx, lim) or (np.inf,))[0] * total - buffer
+                         for j in members])
+        short = trade_role(members, min(need, spendable), np.maximum(caps - values[members], 0),
+                           rationale)
+        short += need - min(need, spendable)
+        note(short, f"Add a further AUD {short:,.0f} of {role} capital — no {role} holding with "
+                    "room under its cap, or no spare stabiliser cash", rationale)
+
+    # Stabiliser still above its band: the excess is left for a discretionary decision
+    excess = role_value("stabiliser") - bands["stabiliser"][1]
+    if excess > 0:
+        note(-excess, f"Deploy AUD {excess:,.0f} of excess stabiliser capital (investable cash "
+                      f"AUD {cash:,.0f}) into compounder/optionality",
+             "Stabiliser above its band after the trades above.")
+
+    logger.debug("Drift recommender: %d actions", len(actions))
+    return actions
+
+
+def store_actions(actions: list[DriftAction], db_path=None) -> int:
+    """Replace unresolved drift proposals with these actions in one transaction.
+
+    Returns the number of rows inserted.
+    """
+    with get_connection(db_path) as conn:
+        instrument_ids = {r["ticker"]: r["id"] for r in conn.execute("SELECT id, ticker FROM instruments")}
+        conn.execute("DELETE FROM actions WHERE source = ? AND status = 'proposed'", (SOURCE,))
+        conn.executemany(
+            "INSERT INTO actions (action_type, description, instrument_id, quantity, rationale, source) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(a.action_type, a.description, instrument_ids.get(a.ticker), a.quantity,
+              a.rationale, SOURCE) for a in actions],
+        )
+    return len(actions)
@@ -0,0 +1,435 @@
+"""Breach-cure trade solver.
+
+Finds the smallest-turnover set of delta_aud trades that brings every
+linear compliance rule back inside its limits. Trades are funded from (and
+paid into) investable cash, and each percentage rule is a linear constraint
+on the post-trade values and total:
+
+  1.1 role bands, 2.1 / 8.1 24-month floor, 2.2 shock optionality cap,
+  3.1 position caps, 3.2 issuer caps, 4.1 Australia concentration,
+  4.2 macro drivers, 5.1 AUD growth share, 5.2 unhedged share,
+  6.2 yield exclusion, 7.1 liquidity, 7.2 duration buckets
+  (+ with targets: the upper/lower band edges that only warn, 7.3, 8.2)
+
+Rules that are not linear in the allocation (6.1 convexity, data freshness)
+are left to the reviewer. The LP — minimise Σ(buy + sell) subject to the
+rule rows — is solved with a dense two-phase simplex in NumPy; problems are
+a few dozen tickers by a few dozen rules.
+
+Trades follow project_valuation() semantics: a trade on a held ticker
+applies its delta_aud to each of that ticker's n holdings and moves cash
+once, so the portfolio total changes by (n - 1) * delta_aud. The total is
+unchanged only when every traded ticker is held on one line; otherwise the
+rows compare shares against the post-trade total, which is still linear in
+the trades. Output is a trades list in the data/trades-v3.json format.
+"""
+
+import logging
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.compliance.checks import GOVT_BOND_TYPES, RuleLimits, cap_class
+from src.compliance.context import ComplianceContext
+from src.db.connection import get_connection
+from src.portfolio.batch import METADATA_KEYS, new_holding, resolve_instruments
+from src.portfolio.fx import FxRateBook
+from src.portfolio.valuation import HoldingValue, PortfolioValuation
+
+logger = logging.getLogger(__name__)
+
+
+class InfeasibleError(ValueError):
+    """No set of trades satisfies every constraint."""
+
+
+# ─── Simplex ───────────────────────────────────────────────────────────────
+
+def _pivot(tableau: np.ndarray, row: int, col: int) -> None:
+    tableau[row] /= tableau[row, col]
+    factors = tableau[:, col].copy()
+    factors[row] = 0.0
+    tableau -= np.outer(factors, tableau[row])
+
+
+def _run_simplex(tableau: np.ndarray, basis: np.ndarray, n_enter: int,
+                 tol: float, max_iter: int) -> str:
+    """Pivot to optimality on the columns [0, n_enter); Bland's rule prevents cycling."""
+    m = len(basis)
+    for _ in range(max_iter):
+        reduced = tableau[-1, :n_enter]
+        entering = np.flatnonzero(reduced < -tol)
+        if not len(entering):
+            return "optimal"
+        col = entering[0]
+        column = tableau[:m, col]
+        positive = column > tol
+        if not positive.any():
+            return "unbounded"
+        ratios = np.full(m, np.inf)
+        ratios[positive] = tableau[:m, -1][positive] / column[positive]
+        best = np.flatnonzero(ratios <= ratios.min() + tol)
+        row = best[np.argmin(basis[best])]
+        _pivot(tableau, row, col)
+        basis[row] = col
+    return "iteration_limit"
+
+
+def simplex(c: np.ndarray, a_ub: np.ndarray, b_ub: np.ndarray,
+            tol: float = 1e-9, max_iter: int = 50_000) -> tuple[str, np.ndarray | None]:
+    """Minimise c·x subject to a_ub·x ≤ b_ub, x ≥ 0.
+
+    Returns (status, x) with status "optimal", "infeasible", "unbounded" or
+    "iteration_limit"; x is None unless optimal.
+    """
+    m, n = a_ub.shape
+    a = np.hstack([a_ub, np.eye(m)])
+    b = b_ub.astype(float).copy()
+    flip = b < 0
+    a[flip] *= -1
+    b[flip] *= -1
+
+    # Rows whose slack would start negative get an artificial variable
+    art_rows = np.flatnonzero(flip)
+    n_art = len(art_rows)
+    artificial = np.zeros((m, n_art))
+    artificial[art_rows, np.arange(n_art)] = 1.0
+    tableau = np.zeros((m + 1, n + m + n_art + 1))
+    tableau[:m, :n + m] = a
+    tableau[:m, n + m:-1] = artificial
+    tableau[:m, -1] = b
+    basis = n + np.arange(m)
+    basis[art_rows] = n + m + np.arange(n_art)
+
+    if n_art:
+        # Phase 1: minimise the sum of artificials
+        tableau[-1, n + m:-1] = 1.0
+        tableau[-1] -= tableau[art_rows].sum(axis=0)
+        status = _run_simplex(tableau, basis, n + m + n_art, tol, max_iter)
+        if status != "optimal":
+            return status, None
+        if -tableau[-1, -1] > tol * max(1.0, np.abs(b).max()):
+            return "infeasible", None
+        # Drive zero-level artificials out of the basis where possible
+        for row in np.flatnonzero(basis >= n + m):
+            candidates = np.flatnonzero(np.abs(tableau[row, :n + m]) > tol)
+            if len(candidates):
+                _pivot(tableau, row, candidates[0])
+                basis[row] = candidates[0]
+
+    # Phase 2: original objective over structural + slack columns
+    tableau[-1] = 0.0
+    tableau[-1, :n] = c
+    for row, col in enumerate(basis):
+        if col < n and c[col] != 0:
+            tableau[-1] -= c[col] * tableau[row]
+    status = _run_simplex(tableau, basis, n + m, tol, max_iter)
+    if status != "optimal":
+        return status, None
+
+    x = np.zeros(n + m + n_art)
+    x[basis] = tableau[:m, -1]
+    return "optimal", x[:n]
+
+
+# ─── Breach-cure model ─────────────────────────────────────────────────────
+
+@dataclass
+class _Ticker:
+    """A tradeable instrument: its holdings aggregated (all share instrument metadata)."""
+    holding: HoldingValue        # representative line (metadata, fx rate)
+    value: float                 # AUD held across all lines
+    lines: int                   # holdings a trade applies to (0 for a new buy)
+    max_sell: float              # largest per-line sale that leaves every line ≥ 0
+    new_spec: dict | None = None # trade-spec metadata for a candidate new buy
+
+
+@dataclass
+class CureSolution:
+    """Minimal-turnover trades and the constraints they end up pressed against."""
+    trades: list[dict]
+    turnover_aud: float
+    binding: list[str] = field(default_factory=list)   # labels of active constraints
+
+
+class _Model:
+    """Accumulates rows a·w + k·cash ≤ β·total over post-trade values (fractions of total).
+
+    A trade d on a ticker held on n lines moves w by n·d but cash by d, so the
+    post-trade total is 1 + Σ(n − 1)·d in fractions of the current total.
+    """
+
+    def __init__(self, tickers: list[_Ticker], cash: float, total: float, buffer: float):
+        self.v = np.array([t.value for t in tickers]) / total
+        self.n = np.array([max(t.lines, 1) for t in tickers], dtype=float)
+        self.cash = cash / total
+        self.buffer = buffer
+        self.rows: list[np.ndarray] = []
+        self.rhs: list[float] = []
+        self.labels: list[str] = []
+
+    def le(self, label: str, a: np.ndarray, beta: float, k: float = 0.0,
+           absolute: bool = False) -> None:
+        """a·w + k·cash_post ≤ (beta − buffer)·total_post, with w = v + n·d and cash_post = cash − Σd.
+
+        absolute compares against beta − buffer in fractions of the current
+        total instead (an AUD amount such as the 24-month floor).
+        """
+        level = beta - self.buffer
+        g = a * self.n - k
+        if not absolute:
+            g = g - level * (self.n - 1)
+        self.rows.append(np.concatenate([g, -g]))
+        self.rhs.append(level - a @ self.v - k * self.cash)
+        self.labels.append(label)
+
+    def ge(self, label: str, a: np.ndarray, beta: float, k: float = 0.0,
+           absolute: bool = False) -> None:
+        self.le(label, -a, -beta, -k, absolute)
+
+    def bound(self, label: str, column: int, limit: float) -> None:
+        row = np.zeros(2 * len(self.v))
+        row[column] = 1.0
+        self.rows.append(row)
+        self.rhs.append(limit)
+        self.labels.append(label)
+
+
+def _tradeable(pv: PortfolioValuation, candidates: list[dict], fx_book: FxRateBook,
+               db_path) -> list[_Ticker]:
+    tickers: dict[str, _Ticker] = {}
+    for h in pv.holdings:
+        t = tickers.get(h.ticker)
+        if t is None:
+            tickers[h.ticker] = _Ticker(h, h.value_aud, 1, h.value_aud)
+        else:
+            t.value += h.value_aud
+            t.lines += 1
+            t.max_sell = min(t.max_sell, h.value_aud)
+
+    new = [c for c in candidates if c["ticker"] not in tickers]
+    if new:
+        with get_connection(db_path) as conn:
+            rows = resolve_instruments(conn, [c["ticker"] for c in new])
+        for spec in new:
+            meta = {k: spec[k] for k in METADATA_KEYS if k in spec}
+            holding = new_holding(spec["ticker"], 0.0, rows.get(spec["ticker"]), meta, fx_book)
+            tickers[spec["ticker"]] = _Ticker(holding, 0.0, 0, 0.0, new_spec=meta)
+    return list(tickers.values())
+
+
+def _add_rules(model: _Model, tickers: list[_Ticker], ctx: ComplianceContext,
+               total: float, targets: bool) -> None:
+    """Add a row per linear rule, with the limits the checks use (RuleLimits)."""
+    hs = [t.holding for t in tickers]
+    flags = [ctx.flags(h.ticker) for h in hs]
+    lim = RuleLimits.from_context(ctx)
+
+    def mask(cond) -> np.ndarray:
+        return np.fromiter(cond, dtype=float, count=len(hs))
+
+    def groups(labels) -> dict:
+        out: dict = {}
+        for i, label in enumerate(labels):
+            if label:
+                out.setdefault(label, np.zeros(len(hs)))[i] = 1.0
+        return out
+
+    stab = mask(h.capital_role == "stabiliser" for h in hs)
+    comp = mask(h.capital_role == "compounder" for h in hs)
+    opt = mask(h.capital_role == "optionality" for h in hs)
+
+    # 1.1 / 2.1 / 8.1 — investable cash counts as stabiliser
+    (s_low, s_high), (c_low, c_high), (o_low, o_high) = (
+        lim.stabiliser_band, lim.compounder_band, lim.optionality_band)
+    floor = lim.stabiliser_floor(ctx) / total
+    model.ge(f"1.1-S min {s_low:g}%", stab, s_low / 100, k=1)
+    model.ge(f"1.1-C min {c_low:g}%", comp, c_low / 100)
+    model.le(f"1.1-O max {o_high:g}%", opt, o_high / 100)
+    model.ge(f"2.1 {lim.stabiliser_months:g}-month floor", stab, floor, k=1, absolute=True)
+    if targets:
+        if floor <= s_high / 100:
+            model.le(f"1.1-S max {s_high:g}%", stab, s_high / 100, k=1)
+        model.le(f"1.1-C max {c_high:g}%", comp, c_high / 100)
+        model.ge(f"1.1-O min {o_low:g}%", opt, o_low / 100)
+    if ctx.param("income_shock_active", "false").lower() == "true":
+        cap = lim.shock_optionality_max
+        model.le(f"2.2 shock optionality max {cap:g}%", opt, cap / 100)
+
+    # 3.1 / 3.2 — position and issuer caps
+    for i, (h, f) in enumerate(zip(hs, flags)):
+        unit = np.zeros(len(hs))
+        unit[i] = 1.0
+        kind = cap_class(h)
+        if kind is not None:
+            rule_id, cap = ("3.1-cr" if kind == "credit" else "3.1-eq"), lim.cap(kind)
+            model.le(f"{rule_id} {h.ticker} max {cap:g}%", unit, cap / 100)
+        if f.is_speculative:
+            model.le(f"3.1-sp {h.ticker} max {lim.speculative_cap:g}%", unit, lim.speculative_cap / 100)
+    spec = mask(f.is_speculative for f in flags)
+    if spec.any():
+        cap = lim.speculative_aggregate_cap
+        model.le(f"3.1-sp-agg max {cap:g}%", spec, cap / 100)
+    for grp, members in groups(h.corporate_group for h in hs).items():
+        model.le(f"3.2 {grp} max {lim.issuer_cap:g}%", members, lim.issuer_cap / 100)
+
+    # 4.1 / 4.2
+    au_risk = mask(h.country == "AU" and h.instrument_type not in GOVT_BOND_TYPES for h in hs)
+    model.le(f"4.1 AU risk max {lim.au_risk_max:g}%", au_risk, lim.au_risk_max / 100)
+    drivers: dict[str, np.ndarray] = {}
+    for i, h in enumerate(hs):
+        for d in h.drivers:
+            if d not in ("untagged", "none"):
+                drivers.setdefault(d, np.zeros(len(hs)))[i] = 1.0
+    for driver, members in sorted(drivers.items()):
+        model.le(f"4.2 {driver} max {lim.driver_cap:g}%", members, lim.driver_cap / 100)
+
+    # 5.1 / 5.2 — shares of growth capital (homogeneous: no total involved)
+    growth = comp + opt
+    aud = mask((h.economic_currency or h.currency) == "AUD" for h in hs)
+    hedged = mask(f.hedged == 1 for f in flags)
+    aud_low, aud_high = lim.aud_growth_band
+    model.ge(f"5.1 AUD growth min {aud_low:g}%", growth * aud - aud_low / 100 * growth, 0.0)
+    if targets:
+        model.le(f"5.1 AUD growth max {aud_high:g}%", growth * aud - aud_high / 100 * growth, 0.0)
+    intl = growth * (1 - aud)
+    share = lim.unhedged_min / 100
+    model.ge(f"5.2 unhedged min {lim.unhedged_min:g}% of intl", intl * (1 - hedged) - share * intl, 0.0)
+
+    # 6.2 — yield-dominant ≤ 25% of optionality
+    yield_dom = mask(f.yield_dominant == 1 for f in flags)
+    share = lim.yield_max / 100
+    model.le(f"6.2 yield max {lim.yield_max:g}% of optionality", opt * yield_dom - share * opt, 0.0)
+
+    # 7.x — shares of stabiliser capital (holdings + investable cash)
+    liquid = mask(f.liquidity_days is None or f.liquidity_days <= lim.liquidity_days for f in flags)
+    share = lim.liquid_min / 100
+    model.ge(f"7.1 liquid min {lim.liquid_min:g}% of stabiliser",
+             stab * liquid - share * stab, 0.0, k=1 - share)
+    buckets = groups(f"{f.duration_years:.0f}y" if s and f.duration_years is not None else None
+                     for f, s in zip(flags, stab))
+    share = lim.duration_max / 100
+    for bucket, members in sorted(buckets.items()):
+        model.le(f"7.2 duration {bucket} max {lim.duration_max:g}% of stabiliser",
+                 members - share * stab, 0.0, k=-share)
+    if targets:
+        linked = mask(f.is_inflation_linked == 1 for f in flags)
+        share = lim.inflation_min / 100
+        model.ge(f"7.3 inflation-linked min {lim.inflation_min:g}% of stabiliser",
+                 stab * linked - share * stab, 0.0, k=-share)
+        cap = lim.correlation_group_max
+        for grp, members in groups(f.stress_correlation_group for f in flags).items():
+            model.le(f"8.2 {grp} max {cap:g}%", members, cap / 100)
+
+
+def _shortfalls(model: _Model, a_ub: np.ndarray, b_ub: np.ndarray, n_rules: int) -> str:
+    """Which rule rows cannot be met, and by how much (elastic LP: minimise total violation)."""
+    m = len(b_ub)
+    elastic = np.zeros((m, n_rules))
+    elastic[np.arange(n_rules), np.arange(n_rules)] = -1.0     # rule rows may be exceeded
+    c = np.concatenate([np.zeros(a_ub.shape[1]), np.ones(n_rules)])
+    status, x = simplex(c, np.hstack([a_ub, elastic]), b_ub)
+    if status != "optimal":
+        return "trading and cash bounds conflict"
+    excess = x[a_ub.shape[1]:]
+    return ", ".join(f"{label} (misses by {e * 100:.1f}pp of portfolio)"
+                     for label, e in zip(model.labels, excess) if e > 1e-9)
+
+
+def _trade_note(t: _Ticker, delta: float, post_pct: float) -> str:
+    if t.new_spec is not None:
+        return f"New buy (breach-cure solver). Post-trade {post_pct:.1f}% of portfolio."
+    if t.value + t.lines * delta <= 0.5:
+        return "Full sell (breach-cure solver)."
+    verb = "Add" if delta > 0 else "Trim"
+    return f"{verb} (breach-cure solver). Post-trade {post_pct:.1f}% of portfolio."
+
+
+def solve_breach_cure(
+    pv: PortfolioValuation,
+    db_path=None,
+    ctx: ComplianceContext | None = None,
+    candidates: list[dict] | None = None,
+    frozen: set[str] | None = None,
+    targets: bool = False,
+    buffer_pct: float = 0.1,
+    min_trade_aud: float = 100.0,
+) -> CureSolution:
+    """Smallest-turnover trades bringing every linear rule inside its limits.
+
+    Args:
+        pv: Current portfolio.
+        db_path: Optional database path override.
+        ctx: Preloaded ComplianceContext (loaded here if omitted).
+        candidates: Trade-spec dicts (ticker + metadata, as in trades-v3.json) of
+            instruments not held that the solver may buy.
+        frozen: Tickers that must not be traded.
+        targets: Also enforce the warning-level band edges (full target bands).
+        buffer_pct: Margin (percentage points) kept inside every limit so
+            rounded trades stay compliant.
+        min_trade_aud: Trades smaller than this are dropped.
+
+    Raises:
+        InfeasibleError: if no trades satisfy every constraint (e.g. a floor
+            needs an instrument type that is neither held nor a candidate).
+    """
+    ctx = ctx or ComplianceContext.load(db_path)
+    total = pv.total_aud
+    if total <= 0:
+        raise InfeasibleError("Portfolio total is zero or negative.")
+    fx_book = pv.fx_book
+    if fx_book is None:
+        with get_connection(db_path) as conn:
+            fx_book = FxRateBook.load(conn)
+
+    cash = sum(c.value_aud for c in pv.cash if c.is_investable)
+    tickers = _tradeable(pv, candidates or [], fx_book, db_path)
+    model = _Model(tickers, cash, total, buffer_pct / 100)
+    _add_rules(model, tickers, ctx, total, targets)
+
+    n = len(tickers)
+    n_rules = len(model.labels)
+    frozen = frozen or set()
+    for i, t in enumerate(tickers):
+        model.bound(f"sell {t.holding.ticker} ≤ held", n + i, t.max_sell / total)
+        if t.holding.ticker in frozen:
+            model.bound(f"{t.holding.ticker} frozen", i, 0.0)
+            model.bound(f"{t.holding.ticker} frozen", n + i, 0.0)
+    # Buys are funded from investable cash: Σ(buy − sell) ≤ cash
+    model.rows.append(np.concatenate([np.ones(n), -np.ones(n)]))
+    model.rhs.append(model.cash)
+    model.labels.append("cash ≥ 0")
+
+    a_ub, b_ub = np.array(model.rows), np.array(model.rhs)
+    status, x = simplex(np.ones(2 * n), a_ub, b_ub)
+    if status == "infeasible":
+        raise InfeasibleError("No trades satisfy every constraint. The closest reachable allocation misses: "
+                              + _shortfalls(model, a_ub, b_ub, n_rules))
+    if status != "optimal":
+        raise InfeasibleError(f"Solver stopped: {status}.")
+
+    slack = b_ub - a_ub @ x
+    binding = [label for label, s in zip(model.labels, slack)
+               if s < 1e-7 and not label.startswith(("sell ", "cash"))
+               and not label.endswith("frozen")]
+
+    deltas = [round(float(d)) for d in (x[:n] - x[n:]) * total]
+    deltas = [d if abs(d) >= min_trade_aud else 0 for d in deltas]
+    post_total = total + sum((t.lines - 1) * d for t, d in zip(tickers, deltas) if t.lines > 1)
+    trades = []
+    for t, delta in zip(tickers, deltas):
+        if not delta:
+            continue
+        h = t.holding
+        post_pct = (t.value + max(t.lines, 1) * delta) / post_total * 100
+        trade = {"ticker": h.ticker, "delta_aud": delta, "currency": h.currency,
+                 "delta_local": round(delta / (h.fx_rate or 1.0))}
+        if t.new_spec is not None:
+            trade.update({k: v for k, v in t.new_spec.items() if k != "currency"})
+        trade["note"] = _trade_note(t, delta, post_pct)
+        trades.append(trade)
+
+    turnover = float(sum(abs(t["delta_aud"]) for t in trades))
+    logger.debug("Breach cure: %d trades, turnover AUD %.0f, %d constraints (%d binding)",
+                 len(trades), turnover, len(model.labels), len(binding))
+    return CureSolution(trades=trades, turnover_aud=turnover, binding=binding)
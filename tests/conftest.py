@@ -0,0 +1,91 @@
+"""Shared fixtures: an in-memory portfolio and compliance context (no database)."""
+
+import json
+
+import pytest
+
+from src.compliance.context import ComplianceContext, InstrumentFlags
+from src.db.seed import PARAMETERS
+from src.portfolio.fx import FxRateBook
+from src.portfolio.valuation import CashValue, HoldingValue, PortfolioValuation
+
+PRICE_DATE = "2026-01-02"
+FX_RATES = {"USD": 1.5, "GBP": 1.9}
+
+# ticker, type, currency, country, role, asset class, economic currency, drivers, corporate group
+INSTRUMENTS = {
+    "VAS.AX": ("etf", "AUD", "AU", "compounder", "equity", "AUD", ["au_equity"], None),
+    "BHP.AX": ("equity", "AUD", "AU", "compounder", "equity", "AUD",
+               ["bulk_commodities", "iron_ore"], "BHP"),
+    "VGS.AX": ("etf", "AUD", "AU", "compounder", "equity", "USD", ["global_equity"], None),
+    "IHVV.AX": ("etf", "AUD", "AU", "compounder", "equity", "USD", ["global_equity"], None),
+    "TCPC": ("equity", "USD", "US", "compounder", "credit", "USD", ["us_credit"], None),
+    "FLBL": ("etf", "USD", "US", "stabiliser", "credit", "USD", ["us_rates"], None),
+    "GSBG33": ("govt_bond_nominal", "AUD", "AU", "stabiliser", "govt_bond_nominal", "AUD",
+               ["au_interest_rates"], "AU Government"),
+    "GSBI30": ("govt_bond_indexed", "AUD", "AU", "stabiliser", "govt_bond_indexed", "AUD",
+               ["au_inflation"], "AU Government"),
+    "UKW": ("listed_fund", "GBP", "GB", "optionality", "infrastructure", "GBP", ["uk_power"], None),
+    "GLD": ("etf", "USD", "US", "optionality", "commodity", "USD", ["gold"], None),
+}
+
+FLAGS = {
+    "VAS.AX": InstrumentFlags(classified=True, liquidity_days=2, stress_correlation_group="au_cyclical"),
+    "BHP.AX": InstrumentFlags(classified=True, liquidity_days=2, stress_correlation_group="au_cyclical"),
+    "VGS.AX": InstrumentFlags(classified=True, hedged=0, liquidity_days=2),
+    "IHVV.AX": InstrumentFlags(classified=True, hedged=1, liquidity_days=2),
+    "TCPC": InstrumentFlags(is_speculative=True, classified=True, liquidity_days=2),
+    "FLBL": InstrumentFlags(classified=True, duration_years=0.3, liquidity_days=2),
+    "GSBG33": InstrumentFlags(classified=True, duration_years=7.0, liquidity_days=5),
+    "GSBI30": InstrumentFlags(classified=True, duration_years=6.8, liquidity_days=10,
+                              is_inflation_linked=1),
+    "UKW": InstrumentFlags(classified=True, liquidity_days=3, yield_dominant=1,
+                           convexity_defined_downside=1, convexity_nonlinear_upside=1,
+                           convexity_stress_outperform=0),
+    "GLD": InstrumentFlags(classified=True, liquidity_days=2, convexity_defined_downside=1,
+                           convexity_nonlinear_upside=0, convexity_stress_outperform=1),
+}
+
+# (ticker, account, AUD value) — VAS.AX is held in two accounts
+POSITIONS = [
+    ("VAS.AX", "CommSec Trading", 120_000), ("VAS.AX", "IB Trading AUD", 80_000),
+    ("BHP.AX", "CommSec Trading", 80_000), ("VGS.AX", "CommSec Trading", 150_000),
+    ("IHVV.AX", "CommSec Trading", 60_000), ("TCPC", "IB Trading AUD", 9_000),
+    ("FLBL", "IB Trading AUD", 90_000), ("GSBG33", "CommSec Trading", 100_000),
+    ("GSBI30", "CommSec Trading", 50_000), ("UKW", "IB Trading AUD", 30_000),
+    ("GLD", "IB Trading AUD", 60_000),
+]
+
+
+def holding(ticker: str, account: str, value_aud: float) -> HoldingValue:
+    typ, ccy, country, role, ac, econ, drivers, group = INSTRUMENTS[ticker]
+    fx_rate = FX_RATES.get(ccy, 1.0)
+    price = 10.0
+    return HoldingValue(
+        ticker=ticker, name=f"{ticker} name", instrument_type=typ, exchange=None,
+        currency=ccy, country=country, account_name=account, institution_name="Broker",
+        quantity=value_aud / fx_rate / price, price=price, price_date=PRICE_DATE,
+        local_value=value_aud / fx_rate, fx_rate=fx_rate, value_aud=value_aud,
+        capital_role=role, macro_drivers=json.dumps(drivers), corporate_group=group,
+        asset_class=ac, economic_currency=econ,
+    )
+
+
+def make_context(**params: str) -> ComplianceContext:
+    """Seeded parameters (overridden by params) and the fixture instrument flags."""
+    values = {key: value for key, value, _ in PARAMETERS}
+    values.update(params)
+    return ComplianceContext(params=values, instruments=dict(FLAGS))
+
+
+@pytest.fixture
+def portfolio() -> PortfolioValuation:
+    book = FxRateBook(rates={(ccy, "AUD"): (rate, PRICE_DATE) for ccy, rate in FX_RATES.items()})
+    cash = [CashValue("IB Trading AUD", "Broker", "AUD", 70_000, 1.0, 70_000, PRICE_DATE),
+            CashValue("Loan", "Bank", "AUD", -20_000, 1.0, -20_000, PRICE_DATE, is_investable=False)]
+    return PortfolioValuation(holdings=[holding(*p) for p in POSITIONS], cash=cash, fx_book=book)
+
+
+@pytest.fixture
+def ctx() -> ComplianceContext:
+    return make_context()
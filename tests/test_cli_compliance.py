@@ -0,0 +1,11 @@
+"""compliance --rules is validated before any valuation runs."""
+
+from click.testing import CliRunner
+
+from src.cli.main import cli
+
+
+def test_unknown_rule_pattern_is_a_usage_error():
+    result = CliRunner().invoke(cli, ["compliance", "--rules", "99.*"])
+    assert result.exit_code == 2
+    assert "No compliance rules match" in result.output
@@ -0,0 +1,39 @@
+"""stress option conflicts are rejected before any valuation runs."""
+
+import pytest
+from click.testing import CliRunner
+
+from src.cli.main import cli
+
+
+@pytest.fixture
+def history(tmp_path):
+    path = tmp_path / "history.csv"
+    path.write_text("date,fx:USD\n2020-03-20,-0.10\n")
+    return str(path)
+
+
+def test_shock_and_factor_history_conflict(history):
+    result = CliRunner().invoke(cli, ["stress", "--shock", "fx:USD=-10%", "--factor-history", history])
+    assert result.exit_code == 2
+    assert "--shock and --factor-history cannot be combined" in result.output
+
+
+@pytest.mark.parametrize("args, message", [
+    (["--sweep", "--reverse"], "--sweep and --reverse cannot be combined"),
+    (["--monte-carlo", "bootstrap", "--reverse"], "--monte-carlo and --reverse cannot be combined"),
+    (["--reverse", "--shock", "fx:USD=-10%"], "--reverse and --shock cannot be combined"),
+    (["--scenario", "gfc2008", "--monte-carlo", "regime"], "--scenario does not apply to --monte-carlo"),
+    (["--scenario", "gfc2008", "--reverse"], "--scenario does not apply to --reverse"),
+    (["--scenario", "gfc2008", "--shock", "fx:USD=-10%"], "--scenario does not apply to --shock"),
+])
+def test_stress_modes_conflict(args, message):
+    result = CliRunner().invoke(cli, ["stress", *args])
+    assert result.exit_code == 2
+    assert message in result.output
+
+
+def test_scenario_with_factor_history_conflicts(history):
+    result = CliRunner().invoke(cli, ["stress", "--scenario", "gfc2008", "--factor-history", history])
+    assert result.exit_code == 2
+    assert "--scenario does not apply to --factor-history" in result.output
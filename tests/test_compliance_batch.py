@@ -0,0 +1,53 @@
+"""evaluate_batch() must agree with run_checks() on every screened rule."""
+
+import pytest
+
+from src.compliance.batch import BATCH_RULE_IDS, evaluate_projection
+from src.compliance.checks import RULES, run_checks
+from src.portfolio.batch import project_batch
+from tests.conftest import make_context
+
+SEVERITY = {"pass": 0, "warning": 1, "breach": 2}
+SCREENED = [r.name for r in RULES if r.name != "data_freshness"]
+
+TRADE_LISTS = [
+    [],
+    [{"ticker": "BHP.AX", "delta_aud": 60_000}],                          # equity cap, issuer
+    [{"ticker": "UKW", "delta_aud": 90_000}],                             # optionality band, yield
+    [{"ticker": "FLBL", "delta_aud": -90_000}, {"ticker": "GSBG33", "delta_aud": -100_000},
+     {"ticker": "GLD", "delta_aud": 250_000}],                            # 24-month floor
+    [{"ticker": "VGS.AX", "delta_aud": -150_000}, {"ticker": "IHVV.AX", "delta_aud": -60_000}],
+    [{"ticker": "TCPC", "delta_aud": 25_000}],                            # speculative caps
+    [{"ticker": "VGS.AX", "delta_aud": -150_000}, {"ticker": "IHVV.AX", "delta_aud": 120_000}],
+    [{"ticker": "GLD", "delta_aud": -60_000}, {"ticker": "VAS.AX", "delta_aud": 40_000}],
+    [{"ticker": "GSBI30", "delta_aud": -50_000}, {"ticker": "GSBG33", "delta_aud": 120_000}],
+]
+
+
+def _worst_by_rule(results) -> dict[str, str]:
+    worst: dict[str, str] = {}
+    for r in results:
+        if SEVERITY[r.status] >= SEVERITY[worst.get(r.rule_id, "pass")]:
+            worst[r.rule_id] = r.status
+    return worst
+
+
+@pytest.mark.parametrize("params", [{}, {"income_shock_active": "true"},
+                                    {"max_single_equity_pct": "0.20", "compounder_band_low": "0.40"}])
+def test_statuses_match_run_checks(portfolio, params):
+    ctx = make_context(**params)
+    bp = project_batch(portfolio, TRADE_LISTS)
+    batch = evaluate_projection(bp, ctx)
+
+    for i in range(len(TRADE_LISTS)):
+        worst = _worst_by_rule(run_checks(bp.portfolio(i), ctx=ctx, rules=SCREENED))
+        expected = {rule_id: worst.get(rule_id, "pass") for rule_id in BATCH_RULE_IDS}
+        assert batch.statuses(i) == expected, TRADE_LISTS[i]
+
+
+def test_trade_lists_exercise_the_rules(portfolio, ctx):
+    batch = evaluate_projection(project_batch(portfolio, TRADE_LISTS), ctx)
+    flagged = {rule_id for i in range(len(TRADE_LISTS))
+               for rule_id, status in batch.statuses(i).items() if status != "pass"}
+    assert {"1.1-S", "1.1-C", "1.1-O", "2.1", "3.1-eq", "3.1-sp", "3.2",
+            "5.2", "6.2", "7.2", "7.3", "8.1", "8.2"} <= flagged
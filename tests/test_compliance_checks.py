@@ -0,0 +1,38 @@
+"""Pass results carry the value and the threshold they are measured against."""
+
+import pytest
+
+from src.compliance.checks import RULES, run_checks
+from tests.conftest import make_context
+
+SCREENED = [r.name for r in RULES if r.name != "data_freshness"]
+
+# Loosened limits under which the fixture portfolio passes every capped rule
+LOOSE = {
+    "max_single_equity_pct": "0.20", "max_single_credit_pct": "0.12",
+    "max_speculative_single_pct": "0.02", "max_stabiliser_single_duration_pct": "0.60",
+    "stabiliser_band_high": "0.40", "aud_currency_band_low": "0.40",
+}
+
+
+@pytest.fixture
+def passes(portfolio):
+    results = run_checks(portfolio, ctx=make_context(**LOOSE), rules=SCREENED)
+    return {r.rule_id: r for r in results if r.status == "pass"}
+
+
+@pytest.mark.parametrize("rule_id, threshold", [
+    ("1.1-S", 40.0), ("1.1-C", 50.0), ("1.1-O", 10.0), ("5.1", 40.0),
+])
+def test_band_passes_store_nearest_edge(passes, rule_id, threshold):
+    assert passes[rule_id].value is not None
+    assert passes[rule_id].threshold == threshold
+
+
+def test_aggregate_passes_store_least_headroom(passes, portfolio):
+    total = portfolio.total_aud
+    position = passes["3.1"]                 # speculative TCPC is closest to its cap
+    assert (position.value, position.threshold) == (pytest.approx(9_000 / total * 100), 2.0)
+    assert (passes["4.2"].value, passes["4.2"].threshold) == (pytest.approx(210_000 / total * 100), 30.0)
+    assert passes["7.2"].threshold == 60.0
+    assert passes["7.2"].value == pytest.approx(150_000 / 310_000 * 100)
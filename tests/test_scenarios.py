@@ -0,0 +1,76 @@
+"""Currency exposure shared by scenario shocks, factor loadings and sensitivity."""
+
+import json
+
+import numpy as np
+import pytest
+
+from src.analytics.reverse import _Targets
+from src.analytics.scenarios import (
+    CompiledScenarios, StressScenario, currency_exposure, holding_factors, save_scenario,
+)
+from src.db.connection import get_connection
+from src.db.init_schema import init_db
+from tests.conftest import INSTRUMENTS
+
+
+def test_hedged_and_aud_lines_carry_no_currency_exposure(portfolio, ctx):
+    exposed = {h.ticker: currency_exposure(h, ctx) for h in portfolio.holdings}
+    assert exposed["VGS.AX"] == "USD"       # AUD-listed, unhedged USD assets
+    assert exposed["IHVV.AX"] is None       # same assets, hedged
+    assert exposed["VAS.AX"] is None
+    assert exposed["UKW"] == "GBP"
+    assert ("currency", "USD") in holding_factors(portfolio, ctx)
+
+
+def test_currency_shock_skips_hedged_lines(portfolio, ctx):
+    factors = [("currency", "USD")]
+    library = CompiledScenarios([StressScenario("aud_up", "AUD rallies")], factors,
+                                np.array([[-0.10]]))
+    returns = dict(zip((h.ticker for h in portfolio.holdings), library.returns(portfolio, ctx)[:, 0]))
+    assert returns["VGS.AX"] == pytest.approx(-0.10)
+    assert returns["GLD"] == pytest.approx(-0.10)
+    assert returns["IHVV.AX"] == 0.0
+    assert returns["VAS.AX"] == 0.0
+
+
+@pytest.mark.parametrize("key", ["AUD", "aud"])
+def test_save_scenario_rejects_aud_shock(key):
+    with pytest.raises(ValueError, match="AUD"):
+        save_scenario("aud_self", "AUD", shocks={("currency", key): 0.1})
+
+
+def test_reverse_search_shocks_only_unhedged_currency(portfolio, ctx):
+    targets = _Targets(portfolio, ctx)
+    usd = targets.factors.index(("currency", "USD"))
+    exposed = {h.ticker for h, row in zip(portfolio.holdings, targets.exposure) if row[usd]}
+    assert exposed == {"VGS.AX", "TCPC", "FLBL", "GLD"}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "scenarios.db"
+    init_db(path)
+    with get_connection(path) as conn:
+        for ticker, (typ, ccy, country, _, ac, econ, drivers, _) in INSTRUMENTS.items():
+            pk = conn.execute(
+                "INSERT INTO instruments (ticker, instrument_type, currency, country_domicile) "
+                "VALUES (?, ?, ?, ?)", (ticker, typ, ccy, country)).lastrowid
+            conn.execute(
+                "INSERT INTO instrument_classifications "
+                "(instrument_id, asset_class, economic_currency, macro_drivers) VALUES (?, ?, ?, ?)",
+                (pk, ac, econ, json.dumps(drivers)))
+    return path
+
+
+def test_save_scenario_normalises_currency_keys(db_path):
+    scenario = save_scenario("aud_up", "AUD rallies", shocks={("currency", "usd"): -0.1},
+                             db_path=db_path)
+    assert scenario.shocks == {("currency", "USD"): -0.1}
+
+
+@pytest.mark.parametrize("factor", [("asset_class", "Equity"), ("macro_driver", "iron ore"),
+                                    ("currency", "JPY")])
+def test_save_scenario_rejects_keys_no_instrument_carries(db_path, factor):
+    with pytest.raises(ValueError, match="No instrument carries"):
+        save_scenario("typo", "Typo", shocks={factor: -0.3}, db_path=db_path)
@@ -0,0 +1,22 @@
+"""Sensitivity surface break-even levels follow the rule parameters."""
+
+import numpy as np
+import pytest
+
+from src.analytics.sensitivity import sensitivity_surface
+from tests.conftest import make_context
+
+
+def test_surface_levels_follow_parameters(portfolio):
+    ctx = make_context(stabiliser_months="30", aud_currency_band_low="0.45")
+    grid = np.linspace(-0.5, 0.0, 11)
+    surface = sensitivity_surface(portfolio, "equity", "stabiliser", grid, grid, ctx=ctx)
+    assert surface.levels == {"income_bridge_months": 30.0, "stabiliser_excess_aud": 0.0,
+                              "aud_growth_pct": 45.0}
+
+    # Income bridge months and stabiliser excess cross their floors together
+    months = surface.break_even("income_bridge_months")
+    np.testing.assert_allclose(months, surface.break_even("stabiliser_excess_aud"))
+    assert not np.isnan(months).all()
+    assert surface.break_even("income_bridge_months", level=24.0)[0] == pytest.approx(
+        surface.break_even("stabiliser_excess_aud", level=-6 * 9000)[0])